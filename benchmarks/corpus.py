@@ -0,0 +1,103 @@
+"""Generate reproducible synthetic Norwegian poems for benchmarking.
+
+The vocabulary is drawn from the example poems in `benchmarks/data/example_poems.json`,
+and extended with new words made from their syllables when a larger
+vocabulary is requested. All randomness comes from a seeded generator,
+so the same arguments always give the same corpus.
+"""
+
+import json
+import random
+from dataclasses import dataclass
+from pathlib import Path
+
+from poetry_analysis import utils
+
+EXAMPLES = json.loads((Path(__file__).parent / "data" / "example_poems.json").read_text(encoding="utf-8"))
+EXAMPLE_POEMS = EXAMPLES["poems"]
+
+
+@dataclass
+class CorpusConfig:
+    """Size of the generated poems and corpus."""
+
+    n_poems: int = 100
+    stanzas_per_poem: int = 4
+    lines_per_stanza: int = 4
+    words_per_line: int = 6
+    vocabulary_size: int = 2000
+    seed: int = 2025
+
+
+SIZES = {
+    "small": CorpusConfig(n_poems=20, stanzas_per_poem=3, lines_per_stanza=4, vocabulary_size=500),
+    "medium": CorpusConfig(n_poems=200, stanzas_per_poem=4, lines_per_stanza=6, vocabulary_size=2000),
+    "large": CorpusConfig(n_poems=2000, stanzas_per_poem=6, lines_per_stanza=8, vocabulary_size=8000),
+}
+
+
+def build_vocabulary(size: int, seed: int = 2025) -> list[str]:
+    """Collect the distinct words of the example poems, and add new words
+    made of their syllables until the vocabulary has the requested size."""
+    rng = random.Random(seed)  # noqa: S311
+    words = sorted({word for poem in EXAMPLE_POEMS for word in utils.normalize(poem) if word.isalpha()})
+    rng.shuffle(words)
+    if len(words) >= size:
+        return words[:size]
+
+    syllables = sorted({syllable for word in words for syllable in utils.syllabify_orthographic_word(word)})
+    vocabulary = set(words)
+    while len(vocabulary) < size:
+        n_syllables = rng.randint(1, 4)
+        vocabulary.add("".join(rng.choice(syllables) for _ in range(n_syllables)))
+    return sorted(vocabulary)
+
+
+def generate_poem(rng: random.Random, vocabulary: list[str], config: CorpusConfig) -> str:
+    """Generate an orthographic poem with stanzas separated by empty lines."""
+    stanzas = []
+    for _ in range(config.stanzas_per_poem):
+        lines = []
+        for _ in range(config.lines_per_stanza):
+            words = rng.choices(vocabulary, k=rng.randint(max(1, config.words_per_line - 2), config.words_per_line + 2))
+            words[0] = words[0].capitalize()
+            lines.append(" ".join(words) + rng.choice(["", "", ",", ".", "!"]))
+        stanzas.append("\n".join(lines))
+    return "\n\n".join(stanzas) + "\n"
+
+
+def generate_transcribed_poem(rng: random.Random, config: CorpusConfig) -> dict:
+    """Generate a poem in the format of the transcribed JSON files read by `tag_poem_file`,
+    with words and Nofabet transcriptions drawn from the example transcription."""
+    word_pairs = sorted(
+        {
+            pair
+            for orthographic, transcribed in zip(
+                EXAMPLES["orthographic_lines"], EXAMPLES["transcribed_lines"], strict=True
+            )
+            for pair in zip(orthographic, transcribed, strict=True)
+        }
+    )
+    poem = {"text_id": f"synthetic_{rng.randint(0, 10**6)}"}
+    line_number = 0
+    for _ in range(config.stanzas_per_poem):
+        for _ in range(config.lines_per_stanza):
+            n_words = rng.randint(max(1, config.words_per_line - 2), config.words_per_line + 2)
+            poem[f"line_{line_number}"] = [list(pair) for pair in rng.choices(word_pairs, k=n_words)]
+            line_number += 1
+        poem[f"line_{line_number}"] = []
+        line_number += 1
+    return poem
+
+
+def generate_corpus(config: CorpusConfig) -> list[str]:
+    """Generate a list of orthographic poems."""
+    rng = random.Random(config.seed)  # noqa: S311
+    vocabulary = build_vocabulary(config.vocabulary_size, seed=config.seed)
+    return [generate_poem(rng, vocabulary, config) for _ in range(config.n_poems)]
+
+
+def generate_transcribed_corpus(config: CorpusConfig) -> list[dict]:
+    """Generate a list of poems with Nofabet transcriptions."""
+    rng = random.Random(config.seed)  # noqa: S311
+    return [generate_transcribed_poem(rng, config) for _ in range(config.n_poems)]
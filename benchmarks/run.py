@@ -0,0 +1,295 @@
+"""Time the extractors and file-level paths on a synthetic corpus.
+
+Usage:
+    python -m benchmarks.run --size small
+    python -m benchmarks.run --size medium --output before.json
+    python -m benchmarks.run --size medium --compare before.json --max-slowdown 1.2
+
+The results are saved as JSON, with the corpus configuration and the
+git commit they were measured on, so runs can be compared across commits.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.corpus import SIZES, CorpusConfig, generate_corpus, generate_transcribed_corpus
+from poetry_analysis import alliteration, anaphora, lyrical_subject, meter, utils
+from poetry_analysis import rhyme_detection as rd
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# Each benchmark takes the corpora and a temporary directory,
+# and returns the number of items it processes and a function to time.
+BENCHMARKS: dict[str, Callable] = {}
+
+
+def benchmark(name: str) -> Callable:
+    """Register a benchmark setup function under a name."""
+
+    def register(setup: Callable) -> Callable:
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+@benchmark("tag_rhyming_verses.orthographic")
+def bench_tag_rhyming_verses_orthographic(corpus: list[str], transcribed: list[dict], tmp_dir: Path) -> tuple:
+    stanzas = [stanza for poem in corpus for stanza in utils.split_stanzas(poem)]
+    return len(stanzas), lambda: [rd.tag_rhyming_verses(stanza, orthographic=True) for stanza in stanzas]
+
+
+@benchmark("tag_rhyming_verses.phonemic")
+def bench_tag_rhyming_verses_phonemic(corpus: list[str], transcribed: list[dict], tmp_dir: Path) -> tuple:
+    stanzas = [stanza for poem in transcribed for stanza in rd.get_stanzas_from_transcription(poem)]
+    return len(stanzas), lambda: [rd.tag_rhyming_verses(stanza, orthographic=False) for stanza in stanzas]
+
+
+@benchmark("tag_rhyming_verses.near_rhyme")
+def bench_tag_rhyming_verses_near_rhyme(corpus: list[str], transcribed: list[dict], tmp_dir: Path) -> tuple:
+    stanzas = [stanza for poem in transcribed for stanza in rd.get_stanzas_from_transcription(poem)]
+    return len(stanzas), lambda: [rd.tag_rhyming_verses(stanza, near_rhyme_threshold=0.7) for stanza in stanzas]
+
+
+@benchmark("find_internal_rhymes.phonemic")
+def bench_find_internal_rhymes_phonemic(corpus: list[str], transcribed: list[dict], tmp_dir: Path) -> tuple:
+    stanzas = [stanza for poem in transcribed for stanza in rd.get_stanzas_from_transcription(poem)]
+
+    def run() -> list:
+        rd.rhyme_key.cache_clear()
+        return [rd.find_internal_rhymes(stanza) for stanza in stanzas]
+
+    return len(stanzas), run
+
+
+@benchmark("scan_poem")
+def bench_scan_poem(corpus: list[str], transcribed: list[dict], tmp_dir: Path) -> tuple:
+    poems = [rd.get_stanzas_from_transcription(poem) for poem in transcribed]
+    return len(poems), lambda: [meter.scan_poem(stanzas) for stanzas in poems]
+
+
+@benchmark("count_syllables_batch")
+def bench_count_syllables_batch(corpus: list[str], transcribed: list[dict], tmp_dir: Path) -> tuple:
+    verses = [verse for poem in transcribed for stanza in rd.get_stanzas_from_transcription(poem) for verse in stanza]
+    return len(verses), lambda: utils.count_syllables_batch(verses)
+
+
+@benchmark("convert_to_syllables")
+def bench_convert_to_syllables(corpus: list[str], transcribed: list[dict], tmp_dir: Path) -> tuple:
+    verses = [verse for poem in transcribed for stanza in rd.get_stanzas_from_transcription(poem) for verse in stanza]
+    return len(verses), lambda: [len(utils.convert_to_syllables(verse)) for verse in verses]
+
+
+def _word_pairs(corpus: list[str]) -> tuple[list[str], list[str]]:
+    """Pair the words of each line with the last word of the line, as a rhyme dictionary build would."""
+    pairs = [
+        (word, tokens[-1])
+        for poem in corpus
+        for line in poem.splitlines()
+        if (tokens := utils.normalize(line))
+        for word in tokens
+    ]
+    return [first for first, _ in pairs], [second for _, second in pairs]
+
+
+@benchmark("score_rhyme")
+def bench_score_rhyme(corpus: list[str], transcribed: list[dict], tmp_dir: Path) -> tuple:
+    words1, words2 = _word_pairs(corpus)
+    return len(words1), lambda: [
+        rd.score_rhyme(w1, w2, orthographic=True) for w1, w2 in zip(words1, words2, strict=True)
+    ]
+
+
+@benchmark("score_rhymes")
+def bench_score_rhymes(corpus: list[str], transcribed: list[dict], tmp_dir: Path) -> tuple:
+    words1, words2 = _word_pairs(corpus)
+    return len(words1), lambda: rd.score_rhymes(words1, words2, orthographic=True)
+
+
+@benchmark("find_line_alliterations")
+def bench_find_line_alliterations(corpus: list[str], transcribed: list[dict], tmp_dir: Path) -> tuple:
+    lines = [line for poem in corpus for line in poem.splitlines() if line]
+    return len(lines), lambda: [alliteration.find_line_alliterations(line) for line in lines]
+
+
+@benchmark("count_initial_phrases")
+def bench_count_initial_phrases(corpus: list[str], transcribed: list[dict], tmp_dir: Path) -> tuple:
+    lines = [line for poem in corpus for line in poem.splitlines() if line]
+    return len(lines), lambda: [anaphora.count_initial_phrases(line) for line in lines]
+
+
+@benchmark("extract_poem_anaphora")
+def bench_extract_poem_anaphora(corpus: list[str], transcribed: list[dict], tmp_dir: Path) -> tuple:
+    return len(corpus), lambda: [anaphora.extract_poem_anaphora(poem) for poem in corpus]
+
+
+@benchmark("detect_lyrical_subject")
+def bench_detect_lyrical_subject(corpus: list[str], transcribed: list[dict], tmp_dir: Path) -> tuple:
+    return len(corpus), lambda: [lyrical_subject.detect_lyrical_subject(poem) for poem in corpus]
+
+
+@benchmark("tag_poem_file.txt")
+def bench_tag_poem_file_txt(corpus: list[str], transcribed: list[dict], tmp_dir: Path) -> tuple:
+    files = []
+    for i, poem in enumerate(corpus):
+        filepath = tmp_dir / f"{i}_poem.txt"
+        filepath.write_text(poem, encoding="utf-8")
+        files.append(filepath)
+    return len(files), lambda: [rd.tag_poem_file(filepath, write_to_file=True) for filepath in files]
+
+
+@benchmark("tag_poem_file.json")
+def bench_tag_poem_file_json(corpus: list[str], transcribed: list[dict], tmp_dir: Path) -> tuple:
+    files = []
+    for i, poem in enumerate(transcribed):
+        filepath = tmp_dir / f"{i}_poem.json"
+        filepath.write_text(json.dumps(poem, ensure_ascii=False), encoding="utf-8")
+        files.append(filepath)
+    return len(files), lambda: [rd.tag_poem_file(filepath, write_to_file=True) for filepath in files]
+
+
+@benchmark("annotate.anaphora_file")
+def bench_annotate_file(corpus: list[str], transcribed: list[dict], tmp_dir: Path) -> tuple:
+    def annotate_all() -> None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i, poem in enumerate(corpus):
+                utils.annotate(anaphora.extract_poem_anaphora, poem, outputfile=tmp_dir / f"{i}_anaphora.json")
+
+    return len(corpus), annotate_all
+
+
+def time_function(function: Callable, repeat: int) -> list[float]:
+    """Time a function a number of times, with an empty tokenization cache each time."""
+    timings = []
+    for _ in range(repeat):
+        utils.clear_token_cache()
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def get_commit() -> str | None:
+    """Return the current git commit hash, if available."""
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "HEAD"],  # noqa: S607
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip()
+
+
+def run_benchmarks(config: CorpusConfig, repeat: int = 5, names: list[str] | None = None) -> dict:
+    """Run the selected benchmarks and return the results with metadata."""
+    corpus = generate_corpus(config)
+    transcribed = generate_transcribed_corpus(config)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name in names or BENCHMARKS:
+            n_items, function = BENCHMARKS[name](corpus, transcribed, Path(tmp_dir))
+            function()  # warm up imports and compiled patterns
+            timings = time_function(function, repeat)
+            results[name] = {
+                "items": n_items,
+                "repeat": repeat,
+                "min": min(timings),
+                "median": statistics.median(timings),
+                "mean": statistics.mean(timings),
+                "stdev": statistics.stdev(timings) if repeat > 1 else 0.0,
+                "min_per_item_us": min(timings) / max(n_items, 1) * 1e6,
+            }
+    return {
+        "metadata": {
+            "commit": get_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "config": asdict(config),
+        "results": results,
+    }
+
+
+def compare_results(current: dict, baseline: dict) -> dict[str, float]:
+    """Return the ratio of the current to the baseline minimum time for each shared benchmark."""
+    return {
+        name: result["min"] / baseline["results"][name]["min"]
+        for name, result in current["results"].items()
+        if name in baseline["results"] and baseline["results"][name]["min"] > 0
+    }
+
+
+def print_results(results: dict, ratios: dict[str, float] | None = None) -> None:
+    print(f"{'benchmark':<34} {'items':>7} {'min [s]':>10} {'median [s]':>11} {'per item [µs]':>14}", end="")
+    print(f" {'vs. baseline':>13}" if ratios is not None else "")
+    for name, result in results["results"].items():
+        print(
+            f"{name:<34} {result['items']:>7} {result['min']:>10.4f} {result['median']:>11.4f} "
+            f"{result['min_per_item_us']:>14.1f}",
+            end="",
+        )
+        print(f" {ratios[name]:>12.2f}x" if ratios is not None and name in ratios else "")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the poetry_analysis extractors.")
+    parser.add_argument("--size", choices=SIZES, default="small", help="Size of the synthetic corpus.")
+    parser.add_argument("--seed", type=int, help="Seed for the corpus generator.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed runs per benchmark.")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="Only run these benchmarks.")
+    parser.add_argument("-o", "--output", type=Path, help="Where to save the results as JSON.")
+    parser.add_argument("--compare", type=Path, help="Results file to compare with.")
+    parser.add_argument(
+        "--max-slowdown",
+        type=float,
+        help="Exit with an error if a benchmark is this many times slower than in the compared results.",
+    )
+    args = parser.parse_args()
+
+    config = SIZES[args.size]
+    if args.seed is not None:
+        config = CorpusConfig(**{**asdict(config), "seed": args.seed})
+
+    results = run_benchmarks(config, repeat=args.repeat, names=args.only)
+    results["metadata"]["size"] = args.size
+
+    ratios = None
+    if args.compare:
+        ratios = compare_results(results, json.loads(args.compare.read_text(encoding="utf-8")))
+    print_results(results, ratios)
+
+    output = args.output
+    if output is None:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        commit = (results["metadata"]["commit"] or "local")[:10]
+        output = RESULTS_DIR / f"{args.size}_{commit}.json"
+    output.write_text(json.dumps(results, indent=4), encoding="utf-8")
+    print(f"Saved benchmark results to {output}")
+
+    if ratios and args.max_slowdown is not None:
+        slower = {name: ratio for name, ratio in ratios.items() if ratio > args.max_slowdown}
+        if slower:
+            print(f"Slower than {args.max_slowdown}x the baseline: {', '.join(slower)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""Measure how the running time of each extractor grows with the size of its input.
+
+Each case runs an extractor on inputs of increasing size, and fits the exponent `k`
+of `time = c * size**k` to the timings on a log-log scale. An exponent close to 1
+means linear growth, close to 2 means quadratic growth. The run fails if an
+exponent is above the budget of its case, so a change that makes a linear path
+quadratic is caught even if it is fast on typical poems. The cases that are known
+to be quadratic have a budget that still fails if they get worse than that.
+
+Usage:
+    python -m benchmarks.scaling
+    python -m benchmarks.scaling --only detect_repeating_lines tag_text --output scaling.json
+"""
+
+import argparse
+import json
+import random
+import string
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+from benchmarks.corpus import CorpusConfig, build_vocabulary, generate_poem
+from poetry_analysis import alliteration, anaphora, lyrical_subject, utils
+from poetry_analysis import rhyme_detection as rd
+
+VOCABULARY = build_vocabulary(2000)
+
+
+@dataclass
+class ScalingCase:
+    """An extractor, a generator for its input of a given size, and the highest accepted exponent.
+
+    `known_failure` explains why a case grows faster than linearly. It is only shown in
+    the report, and the case still fails if its exponent is above the budget.
+    """
+
+    run: Callable
+    make_input: Callable[[int, random.Random], object]
+    sizes: tuple[int, ...]
+    budget: float = 1.35
+    unit: str = "words"
+    known_failure: str | None = None
+
+
+def make_line(size: int, rng: random.Random) -> str:
+    return " ".join(rng.choices(VOCABULARY, k=size))
+
+
+def make_stanza(size: int, rng: random.Random) -> list[str]:
+    config = CorpusConfig(stanzas_per_poem=1, lines_per_stanza=size)
+    return utils.split_stanzas(generate_poem(rng, VOCABULARY, config))[0]
+
+
+def make_poem(size: int, rng: random.Random) -> str:
+    return generate_poem(rng, VOCABULARY, CorpusConfig(stanzas_per_poem=size))
+
+
+def make_letters(size: int, rng: random.Random) -> tuple[str, str]:
+    return "".join(rng.choices("abcdefg", k=size)), "".join(rng.choices(string.ascii_lowercase, k=size))
+
+
+# Budgets leave room for timing noise above the expected exponent.
+CASES = {
+    "find_line_alliterations": ScalingCase(
+        run=alliteration.find_line_alliterations,
+        make_input=make_line,
+        sizes=(100, 200, 400, 800, 1600),
+    ),
+    "count_initial_phrases": ScalingCase(
+        run=anaphora.count_initial_phrases,
+        make_input=make_line,
+        sizes=(50, 100, 200, 400, 800),
+        budget=2.3,
+        known_failure="Returns every line-initial phrase, so its output alone is quadratic in the number of words",
+    ),
+    "tag_rhyming_verses.orthographic": ScalingCase(
+        run=lambda stanza: rd.tag_rhyming_verses(stanza, orthographic=True),
+        make_input=make_stanza,
+        sizes=(25, 50, 100, 200, 400),
+        unit="lines",
+        budget=2.3,
+        known_failure="Compares each verse with all previous verses until a rhyme is found",
+    ),
+    "longest_common_substring": ScalingCase(
+        run=lambda strings: rd.longest_common_substring(*strings),
+        make_input=make_letters,
+        sizes=(25, 50, 100, 200, 400),
+        unit="symbols",
+        budget=2.3,
+        known_failure="Fills in a table with a cell for each pair of symbols",
+    ),
+    "extract_poem_anaphora": ScalingCase(
+        run=anaphora.extract_poem_anaphora,
+        make_input=make_poem,
+        sizes=(20, 40, 80, 160, 320),
+        unit="stanzas",
+    ),
+    "detect_repeating_lines": ScalingCase(
+        run=anaphora.detect_repeating_lines,
+        make_input=make_poem,
+        sizes=(20, 40, 80, 160, 320),
+        unit="stanzas",
+    ),
+    "detect_lyrical_subject": ScalingCase(
+        run=lyrical_subject.detect_lyrical_subject,
+        make_input=make_poem,
+        sizes=(20, 40, 80, 160, 320),
+        unit="stanzas",
+    ),
+    "tag_text": ScalingCase(
+        run=lambda text: list(rd.tag_text(text)),
+        make_input=make_poem,
+        sizes=(20, 40, 80, 160, 320),
+        unit="stanzas",
+    ),
+}
+
+
+def fit_exponent(sizes: list[int], timings: list[float]) -> float:
+    """Fit the exponent `k` in `time = c * size**k` with least squares on a log-log scale.
+
+    Examples:
+        >>> round(fit_exponent([10, 20, 40], [0.1, 0.4, 1.6]), 2)
+        2.0
+    """
+    import numpy as np
+
+    slope, _ = np.polyfit(np.log(sizes), np.log(timings), deg=1)
+    return float(slope)
+
+
+def time_case(case: ScalingCase, repeat: int = 5, seed: int = 2025) -> list[float]:
+    """Return the shortest running time of the case for each input size."""
+    rng = random.Random(seed)  # noqa: S311
+    timings = []
+    for size in case.sizes:
+        data = case.make_input(size, rng)
+        case.run(data)  # warm up
+        runs = []
+        for _ in range(repeat):
+            utils.clear_token_cache()
+            start = time.perf_counter()
+            case.run(data)
+            runs.append(time.perf_counter() - start)
+        timings.append(min(runs))
+    return timings
+
+
+def run_scaling(names: list[str] | None = None, repeat: int = 5, seed: int = 2025) -> dict:
+    """Time the selected cases and fit their exponents."""
+    results = {}
+    for name in names or CASES:
+        case = CASES[name]
+        timings = time_case(case, repeat=repeat, seed=seed)
+        exponent = fit_exponent(list(case.sizes), timings)
+        results[name] = {
+            "unit": case.unit,
+            "sizes": list(case.sizes),
+            "timings": timings,
+            "exponent": exponent,
+            "budget": case.budget,
+            "within_budget": exponent <= case.budget,
+            "known_failure": case.known_failure,
+        }
+    return results
+
+
+def over_budget(results: dict) -> list[str]:
+    """Return the names of the cases with a growth exponent above their budget."""
+    return [name for name, result in results.items() if not result["within_budget"]]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Fit the growth exponents of the poetry_analysis extractors.")
+    parser.add_argument("--only", nargs="+", choices=CASES, help="Only run these cases.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed runs per input size.")
+    parser.add_argument("--seed", type=int, default=2025, help="Seed for the input generator.")
+    parser.add_argument("-o", "--output", type=Path, help="Where to save the results as JSON.")
+    args = parser.parse_args()
+
+    results = run_scaling(args.only, repeat=args.repeat, seed=args.seed)
+
+    print(f"{'case':<34} {'sizes':<22} {'exponent':>9} {'budget':>7}")
+    for name, result in results.items():
+        sizes = f"{result['sizes'][0]}-{result['sizes'][-1]} {result['unit']}"
+        status = "" if result["within_budget"] else "  OVER BUDGET"
+        if result["known_failure"]:
+            status += f"  ({result['known_failure']})"
+        print(f"{name:<34} {sizes:<22} {result['exponent']:>9.2f} {result['budget']:>7.2f}{status}")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=4), encoding="utf-8")
+        print(f"Saved scaling results to {args.output}")
+
+    failed = over_budget(results)
+    if failed:
+        print(f"Growth exponent above budget: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Time the serialization backends on the annotations of a synthetic corpus.
+
+Usage:
+    python -m benchmarks.serialization --size medium
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+
+from benchmarks.corpus import SIZES, generate_corpus
+from poetry_analysis import serialization
+from poetry_analysis.parallel import process_poems
+
+
+def annotate_corpus(size: str) -> list[dict]:
+    """Annotate the corpus of a given size with all the extractors."""
+    return list(process_poems(generate_corpus(SIZES[size]), jobs=1))
+
+
+def time_backend(annotations: list[dict], backend: str, pretty: bool, repeat: int = 5) -> dict:
+    """Time the serialization of the annotations to bytes, and back again."""
+    dump_timings, load_timings = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        serialized = serialization.dumps(annotations, backend=backend, pretty=pretty)
+        dump_timings.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        serialization.loads(serialized, backend=backend)
+        load_timings.append(time.perf_counter() - start)
+    return {
+        "backend": backend,
+        "pretty": pretty,
+        "bytes": len(serialized),
+        "dumps_min": min(dump_timings),
+        "dumps_median": statistics.median(dump_timings),
+        "loads_min": min(load_timings),
+        "loads_median": statistics.median(load_timings),
+    }
+
+
+def time_indented_stdlib(annotations: list[dict], repeat: int = 5) -> dict:
+    """Time the `json.dumps(..., indent=4, ensure_ascii=False)` calls that the output paths used before."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        serialized = json.dumps(annotations, indent=4, ensure_ascii=False).encode("utf-8")
+        timings.append(time.perf_counter() - start)
+    return {"backend": "json (indent=4, before)", "pretty": True, "bytes": len(serialized), "dumps_min": min(timings)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the serialization backends.")
+    parser.add_argument("--size", choices=SIZES, default="small", help="Size of the synthetic corpus.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed runs per backend.")
+    parser.add_argument("-o", "--output", help="Where to save the results as JSON.")
+    args = parser.parse_args()
+
+    annotations = annotate_corpus(args.size)
+    results = [time_indented_stdlib(annotations, repeat=args.repeat)]
+    for backend in serialization.available_backends():
+        for pretty in (False, True) if backend != "msgpack" else (False,):
+            results.append(time_backend(annotations, backend, pretty, repeat=args.repeat))
+
+    baseline = results[0]
+    print(f"{len(annotations)} annotated poems")
+    print(f"{'backend':<26} {'pretty':>6} {'size [kB]':>10} {'dumps [ms]':>11} {'loads [ms]':>11} {'speedup':>8}")
+    for result in results:
+        loads_ms = f"{result['loads_min'] * 1000:>11.2f}" if "loads_min" in result else f"{'':>11}"
+        print(
+            f"{result['backend']:<26} {'yes' if result.get('pretty') else 'no':>6} {result['bytes'] / 1000:>10.1f} "
+            f"{result['dumps_min'] * 1000:>11.2f} {loads_ms} {baseline['dumps_min'] / result['dumps_min']:>7.1f}x"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"size": args.size, "poems": len(annotations), "results": results}, f, indent=4)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
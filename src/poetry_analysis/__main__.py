@@ -0,0 +1,5 @@
+import sys
+
+from poetry_analysis.cli import main
+
+sys.exit(main())
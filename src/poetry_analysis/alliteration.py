@@ -2,7 +2,7 @@
 of word-initial consonants or consonant clusters.
 """
 
-from poetry_analysis.utils import normalize
+from poetry_analysis.utils import normalize, normalize_with_spans, split_stanza_spans
 
 
 def count_alliteration(text: str) -> dict:
@@ -125,20 +125,32 @@ def group_alliterating_indices(
     return result_groups
 
 
-def find_line_alliterations(text: str, allowed_intervening_words: list | None = None) -> list:  # noqa: C901
+def find_line_alliterations(  # noqa: C901
+    text: str, allowed_intervening_words: list | None = None, offsets: bool = False, offset: int = 0
+) -> list:
     """Find alliterating words on a line.
 
     Args:
         text: A line of text with multiple tokens
         allowed_intervening_words: words that can occur between two alliterating words
             without breaking the alliteration effect. Defaults to "og", "i", and "er".
+        offsets: If True, return the (start, end) character offsets of the words
+            in the text instead of the words themselves.
+        offset: Position of the line in a larger text, which is added to the offsets.
     Returns:
-        list of lists of words that are alliterating
+        list of lists of words (or word offsets) that are alliterating
+
+    Examples:
+        >>> find_line_alliterations("Svæve saa stille,", offsets=True)
+        [[(0, 5), (6, 9), (10, 16)]]
     """
     if allowed_intervening_words is None:
         allowed_intervening_words = ["og", "i", "er"]
 
-    words = normalize(text)
+    if offsets:
+        words, spans = normalize_with_spans(text, offset=offset)
+    else:
+        words = normalize(text)
 
     # Stores {initial_letter: [indices_of_words_starting_with_this_letter]}
     seen = {}
@@ -169,11 +181,49 @@ def find_line_alliterations(text: str, allowed_intervening_words: list | None =
 
                 for group_indices in alliterating_groups:
                     # group_alliterating_indices already ensures len(group_indices) >= 2
-                    alliteration_annotations.append([words[p] for p in group_indices])
+                    items = spans if offsets else words
+                    alliteration_annotations.append([items[p] for p in group_indices])
 
     return alliteration_annotations
 
 
+def extract_poem_alliterations(
+    text: str, allowed_intervening_words: list | None = None, offsets: bool = False
+) -> list[dict]:
+    """Find alliterating words on each line of each stanza in a poem.
+
+    Args:
+        text: The poem, with stanzas separated by empty lines.
+        allowed_intervening_words: See `find_line_alliterations`.
+        offsets: If True, annotate the (start, end) character offsets of the
+            alliterating words in the poem as `spans`, instead of copying the `words`.
+
+    Examples:
+        >>> extract_poem_alliterations("Svæve saa stille\\n\\nStraale saa smukt")
+        [{'stanza_id': 0, 'line_id': 0, 'symbol': 's', 'count': 3, 'words': ['svæve', 'saa', 'stille']}, {'stanza_id': 1, 'line_id': 0, 'symbol': 's', 'count': 3, 'words': ['straale', 'saa', 'smukt']}]
+    """
+    annotations = []
+    for stanza_id, stanza in enumerate(split_stanza_spans(text)):
+        for line_id, (start, end) in enumerate(stanza):
+            if start == end:
+                continue
+            groups = find_line_alliterations(
+                text[start:end], allowed_intervening_words=allowed_intervening_words, offsets=offsets, offset=start
+            )
+            for group in groups:
+                symbol = text[group[0][0]].lower() if offsets else group[0][0]
+                annotations.append(
+                    {
+                        "stanza_id": stanza_id,
+                        "line_id": line_id,
+                        "symbol": symbol,
+                        "count": len(group),
+                        "spans" if offsets else "words": group,
+                    }
+                )
+    return annotations
+
+
 def is_vowel(symbol: str) -> bool:
     vowels = "aeiouyøæå"
     return symbol.casefold() in vowels
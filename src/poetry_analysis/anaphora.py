@@ -9,7 +9,7 @@ We will continue with implementing a grading system for how effective the figure
 """
 
 from collections import Counter, defaultdict
-from collections.abc import Generator
+from collections.abc import Generator, Iterable
 
 from poetry_analysis import utils
 
@@ -112,19 +112,29 @@ def extract_stanza_anaphora(stanza: list[str], n_words: int = 1) -> dict:
     return stanza_anaphora
 
 
-def extract_poem_anaphora(text: str) -> list:
-    """Extract line-initial word sequences that are repeated at least twice in each stanza."""
-    anaphora = []
+def iter_poem_anaphora(stanzas: Iterable[list[str]]) -> Generator[dict, None, None]:
+    """Yield the line-initial word sequences that are repeated at least twice in each stanza,
+    as soon as each stanza is read, e.g. from `utils.iter_stanzas`.
 
-    stanzas = utils.split_stanzas(text)
+    Examples:
+        >>> import io
+        >>> stream = io.StringIO("Jeg ser\\njeg ser\\n\\nDu gaar\\ndu gaar\\n")
+        >>> for item in iter_poem_anaphora(utils.iter_stanzas(stream)):
+        ...     print(item)
+        {'line_id': [0, 1], 'phrase': 'jeg', 'count': 2, 'stanza_id': 0}
+        {'line_id': [0, 1], 'phrase': 'du', 'count': 2, 'stanza_id': 1}
+    """
     for i, stanza in enumerate(stanzas):
         stanza_anaphora = extract_stanza_anaphora(stanza)
 
         for item in filter_anaphora(stanza_anaphora):
             item["stanza_id"] = i
-            anaphora.append(item)
+            yield item
 
-    return anaphora
+
+def extract_poem_anaphora(text: str) -> list:
+    """Extract line-initial word sequences that are repeated at least twice in each stanza."""
+    return list(iter_poem_anaphora(utils.split_stanzas(text)))
 
 
 def detect_repeating_lines(text: str) -> list:
@@ -132,14 +142,11 @@ def detect_repeating_lines(text: str) -> list:
     stanzas = utils.split_stanzas(text)
     lines = [line.strip() for stanza in stanzas for line in stanza]
 
+    line_counts = Counter(lines)
     repeating_lines = {}
     for idx, line in enumerate(lines):
-        if line in repeating_lines:
-            repeating_lines[line].append(idx)
-        else:
-            total = lines.count(line)
-            if total > 1:
-                repeating_lines[line] = [idx]
+        if line_counts[line] > 1:
+            repeating_lines.setdefault(line, []).append(idx)
 
     return [(indeces, line) for line, indeces in repeating_lines.items()]
 
@@ -0,0 +1,368 @@
+"""The `poetry-analysis` command line tool.
+
+Annotate poems with one or all of the lyric feature extractors:
+
+    poetry-analysis rhyme poems/ -o rhymes.jsonl --format jsonl
+    poetry-analysis all "corpus/*.txt" --jobs 4 --cache-dir .annotations
+    cat poem.txt | poetry-analysis lyrical-subject
+    poetry-analysis serve --port 8000
+
+The inputs can be text files with one poem each, JSON files with a poem dict
+or a list of poem dicts, JSONL files with a poem dict per line, directories with
+such files, or glob patterns. Without inputs, or with `-`, a poem or JSON(L) poems
+are read from stdin. Poem dicts have the text in the field given by `--text-field`.
+
+The extractors and their dependencies are only imported when a subcommand runs,
+so that `--help` and argument errors are fast.
+"""
+
+import argparse
+import sys
+from collections.abc import Generator, Iterable
+from pathlib import Path
+
+# Subcommands and the extractors in `poetry_analysis.parallel.EXTRACTORS` they run
+SUBCOMMANDS = {
+    "rhyme": ["rhyme"],
+    "alliteration": ["alliteration"],
+    "anaphora": ["anaphora"],
+    "lyrical-subject": ["lyrical_subject"],
+    "all": ["rhyme", "alliteration", "anaphora", "lyrical_subject"],
+}
+
+SUBCOMMAND_HELP = {
+    "rhyme": "Tag the end rhyme scheme of each stanza.",
+    "alliteration": "Find alliterating words in each line.",
+    "anaphora": "Find repeated line-initial words in each stanza.",
+    "lyrical-subject": "Detect first and second person forms and deixis.",
+    "all": "Apply all the extractors.",
+}
+
+INPUT_SUFFIXES = (".txt", ".json", ".jsonl")
+OUTPUT_FORMATS = ("json", "jsonl", "parquet")
+
+
+def expand_inputs(inputs: Iterable[str]) -> Generator[Path, None, None]:
+    """Expand directories and glob patterns into the poem files they contain."""
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            yield from sorted(file for file in path.rglob("*") if file.suffix in INPUT_SUFFIXES)
+        elif path.exists():
+            yield path
+        else:
+            import glob
+
+            matches = sorted(glob.glob(item, recursive=True))
+            if not matches:
+                msg = f"No such file, directory or pattern: {item}"
+                raise FileNotFoundError(msg)
+            yield from (Path(match) for match in matches if Path(match).is_file())
+
+
+def parse_poems(content: str, name: str, suffix: str = "", text_field: str = "textV3") -> list[dict]:
+    """Parse the content of a poem file, or of stdin if the suffix is empty.
+
+    Examples:
+        >>> parse_poems("Jeg ser", name="1_poem", suffix=".txt")
+        [{'ID': '1_poem', 'textV3': 'Jeg ser'}]
+        >>> parse_poems('{"ID": "1", "textV3": "Jeg ser"}\\n{"ID": "2", "textV3": "Du ser"}', name="stdin")
+        [{'ID': '1', 'textV3': 'Jeg ser'}, {'ID': '2', 'textV3': 'Du ser'}]
+    """
+    import json
+
+    if suffix == ".txt" or (not suffix and not content.lstrip().startswith(("{", "["))):
+        return [{"ID": name, text_field: content}]
+    if suffix == ".jsonl":
+        return [json.loads(line) for line in content.splitlines() if line.strip()]
+    try:
+        poems = json.loads(content)
+    except json.JSONDecodeError:
+        if suffix:
+            raise
+        return [json.loads(line) for line in content.splitlines() if line.strip()]
+    return poems if isinstance(poems, list) else [poems]
+
+
+def check_poems(poems: Iterable[dict], name: str, text_field: str = "textV3") -> Generator[dict, None, None]:
+    """Raise a ValueError for a poem that is neither a Nofabet transcription nor has the text field.
+
+    Examples:
+        >>> list(check_poems([{"ID": "1", "text": "Jeg ser"}], name="poems.jsonl"))
+        Traceback (most recent call last):
+        ...
+        ValueError: poems.jsonl: poem 1 has no 'textV3' field. Choose the field with --text-field
+    """
+    from poetry_analysis.parallel import is_transcription
+
+    for poem in poems:
+        if not isinstance(poem, dict) or (text_field not in poem and not is_transcription(poem)):
+            poem_id = poem.get("ID", "") if isinstance(poem, dict) else ""
+            msg = f"{name}: poem {poem_id} has no {text_field!r} field. Choose the field with --text-field"
+            raise ValueError(msg)
+        yield poem
+
+
+def warn_unsupported_extractors(poems: Iterable[dict], extractors: list[str]) -> Generator[dict, None, None]:
+    """Log a warning the first time a poem is read that some of the extractors cannot annotate.
+
+    Those extractors are skipped for the poem, see `parallel.supported_extractors`.
+    """
+    import logging
+
+    from poetry_analysis.parallel import supported_extractors
+
+    warned = set()
+    for poem in poems:
+        unsupported = set(extractors).difference(supported_extractors(poem, extractors), warned)
+        if unsupported:
+            logging.warning("Skipping %s for poems with Nofabet transcriptions", ", ".join(sorted(unsupported)))
+            warned.update(unsupported)
+        yield poem
+
+
+def read_poems(inputs: list[str], text_field: str = "textV3") -> Generator[dict, None, None]:
+    """Read poems from files, directories, glob patterns or stdin ("-").
+
+    JSON files can also hold Nofabet transcriptions, as read by `rhyme_detection.tag_poem_file`."""
+    for item in inputs or ["-"]:
+        if item == "-":
+            poems = parse_poems(sys.stdin.read(), name="stdin", text_field=text_field)
+            yield from check_poems(poems, name="stdin", text_field=text_field)
+            continue
+        for path in expand_inputs([item]):
+            content = path.read_text(encoding="utf-8")
+            poems = parse_poems(content, name=path.stem, suffix=path.suffix, text_field=text_field)
+            yield from check_poems(poems, name=str(path), text_field=text_field)
+
+
+def _cache_key(poem: dict | str, text_field: str) -> str:
+    """Return the text of a poem, or the JSON of a poem with Nofabet transcriptions."""
+    import json
+
+    from poetry_analysis.parallel import is_transcription
+
+    if isinstance(poem, str):
+        return poem
+    if is_transcription(poem):
+        return json.dumps(poem, ensure_ascii=False, sort_keys=True)
+    return poem.get(text_field) or ""
+
+
+class AnnotationCache:
+    """Annotations stored as JSON files, keyed by the extractor, the poem text and the package version,
+    so that unchanged poems are not analysed again."""
+
+    def __init__(self, cache_dir: str | Path):
+        from importlib.metadata import PackageNotFoundError, version
+
+        self.cache_dir = Path(cache_dir)
+        try:
+            self.version = version("poetry-analysis")
+        except PackageNotFoundError:
+            self.version = "unknown"
+
+    def path(self, extractor: str, text: str) -> Path:
+        import hashlib
+
+        key = hashlib.sha256(f"{self.version}\0{extractor}\0{text}".encode()).hexdigest()
+        return self.cache_dir / extractor / key[:2] / f"{key}.json"
+
+    def load(self, extractor: str, text: str) -> object | None:
+        import json
+
+        path = self.path(extractor, text)
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def store(self, extractor: str, text: str, annotations: object) -> None:
+        import json
+
+        path = self.path(extractor, text)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(annotations, ensure_ascii=False), encoding="utf-8")
+
+
+def annotate_poems(
+    poems: Iterable[dict | str],
+    extractors: list[str],
+    text_field: str = "textV3",
+    jobs: int | None = None,
+    cache_dir: str | Path | None = None,
+    batch_size: int = 1000,
+) -> Iterable[dict]:
+    """Annotate poems with the extractors, reusing cached annotations if a cache directory is given.
+
+    With a cache, the poems are read and annotated in batches of `batch_size` poems,
+    so that only one batch is held in memory at a time.
+    """
+    from poetry_analysis.parallel import process_poems
+
+    if cache_dir is None:
+        return process_poems(poems, extractors, text_field=text_field, jobs=jobs)
+    return _annotate_with_cache(poems, extractors, AnnotationCache(cache_dir), text_field, jobs, batch_size)
+
+
+def _annotate_with_cache(
+    poems: Iterable[dict | str],
+    extractors: list[str],
+    cache: AnnotationCache,
+    text_field: str,
+    jobs: int | None,
+    batch_size: int,
+) -> Generator[dict, None, None]:
+    from itertools import islice
+
+    from poetry_analysis.parallel import poem_metadata, process_poems, supported_extractors
+
+    poems = iter(poems)
+    while batch := list(islice(poems, batch_size)):
+        keys = [_cache_key(poem, text_field) for poem in batch]
+        results = [poem_metadata(poem) for poem in batch]
+        missing = {}
+        for idx, (poem, key) in enumerate(zip(batch, keys, strict=True)):
+            for extractor in supported_extractors(poem, extractors):
+                cached = cache.load(extractor, key)
+                if cached is None:
+                    missing.setdefault(idx, []).append(extractor)
+                else:
+                    results[idx][extractor] = cached
+        # The poems and extractors missing from the cache are annotated in a single call, with one pool per batch
+        missing_extractors = [name for name in extractors if any(name in names for names in missing.values())]
+        annotated = process_poems((batch[idx] for idx in missing), missing_extractors, text_field=text_field, jobs=jobs)
+        for (idx, names), annotations in zip(missing.items(), annotated, strict=True):
+            for extractor in names:
+                results[idx][extractor] = annotations[extractor]
+                cache.store(extractor, keys[idx], annotations[extractor])
+        yield from results
+
+
+def write_annotations(
+    annotations: Iterable[dict], output_format: str, outputfile: Path | None = None, pretty: bool = False
+) -> None:
+    """Write annotations to a file, or to stdout if no file is given.
+
+    JSON is written with `serialization.dumps`, compact unless `pretty` is True.
+    """
+    from poetry_analysis import serialization
+
+    if output_format == "parquet":
+        import pandas as pd
+
+        # Nested annotations are stored as JSON strings, since their structure varies between poems
+        records = [
+            {
+                key: value if isinstance(value, str) else serialization.dumps(value).decode("utf-8")
+                for key, value in item.items()
+            }
+            for item in annotations
+        ]
+        pd.DataFrame.from_records(records).to_parquet(outputfile, index=False)
+        return
+
+    stream = sys.stdout if outputfile is None else outputfile.open("w", encoding="utf-8")
+    try:
+        if output_format == "jsonl":
+            for item in annotations:
+                stream.write(serialization.dumps(item).decode("utf-8") + "\n")
+        else:
+            stream.write(serialization.dumps(list(annotations), pretty=pretty).decode("utf-8") + "\n")
+    finally:
+        if outputfile is not None:
+            stream.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="poetry-analysis",
+        description="Extract lyric features from Norwegian poems.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True, metavar="COMMAND")
+    for command, help_text in SUBCOMMAND_HELP.items():
+        subparser = subparsers.add_parser(command, help=help_text, description=help_text)
+        subparser.add_argument(
+            "inputs",
+            nargs="*",
+            help="Poem files, directories or glob patterns. Reads from stdin if empty or '-'.",
+        )
+        subparser.add_argument("-o", "--output", type=Path, help="Output file. Defaults to stdout.")
+        subparser.add_argument("--format", choices=OUTPUT_FORMATS, default="json", help="Output format.")
+        subparser.add_argument("--pretty", action="store_true", help="Indent JSON output for reading.")
+        subparser.add_argument(
+            "-j", "--jobs", type=int, default=1, help="Number of worker processes. 0 means one per CPU."
+        )
+        subparser.add_argument("--cache-dir", type=Path, help="Directory to cache annotations in between runs.")
+        subparser.add_argument("--text-field", default="textV3", help="Field with the poem text in JSON poems.")
+
+    serve_help = "Run a local HTTP server that annotates poems, with warm caches."
+    serve_parser = subparsers.add_parser("serve", help=serve_help, description=serve_help)
+    serve_parser.add_argument("--host", default="127.0.0.1", help="Address to listen on.")
+    serve_parser.add_argument("--port", type=int, default=8000, help="Port to listen on.")
+    serve_parser.add_argument(
+        "--max-concurrency", type=int, default=4, help="Number of threads that annotate batches of requests."
+    )
+    serve_parser.add_argument(
+        "--max-pending", type=int, default=64, help="Maximum number of requests handled at a time."
+    )
+    serve_parser.add_argument("--batch-size", type=int, default=32, help="Maximum number of poems in a batch.")
+    serve_parser.add_argument(
+        "--batch-wait-ms", type=float, default=2.0, help="Milliseconds to wait for more requests to batch."
+    )
+    serve_parser.add_argument(
+        "--max-body-size", type=int, default=16 * 1024 * 1024, help="Maximum size of a request body in bytes."
+    )
+    return parser
+
+
+def run_server(args: argparse.Namespace) -> int:
+    import logging
+
+    from poetry_analysis.server import serve
+
+    logging.basicConfig(level=logging.INFO)
+    serve(
+        host=args.host,
+        port=args.port,
+        max_concurrency=args.max_concurrency,
+        max_pending=args.max_pending,
+        batch_size=args.batch_size,
+        batch_wait=args.batch_wait_ms / 1000,
+        max_body_size=args.max_body_size,
+    )
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the `poetry-analysis` command line tool."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        return run_server(args)
+    if args.format == "parquet":
+        from importlib.util import find_spec
+
+        if args.output is None:
+            parser.error("--format parquet requires --output")
+        if find_spec("pyarrow") is None:
+            parser.error("--format parquet requires pyarrow: pip install 'poetry-analysis[parquet]'")
+
+    try:
+        extractors = SUBCOMMANDS[args.command]
+        poems = warn_unsupported_extractors(read_poems(args.inputs, text_field=args.text_field), extractors)
+        annotations = annotate_poems(
+            poems,
+            extractors,
+            text_field=args.text_field,
+            jobs=args.jobs or None,
+            cache_dir=args.cache_dir,
+        )
+        write_annotations(annotations, args.format, args.output, pretty=args.pretty)
+    except (FileNotFoundError, ValueError) as error:
+        print(f"poetry-analysis: error: {error}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
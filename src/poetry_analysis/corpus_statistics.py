@@ -0,0 +1,157 @@
+"""Aggregate statistics of a corpus, computed one poem at a time.
+
+`CorpusStatistics` keeps counters instead of the annotations themselves, so that the
+memory use does not grow with the size of the corpus. Statistics of separate shards
+of a corpus, e.g. from parallel workers, are merged with `+` into exactly the same
+statistics as for the whole corpus, and can be stored as JSON with `.dict` and `from_dict`.
+
+Examples:
+    >>> from poetry_analysis.parallel import process_poems
+    >>> poems = ["Jeg ser paa den hvide himmel,\\njeg ser paa de graablaa skyer", "Sees Sirius, sydhimlens smukkeste"]
+    >>> shards = [collect_statistics(process_poems([poem], jobs=1)) for poem in poems]
+    >>> statistics = sum(shards, CorpusStatistics())
+    >>> statistics == collect_statistics(process_poems(poems, jobs=1))
+    True
+    >>> statistics.poems, statistics.alliteration_symbols, statistics.lyrical_subjects["explicit_subject"]
+    (2, Counter({'h': 1, 's': 1}), 1)
+"""
+
+from collections import Counter
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field, fields
+
+# Rhyme score of a verse that is a nødrim, see `rhyme_detection.RHYME_SCORES`
+NODRIM_SCORE = 0.5
+
+
+@dataclass
+class CorpusStatistics:
+    """Counts of the annotations of the poems in a corpus.
+
+    Attributes:
+        poems: Number of poems.
+        stanzas: Number of stanzas with rhyme annotations.
+        verses: Number of verses with rhyme annotations.
+        rhyming_verses: Number of verses that rhyme with a previous verse.
+        nodrim_verses: Number of rhyming verses that are nødrim.
+        rhyme_schemes: Number of stanzas with each rhyme scheme.
+        alliteration_symbols: Number of alliterating word groups with each initial letter.
+        anaphora_lengths: Number of anaphora repeated on each number of lines.
+        lyrical_subjects: Number of poems with each lyrical subject category.
+    """
+
+    poems: int = 0
+    stanzas: int = 0
+    verses: int = 0
+    rhyming_verses: int = 0
+    nodrim_verses: int = 0
+    rhyme_schemes: Counter = field(default_factory=Counter)
+    alliteration_symbols: Counter = field(default_factory=Counter)
+    anaphora_lengths: Counter = field(default_factory=Counter)
+    lyrical_subjects: Counter = field(default_factory=Counter)
+
+    @property
+    def nodrim_rate(self) -> float:
+        """The share of rhyming verses that are nødrim."""
+        return self.nodrim_verses / self.rhyming_verses if self.rhyming_verses else 0.0
+
+    def update_rhyme(self, stanzas: Iterable[Mapping]) -> None:
+        """Count the stanzas from `rhyme_detection.tag_stanzas`."""
+        for stanza in stanzas:
+            self.stanzas += 1
+            self.rhyme_schemes[stanza["rhyme_scheme"]] += 1
+            for verse in stanza["verses"]:
+                self.verses += 1
+                score = verse.get("rhyme_score") or 0
+                if score > 0:
+                    self.rhyming_verses += 1
+                if score == NODRIM_SCORE:
+                    self.nodrim_verses += 1
+
+    def update_alliteration(self, groups: Iterable[Mapping | list], text: str | None = None) -> None:
+        """Count the alliterations from `alliteration.extract_poem_alliterations`,
+        or the word groups from `alliteration.find_line_alliterations`.
+
+        Word groups given as (start, end) offsets, with `offsets=True`, need the `text`
+        they were found in, to look up their initial letter.
+        """
+        for group in groups:
+            if isinstance(group, Mapping):
+                symbol = group["symbol"]
+            elif isinstance(group[0], str):
+                symbol = group[0][0].lower()
+            elif text is None:
+                msg = "Alliterating word groups with offsets need the text they were found in"
+                raise ValueError(msg)
+            else:
+                symbol = text[group[0][0]].lower()
+            self.alliteration_symbols[symbol] += 1
+
+    def update_anaphora(self, anaphora: Iterable[Mapping]) -> None:
+        """Count the anaphora from `anaphora.extract_poem_anaphora`."""
+        for item in anaphora:
+            self.anaphora_lengths[item["count"]] += 1
+
+    def update_lyrical_subject(self, categories: Mapping[str, bool]) -> None:
+        """Count the categories from `lyrical_subject.detect_lyrical_subject`, absent ones included."""
+        for category, present in categories.items():
+            self.lyrical_subjects[category] += int(bool(present))
+
+    def update(self, annotations: Mapping) -> None:
+        """Add the annotations of a poem, e.g. from `parallel.process_poems`.
+        Extractors that are missing from the annotations are skipped."""
+        self.poems += 1
+        if "rhyme" in annotations:
+            self.update_rhyme(annotations["rhyme"])
+        if "alliteration" in annotations:
+            self.update_alliteration(annotations["alliteration"])
+        if "anaphora" in annotations:
+            self.update_anaphora(annotations["anaphora"])
+        if "lyrical_subject" in annotations:
+            self.update_lyrical_subject(annotations["lyrical_subject"])
+
+    def merge(self, other: "CorpusStatistics") -> "CorpusStatistics":
+        """Add the counts of another `CorpusStatistics` to these, and return them."""
+        for item in fields(self):
+            value = getattr(other, item.name)
+            if isinstance(value, Counter):
+                getattr(self, item.name).update(value)
+            else:
+                setattr(self, item.name, getattr(self, item.name) + value)
+        return self
+
+    def __add__(self, other: "CorpusStatistics") -> "CorpusStatistics":
+        if not isinstance(other, CorpusStatistics):
+            return NotImplemented
+        return CorpusStatistics.from_dict(self.dict).merge(other)
+
+    def __iadd__(self, other: "CorpusStatistics") -> "CorpusStatistics":
+        if not isinstance(other, CorpusStatistics):
+            return NotImplemented
+        return self.merge(other)
+
+    @property
+    def dict(self) -> dict:
+        """Return the counts as a dict that can be serialized as JSON."""
+        return {
+            item.name: dict(getattr(self, item.name)) if item.type is Counter else getattr(self, item.name)
+            for item in fields(self)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "CorpusStatistics":
+        """Create statistics from the output of `.dict`, also after a round trip through JSON."""
+        statistics = cls(**{key: value for key, value in data.items() if not isinstance(value, Mapping)})
+        for key in ("rhyme_schemes", "alliteration_symbols", "lyrical_subjects"):
+            getattr(statistics, key).update(data.get(key, {}))
+        # JSON object keys are strings
+        statistics.anaphora_lengths.update({int(length): n for length, n in data.get("anaphora_lengths", {}).items()})
+        return statistics
+
+
+def collect_statistics(annotations: Iterable[Mapping]) -> CorpusStatistics:
+    """Aggregate the annotations of a stream of poems."""
+    statistics = CorpusStatistics()
+    for poem in annotations:
+        statistics.update(poem)
+    return statistics
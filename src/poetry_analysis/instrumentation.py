@@ -0,0 +1,229 @@
+"""Per-stage timers and event counters for finding out where the time goes in an analysis.
+
+Instrumentation is off by default, and the instrumented functions then only check
+a module-level flag. Turn it on for a block of code with `instrument()`, or for the
+whole process by setting the environment variable `POETRY_ANALYSIS_INSTRUMENT=1`.
+If `POETRY_ANALYSIS_METRICS_FILE` is also set, the metrics are written to that file
+when the process exits, in the Prometheus text format if the file name ends with
+`.prom`, and as JSON otherwise.
+
+Examples:
+    >>> from poetry_analysis import instrumentation, utils
+    >>> with instrumentation.instrument() as metrics:
+    ...     utils.clear_token_cache()
+    ...     _ = utils.normalize("Sees Sirius"), utils.normalize("Sees Sirius")
+    >>> metrics.counters["token_cache.hits"], metrics.stages["tokenize"].calls
+    (1, 1)
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import Counter
+from collections.abc import Generator
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+
+ENV_VAR = "POETRY_ANALYSIS_INSTRUMENT"
+METRICS_FILE_ENV_VAR = "POETRY_ANALYSIS_METRICS_FILE"
+PROMETHEUS_PREFIX = "poetry_analysis"
+
+# Read as `instrumentation.enabled` by the instrumented functions, so it must not be imported by name
+enabled = os.environ.get(ENV_VAR, "").lower() not in ("", "0", "false", "no")
+
+
+@dataclass
+class StageTimer:
+    """Number of calls to a stage, and the total and longest time spent in it, in seconds."""
+
+    calls: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    @property
+    def dict(self) -> dict:
+        return {"calls": self.calls, "total": self.total, "max": self.max}
+
+
+class Metrics:
+    """Timers for the stages of an analysis, and counters for events like cache hits."""
+
+    def __init__(self):
+        self.stages: dict[str, StageTimer] = {}
+        self.counters: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float) -> None:
+        """Add a call that took a number of seconds to the timer of a stage."""
+        with self._lock:
+            timer = self.stages.get(stage)
+            if timer is None:
+                timer = self.stages[stage] = StageTimer()
+            timer.calls += 1
+            timer.total += seconds
+            timer.max = max(timer.max, seconds)
+
+    def count(self, event: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[event] += n
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stages.clear()
+            self.counters.clear()
+
+    @property
+    def dict(self) -> dict:
+        return {
+            "stages": {name: timer.dict for name, timer in sorted(self.stages.items())},
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def to_json(self, outputfile: str | Path | None = None) -> str:
+        """Return the metrics as a JSON string, and write it to a file if given."""
+        text = json.dumps(self.dict, indent=4)
+        if outputfile is not None:
+            Path(outputfile).write_text(text, encoding="utf-8")
+        return text
+
+    def to_prometheus(self, outputfile: str | Path | None = None) -> str:
+        """Return the metrics in the Prometheus text exposition format,
+        and write them to a file if given, e.g. for the textfile collector of node_exporter.
+
+        Examples:
+            >>> metrics = Metrics()
+            >>> metrics.record("tokenize", 0.5)
+            >>> metrics.count("token_cache.hits", 3)
+            >>> lines = metrics.to_prometheus().splitlines()
+            >>> print("\\n".join(lines[:3]))
+            # HELP poetry_analysis_stage_calls_total Number of calls to each stage.
+            # TYPE poetry_analysis_stage_calls_total counter
+            poetry_analysis_stage_calls_total{stage="tokenize"} 1
+            >>> lines[-1]
+            'poetry_analysis_events_total{event="token_cache.hits"} 3'
+        """
+        series = [
+            (
+                "stage_calls_total",
+                "counter",
+                "Number of calls to each stage.",
+                "stage",
+                {name: timer.calls for name, timer in self.stages.items()},
+            ),
+            (
+                "stage_seconds_total",
+                "counter",
+                "Total time spent in each stage.",
+                "stage",
+                {name: timer.total for name, timer in self.stages.items()},
+            ),
+            (
+                "stage_seconds_max",
+                "gauge",
+                "Longest time spent in a single call to each stage.",
+                "stage",
+                {name: timer.max for name, timer in self.stages.items()},
+            ),
+            ("events_total", "counter", "Number of times each event occurred.", "event", self.counters),
+        ]
+        lines = []
+        for metric, metric_type, description, label, values in series:
+            name = f"{PROMETHEUS_PREFIX}_{metric}"
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.extend(f'{name}{{{label}="{key}"}} {value}' for key, value in sorted(values.items()))
+        text = "\n".join(lines) + "\n"
+        if outputfile is not None:
+            Path(outputfile).write_text(text, encoding="utf-8")
+        return text
+
+
+METRICS = Metrics()
+
+# The number of `instrument()` blocks that are running, and the state of `enabled` before the first of them
+_active_blocks = 0
+_enabled_outside = enabled
+_blocks_lock = threading.Lock()
+
+_DISABLED_STAGE = nullcontext()
+
+
+class _Stage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        METRICS.record(self.name, time.perf_counter() - self.start)
+
+
+def stage(name: str) -> "_Stage | nullcontext":
+    """Time a block of code as a stage, if instrumentation is enabled.
+
+    Examples:
+        >>> with instrument() as metrics:
+        ...     with stage("read"):
+        ...         pass
+        >>> metrics.stages["read"].calls
+        1
+    """
+    if not enabled:
+        return _DISABLED_STAGE
+    return _Stage(name)
+
+
+def count(event: str, n: int = 1) -> None:
+    """Count an event, if instrumentation is enabled."""
+    if enabled:
+        METRICS.count(event, n)
+
+
+@contextmanager
+def instrument(reset: bool = True) -> Generator[Metrics, None, None]:
+    """Enable instrumentation within a block of code.
+
+    Blocks can be nested, or run at the same time in several threads. Instrumentation stays on
+    until the last of them ends, and is then restored to the state before the first one.
+
+    Args:
+        reset: If True, clear the metrics collected before the block,
+            unless another block is already collecting metrics.
+
+    Yields:
+        The metrics, which are updated until the end of the block.
+    """
+    global enabled, _enabled_outside, _active_blocks
+    with _blocks_lock:
+        if _active_blocks == 0:
+            _enabled_outside = enabled
+            if reset:
+                METRICS.reset()
+        _active_blocks += 1
+        enabled = True
+    try:
+        yield METRICS
+    finally:
+        with _blocks_lock:
+            _active_blocks -= 1
+            if _active_blocks == 0:
+                enabled = _enabled_outside
+
+
+def write_metrics(outputfile: str | Path) -> None:
+    """Write the metrics to a Prometheus text file if the suffix is `.prom`, and to a JSON file otherwise."""
+    if Path(outputfile).suffix == ".prom":
+        METRICS.to_prometheus(outputfile)
+    else:
+        METRICS.to_json(outputfile)
+
+
+if enabled and os.environ.get(METRICS_FILE_ENV_VAR):
+    atexit.register(write_metrics, os.environ[METRICS_FILE_ENV_VAR])
@@ -1,4 +1,26 @@
+"""The lyrical subject is detected by looking up words from a set of word bags,
+e.g. personal pronouns and deictic expressions, in a poem.
+
+All word bags are compiled into a single token-level Aho-Corasick automaton,
+so a poem is scanned once for all categories, and words are only matched
+as whole tokens (i.e. "du" does not match inside "dukke").
+
+Other word bags, e.g. for nynorsk or Danish-Norwegian, can be loaded from a
+TOML or JSON file with `load_wordbags`, and swapped in as the default matcher
+with `use_wordbags` while a process is running.
+"""
+
+import json
 import re
+import tomllib
+from collections import Counter, deque
+from collections.abc import Generator, Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    import numpy as np
 
 WORDBAGS = {
     "explicit_subject": [
@@ -49,19 +71,343 @@ category_names = {
 }
 
 
-def detect_lyrical_subject(poem_text: str) -> dict:
-    """Map the presence of certain words denoting a lyrical subject in a poem to categorical labels."""
-    lyrical_subject = {}
-    for label, words in WORDBAGS.items():
-        regx_pattern = "|".join(words)
-        matches = re.findall(regx_pattern, poem_text.lower())
-        is_present = bool(any(matches))
-        lyrical_subject[label] = is_present
-    return lyrical_subject
+# Words, stanza boundaries (same as `utils.split_stanzas`) and line breaks
+TOKEN_PATTERN = re.compile(r"(\w+)|(\n{2,})|(\n)")
+
+
+class WordbagMatch(NamedTuple):
+    """A word bag entry found in a text, with character offsets into the text,
+    and the stanza and line indeces as given by `utils.split_stanzas`."""
+
+    category: str
+    phrase: str
+    start: int
+    end: int
+    stanza: int = 0
+    line: int = 0
+
+
+class WordbagMatcher:
+    """Match all words and phrases from a set of word bags in a single pass over a text.
+
+    The phrases are split into tokens and compiled into an Aho-Corasick automaton
+    where each transition consumes a whole token, so matches always start and end
+    at token boundaries. Phrases are not matched across line breaks.
+
+    Args:
+        wordbags: Mapping from category labels to lists of words or phrases.
+        names: Mapping from category labels to human readable category names.
+            Defaults to the labels themselves.
+        source: Path to the file the word bags were loaded from, if any.
+
+    Examples:
+        >>> matcher = WordbagMatcher({"subject": ["jeg"], "deixis": ["her", "i morgen"]})
+        >>> matcher.hits("Jeg kommer hit i morgen, herre")
+        {'subject': ['jeg'], 'deixis': ['i morgen']}
+    """
+
+    def __init__(
+        self,
+        wordbags: dict[str, list[str]],
+        names: dict[str, str] | None = None,
+        source: str | Path | None = None,
+    ):
+        self.categories = list(wordbags)
+        self.names = {category: (names or {}).get(category, category) for category in self.categories}
+        self.source = Path(source) if source is not None else None
+        self.source_mtime = self.source.stat().st_mtime_ns if self.source is not None else None
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[list[tuple[str, str, int]]] = [[]]
+        self.max_phrase_length = 1
+
+        for category, phrases in wordbags.items():
+            for phrase in phrases:
+                self._add_phrase(category, phrase)
+        self._build_failure_links()
+
+    def _add_phrase(self, category: str, phrase: str) -> None:
+        tokens = [match.group(1).casefold() for match in TOKEN_PATTERN.finditer(phrase) if match.group(1)]
+        if not tokens:
+            return
+        state = 0
+        for token in tokens:
+            if token not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][token] = len(self._goto) - 1
+            state = self._goto[state][token]
+        self._output[state].append((category, " ".join(tokens), len(tokens)))
+        self.max_phrase_length = max(self.max_phrase_length, len(tokens))
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(token, 0)
+                self._output[next_state].extend(self._output[self._fail[next_state]])
+
+    def scan(self, text: str) -> Generator[WordbagMatch, None, None]:
+        """Yield every word bag match in a text, in the order they occur."""
+        yield from self._scan(text)
+
+    def _scan(self, text: str) -> Generator[WordbagMatch, None, int]:
+        """Yield every word bag match in a text, and return the number of word tokens."""
+        state = 0
+        starts = deque(maxlen=self.max_phrase_length)
+        n_tokens = stanza = line = stanza_start = 0
+        for match in TOKEN_PATTERN.finditer(text):
+            word = match.group(1)
+            if word is None:
+                # Line break: phrases do not continue onto the next line
+                state = 0
+                starts.clear()
+                if match.group(2) is None:
+                    line += 1
+                    continue
+                if match.start() > stanza_start:
+                    stanza += 1
+                line = 0
+                stanza_start = match.end()
+                continue
+            n_tokens += 1
+            token = word.casefold()
+            starts.append(match.start())
+            while state and token not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(token, 0)
+            for category, phrase, phrase_length in self._output[state]:
+                yield WordbagMatch(category, phrase, starts[-phrase_length], match.end(), stanza, line)
+        return n_tokens
+
+    def profile(self, text: str) -> "LyricalSubjectProfile":
+        """Count and locate all word bag matches in a text."""
+        profile = LyricalSubjectProfile(categories=self.categories)
+        scanner = self._scan(text)
+        while True:
+            try:
+                match = next(scanner)
+            except StopIteration as stop:
+                profile.n_tokens = stop.value
+                break
+            profile.matches.append(match)
+        return profile
+
+    def hits(self, text: str) -> dict[str, list[str]]:
+        """Gather the matched phrases in a text per category."""
+        category_hits = {}
+        for match in self.scan(text):
+            category_hits.setdefault(match.category, []).append(match.phrase)
+        return category_hits
+
+    def detect(self, text: str) -> dict[str, bool]:
+        """Map each category to whether any of its words occur in a text."""
+        present = dict.fromkeys(self.categories, False)
+        for match in self.scan(text):
+            present[match.category] = True
+        return present
+
+
+@dataclass
+class LyricalSubjectProfile:
+    """Counts and positions of the word bag matches in a poem.
+
+    The counts are ordered like `categories`, so the profiles of many poems
+    can be stacked into a single array with `stack_profiles`.
+    """
+
+    categories: list[str]
+    n_tokens: int = 0
+    matches: list[WordbagMatch] = field(default_factory=list)
+
+    @property
+    def counts(self) -> "np.ndarray":
+        """Number of matches per category."""
+        import numpy as np
+
+        index = {category: i for i, category in enumerate(self.categories)}
+        counts = np.zeros(len(self.categories), dtype=np.int64)
+        for match in self.matches:
+            counts[index[match.category]] += 1
+        return counts
+
+    @property
+    def frequencies(self) -> "np.ndarray":
+        """Number of matches per category, relative to the number of word tokens in the poem."""
+        import numpy as np
+
+        if not self.n_tokens:
+            return np.zeros(len(self.categories), dtype=np.float64)
+        return self.counts / self.n_tokens
+
+    @property
+    def word_counts(self) -> dict[str, Counter]:
+        """Number of matches per word or phrase in each category."""
+        word_counts = {category: Counter() for category in self.categories}
+        for match in self.matches:
+            word_counts[match.category][match.phrase] += 1
+        return word_counts
+
+    @property
+    def positions(self) -> dict[str, list[tuple[int, int]]]:
+        """Stanza and line indeces of the matches in each category."""
+        positions = {category: [] for category in self.categories}
+        for match in self.matches:
+            positions[match.category].append((match.stanza, match.line))
+        return positions
+
+    @property
+    def dict(self) -> dict:
+        """Return the profile as a JSON serialisable dictionary."""
+        counts = self.counts.tolist()
+        frequencies = self.frequencies.tolist()
+        word_counts = self.word_counts
+        positions = self.positions
+        return {
+            "n_tokens": self.n_tokens,
+            **{
+                category: {
+                    "count": counts[i],
+                    "frequency": frequencies[i],
+                    "words": dict(word_counts[category]),
+                    "positions": [list(position) for position in positions[category]],
+                }
+                for i, category in enumerate(self.categories)
+            },
+        }
+
+
+def stack_profiles(profiles: Iterable[LyricalSubjectProfile]) -> "np.ndarray":
+    """Stack the category counts of many poems into an array of shape (n_poems, n_categories)."""
+    import numpy as np
+
+    rows = [profile.counts for profile in profiles]
+    if not rows:
+        return np.zeros((0, len(get_matcher().categories)), dtype=np.int64)
+    return np.vstack(rows)
+
+
+def load_wordbags(wordbag_file: str | Path) -> WordbagMatcher:
+    """Load word bags from a TOML or JSON file and compile them into a matcher.
+
+    Each category is either a list of words, or a table with a list of `words`
+    and an optional display `name`, e.g.:
+
+    ```toml
+    implicit = ["du", "vi"]
+
+    [explicit_subject]
+    name = "Explicit subject"
+    words = ["eg", "jeg"]
+    ```
+    """
+    filepath = Path(wordbag_file)
+    if filepath.suffix == ".toml":
+        content = tomllib.loads(filepath.read_text(encoding="utf-8"))
+    elif filepath.suffix == ".json":
+        content = json.loads(filepath.read_text(encoding="utf-8"))
+    else:
+        msg = f"Unsupported word bag file format: {filepath.suffix}. Use .toml or .json"
+        raise ValueError(msg)
+
+    wordbags = {}
+    names = {}
+    for category, entry in content.items():
+        if isinstance(entry, dict):
+            words = entry.get("words")
+            if "name" in entry:
+                names[category] = entry["name"]
+        else:
+            words = entry
+        if not isinstance(words, list) or not all(isinstance(word, str) for word in words):
+            msg = f"The word bag {category!r} in {filepath} must be a list of strings."
+            raise ValueError(msg)
+        wordbags[category] = words
+    return WordbagMatcher(wordbags, names=names, source=filepath)
+
+
+DEFAULT_MATCHER = WordbagMatcher(WORDBAGS, names=category_names)
+_active_matcher = DEFAULT_MATCHER
+
+
+def get_matcher() -> WordbagMatcher:
+    """Return the matcher that is currently used by default."""
+    return _active_matcher
+
+
+def use_wordbags(wordbags: str | Path | dict | WordbagMatcher | None) -> WordbagMatcher:
+    """Replace the default matcher with one compiled from a word bag file or mapping.
+
+    The matcher is compiled before it is swapped in, so concurrent calls to
+    `detect_lyrical_subject` keep using the previous matcher until it is ready.
+    Pass `None` to go back to the built-in `WORDBAGS`.
+    """
+    global _active_matcher
+    if wordbags is None:
+        matcher = DEFAULT_MATCHER
+    elif isinstance(wordbags, WordbagMatcher):
+        matcher = wordbags
+    elif isinstance(wordbags, dict):
+        matcher = WordbagMatcher(wordbags)
+    else:
+        matcher = load_wordbags(wordbags)
+    _active_matcher = matcher
+    return matcher
+
+
+def reload_wordbags(force: bool = False) -> bool:
+    """Reload the default matcher from its word bag file if the file has changed.
+
+    Returns:
+        True if a new matcher was swapped in, False otherwise.
+    """
+    matcher = _active_matcher
+    if matcher.source is None:
+        return False
+    if not force and matcher.source.stat().st_mtime_ns == matcher.source_mtime:
+        return False
+    use_wordbags(matcher.source)
+    return True
+
+
+def detect_lyrical_subject(poem_text: str, matcher: WordbagMatcher | None = None) -> dict:
+    """Map the presence of certain words denoting a lyrical subject in a poem to categorical labels.
+
+    Examples:
+        >>> detect_lyrical_subject("Du sover i dukken din")
+        {'explicit_subject': False, 'explicit_object': False, 'implicit': True, 'deixis': False}
+    """
+    if matcher is None:
+        matcher = get_matcher()
+    return matcher.detect(poem_text)
+
+
+def profile_lyrical_subject(poem_text: str, matcher: WordbagMatcher | None = None) -> LyricalSubjectProfile:
+    """Count and locate the words denoting a lyrical subject in a poem.
+
+    Examples:
+        >>> profile = profile_lyrical_subject("Jeg ser deg\\n\\nog du ser meg")
+        >>> profile.counts.tolist()
+        [1, 1, 2, 0]
+        >>> profile.positions["implicit"]
+        [(0, 0), (1, 0)]
+    """
+    if matcher is None:
+        matcher = get_matcher()
+    return matcher.profile(poem_text)
 
 
 def process_poems(poems, text_field="textV3"):
-    """Annotate whether or not the lyrical subject is a feature in a list of poems."""
+    """Annotate whether or not the lyrical subject is a feature in a list of poems.
+
+    See `poetry_analysis.parallel.process_poems` to process poems in parallel.
+    """
 
     for poem in poems:
         poem_text = poem.get(text_field)
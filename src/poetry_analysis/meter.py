@@ -0,0 +1,157 @@
+"""Scan the meter of verses transcribed with Nofabet, from the stress markers of the vowels.
+
+Each vowel phone in a Nofabet transcription ends with a stress marker, see
+`rhyme_detection.is_stressed`, so each verse has one stress bit per syllable:
+`1` for a syllable with primary or secondary stress, and `0` otherwise.
+The stress bits of a batch of verses are padded into a matrix, and compared with
+the templates of each meter in a single vectorized operation.
+
+Examples:
+    >>> verses = [["D AX0 R", "V AA1 R", "UU2 F R EH3 D"], ["S V EH1 N", "M EE1"]]
+    >>> for line in scan_verses(verses):
+    ...     print(line)
+    {'verse_id': 0, 'stress': '0111', 'syllables': 4, 'meter': 'iamb', 'score': 0.75}
+    {'verse_id': 1, 'stress': '11', 'syllables': 2, 'meter': 'iamb', 'score': 0.5}
+"""
+
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
+
+from poetry_analysis import utils
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# The stress pattern of a foot of each meter
+METERS = {
+    "iamb": (0, 1),
+    "trochee": (1, 0),
+    "dactyl": (1, 0, 0),
+    "anapest": (0, 0, 1),
+}
+
+
+def stress_pattern(verse: str | list[str]) -> str:
+    """Return the stress bits of the syllables in a Nofabet transcribed verse.
+
+    Examples:
+        >>> stress_pattern(["KJ OE2 P M AH0 N S B OO3 D"])
+        '101'
+    """
+    transcription = verse if isinstance(verse, str) else " ".join(verse)
+    return "".join("0" if marker == "0" else "1" for marker in utils.NUCLEUS_STRESS_PATTERN.findall(transcription))
+
+
+def stress_matrix(patterns: list[str]) -> tuple:
+    """Pad the stress patterns of verses into a matrix of stress bits.
+
+    Returns:
+        A boolean array with a row per verse and a column per syllable,
+        and the number of syllables in each verse.
+    """
+    import numpy as np
+
+    lengths = np.fromiter((len(pattern) for pattern in patterns), dtype=np.int64, count=len(patterns))
+    width = int(lengths.max()) if len(patterns) else 0
+    bits = np.zeros((len(patterns), width), dtype=np.uint8)
+    for row, pattern in enumerate(patterns):
+        bits[row, : len(pattern)] = np.frombuffer(pattern.encode("ascii"), dtype=np.uint8) - ord("0")
+    return bits.astype(bool), lengths
+
+
+def meter_templates(width: int) -> "np.ndarray":
+    """Return the stress bits of each meter in `METERS`, repeated to a number of syllables."""
+    import numpy as np
+
+    return np.array([np.resize(foot, width) for foot in METERS.values()], dtype=bool).reshape(len(METERS), width)
+
+
+def score_meters(patterns: list[str]) -> "np.ndarray":
+    """Score how well the stress pattern of each verse fits each meter.
+
+    Returns:
+        An array with a row per verse and a column per meter in `METERS`,
+        with the share of the syllables in the verse that have the stress of the meter.
+
+    Examples:
+        >>> score_meters(["0101", "100100"]).round(2).tolist()
+        [[1.0, 0.0, 0.5, 0.25], [0.5, 0.5, 1.0, 0.33]]
+    """
+    import numpy as np
+
+    bits, lengths = stress_matrix(patterns)
+    width = bits.shape[1]
+    syllables = np.arange(width) < lengths[:, None]
+    matches = (bits[:, None, :] == meter_templates(width)[None, :, :]) & syllables[:, None, :]
+    return matches.sum(axis=2) / np.maximum(lengths, 1)[:, None]
+
+
+def _scan_patterns(patterns: list[str]) -> tuple[list[dict], "np.ndarray"]:
+    scores = score_meters(patterns)
+    best = scores.argmax(axis=1)
+    names = list(METERS)
+    lines = [
+        {
+            "verse_id": verse_id,
+            "stress": pattern,
+            "syllables": len(pattern),
+            "meter": names[best[verse_id]] if len(pattern) > 1 else None,
+            "score": round(float(scores[verse_id, best[verse_id]]), 4) if len(pattern) > 1 else None,
+        }
+        for verse_id, pattern in enumerate(patterns)
+    ]
+    return lines, scores
+
+
+def scan_verses(verses: Iterable[str | list[str]]) -> list[dict]:
+    """Find the meter that fits the stress pattern of each verse best.
+
+    Verses with less than two syllables have no meter.
+    """
+    patterns = [stress_pattern(verse) for verse in verses]
+    return _scan_patterns(patterns)[0] if patterns else []
+
+
+def scan_poem(stanzas: Iterable[list[str | list[str]]]) -> dict:
+    """Scan the meter of each verse in a poem, and how regular the meter of the poem is.
+
+    Args:
+        stanzas: Stanzas with Nofabet transcribed verses, e.g. from `rhyme_detection.get_stanzas_from_transcription`.
+
+    Returns:
+        The meter that fits the verses of the poem best on average, the regularity of the poem
+        as the average score of that meter, the share of verses where it is the best meter,
+        and the scansion of each verse, with the stanza number.
+        Verses with less than two syllables are left out of the averages.
+
+    Examples:
+        >>> poem = scan_poem([[["D AX0 R", "V AA1 R"], ["S V EH1 N"]], [["EE1 N", "M EE1"]]])
+        >>> poem["meter"], poem["regularity"], poem["consistency"], len(poem["lines"])
+        ('iamb', 0.75, 1.0, 3)
+    """
+    patterns, stanza_ids = [], []
+    for stanza_id, stanza in enumerate(stanzas):
+        patterns.extend(stress_pattern(verse) for verse in stanza)
+        stanza_ids.extend([stanza_id] * len(stanza))
+    poem = {"meter": None, "regularity": None, "consistency": None, "lines": []}
+    if not patterns:
+        return poem
+
+    lines, scores = _scan_patterns(patterns)
+    for line, stanza_id in zip(lines, stanza_ids, strict=True):
+        line["stanza_id"] = stanza_id
+    poem["lines"] = lines
+    metrical = scores[[len(pattern) > 1 for pattern in patterns]]
+    if len(metrical):
+        dominant = int(metrical.mean(axis=0).argmax())
+        poem["meter"] = list(METERS)[dominant]
+        poem["regularity"] = round(float(metrical[:, dominant].mean()), 4)
+        poem["consistency"] = round(float((metrical.argmax(axis=1) == dominant).mean()), 4)
+    return poem
+
+
+def scan_transcription(transcription: dict) -> dict:
+    """Scan the meter of a poem transcribed with Nofabet, as in the JSON files read by `rhyme_detection.tag_poem_file`."""
+    from poetry_analysis.rhyme_detection import get_stanzas_from_transcription
+
+    return scan_poem(get_stanzas_from_transcription(transcription))
@@ -0,0 +1,254 @@
+"""Graded near rhymes of Nofabet transcribed verses, from the phonetic features of the phones.
+
+`score_rhyme` only gives a score to words whose endings are identical. Half rhymes,
+like assonance ("sol" / "tog") and consonance ("hus" / "is"), are scored here by
+aligning the rhyme tails of two verses: the phones from the nucleus of the last
+stressed syllable to the end. Substituting a phone costs the distance between the
+phonetic features of the phones, and inserting or deleting a phone costs 1, where the
+nucleus weighs `NUCLEUS_WEIGHT` times as much as the other phones.
+
+The alignments of many pairs of tails are computed at once, with a dimension of the
+arrays for the pairs, so all the verses of a stanza are compared in one batch.
+
+Examples:
+    >>> tails = [rhyme_tail(verse) for verse in ["S OO1 L", "T OO1 G", "H UU1 S", "II1 S", "S OO1 L"]]
+    >>> tails[0]
+    ['OO', 'L']
+    >>> near_rhyme_matrix(tails)[0].round(2).tolist()
+    [1.0, 0.77, 0.46, 0.34, 1.0]
+    >>> score_near_rhymes([["UU", "S"]], [["II", "S"]]).round(2).tolist()
+    [0.61]
+"""
+
+import functools
+from collections.abc import Iterable, Sequence
+from typing import TYPE_CHECKING
+
+from poetry_analysis import rhyme_detection, utils
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Place of articulation, from the lips to the glottis
+PLACE = {"bilabial": 0.0, "labiodental": 0.15, "alveolar": 0.35, "retroflex": 0.5, "palatal": 0.7, "velar": 0.85}
+PLACE["glottal"] = 1.0
+
+# Manner of articulation, from the least to the most sonorous
+MANNER = {"plosive": 0.0, "fricative": 0.25, "nasal": 0.5, "liquid": 0.75, "approximant": 1.0}
+
+# Place, manner and voicing of each consonant
+CONSONANT_FEATURES = {
+    "P": (PLACE["bilabial"], MANNER["plosive"], 0),
+    "B": (PLACE["bilabial"], MANNER["plosive"], 1),
+    "M": (PLACE["bilabial"], MANNER["nasal"], 1),
+    "W": (PLACE["bilabial"], MANNER["approximant"], 1),
+    "F": (PLACE["labiodental"], MANNER["fricative"], 0),
+    "V": (PLACE["labiodental"], MANNER["approximant"], 1),
+    "T": (PLACE["alveolar"], MANNER["plosive"], 0),
+    "D": (PLACE["alveolar"], MANNER["plosive"], 1),
+    "S": (PLACE["alveolar"], MANNER["fricative"], 0),
+    "N": (PLACE["alveolar"], MANNER["nasal"], 1),
+    "L": (PLACE["alveolar"], MANNER["liquid"], 1),
+    "R": (PLACE["alveolar"], MANNER["liquid"], 1),
+    "RT": (PLACE["retroflex"], MANNER["plosive"], 0),
+    "RD": (PLACE["retroflex"], MANNER["plosive"], 1),
+    "RS": (PLACE["retroflex"], MANNER["fricative"], 0),
+    "RN": (PLACE["retroflex"], MANNER["nasal"], 1),
+    "RL": (PLACE["retroflex"], MANNER["liquid"], 1),
+    "SJ": (PLACE["palatal"], MANNER["fricative"], 0),
+    "KJ": (PLACE["palatal"], MANNER["fricative"], 0),
+    "J": (PLACE["palatal"], MANNER["approximant"], 1),
+    "K": (PLACE["velar"], MANNER["plosive"], 0),
+    "G": (PLACE["velar"], MANNER["plosive"], 1),
+    "NG": (PLACE["velar"], MANNER["nasal"], 1),
+    "H": (PLACE["glottal"], MANNER["fricative"], 0),
+}
+
+# Syllabic consonants, which are nuclei, and the consonants they are syllabic forms of
+SYLLABIC_CONSONANTS = {"LX": "L", "MX": "M", "NX": "N", "RLX": "RL", "RNX": "RN", "RX": "R", "SX": "S"}
+
+# Height (close to open), backness (front to back), rounding, length and diphthongization of each vowel.
+# Diphthongs have the features of their first vowel.
+VOWEL_FEATURES = {
+    "II": (0.0, 0.0, 0, 1, 0),
+    "IH": (0.0, 0.0, 0, 0, 0),
+    "YY": (0.0, 0.0, 1, 1, 0),
+    "YH": (0.0, 0.0, 1, 0, 0),
+    "UU": (0.0, 0.5, 1, 1, 0),
+    "UH": (0.0, 0.5, 1, 0, 0),
+    "OO": (0.0, 1.0, 1, 1, 0),
+    "OH": (0.0, 1.0, 1, 0, 0),
+    "EE": (0.33, 0.0, 0, 1, 0),
+    "EH": (0.5, 0.0, 0, 0, 0),
+    "OE": (0.33, 0.0, 1, 1, 0),
+    "OEH": (0.5, 0.0, 1, 0, 0),
+    "AX": (0.5, 0.5, 0, 0, 0),
+    "OA": (0.67, 1.0, 1, 1, 0),
+    "OAH": (0.67, 1.0, 1, 0, 0),
+    "AE": (0.85, 0.0, 0, 1, 0),
+    "AEH": (0.85, 0.0, 0, 0, 0),
+    "AA": (1.0, 0.75, 0, 1, 0),
+    "AH": (1.0, 0.75, 0, 0, 0),
+    "AEJ": (0.85, 0.0, 0, 1, 1),
+    "AEW": (0.85, 0.0, 0, 1, 1),
+    "AJ": (1.0, 0.75, 0, 1, 1),
+    "OEJ": (0.33, 0.0, 1, 1, 1),
+    "OAJ": (0.67, 1.0, 1, 1, 1),
+    "OJ": (0.0, 1.0, 1, 1, 1),
+    "OU": (0.67, 1.0, 1, 1, 1),
+}
+
+# The distance between two different phones grows from this with the weighted differences of their features
+MISMATCH_DISTANCE = 0.4
+CONSONANT_WEIGHTS = (0.4, 0.4, 0.2)
+VOWEL_WEIGHTS = (0.35, 0.3, 0.15, 0.1, 0.1)
+# Distance between a syllabic consonant and the same consonant
+SYLLABIC_DISTANCE = 0.1
+# Distance between a vowel and a syllabic consonant, which can both be nuclei
+NUCLEUS_DISTANCE = 0.8
+
+NUCLEUS_WEIGHT = 2.0
+GAP_COST = 1.0
+
+# The phones in the distance matrix. Other phones are mapped to the last row, which only matches itself.
+PHONES = (*CONSONANT_FEATURES, *SYLLABIC_CONSONANTS, *VOWEL_FEATURES)
+PHONE_INDEX = {phone: idx for idx, phone in enumerate(PHONES)}
+UNKNOWN_PHONE = len(PHONES)
+
+
+def _feature_distance(features: Iterable[tuple[float, float, float]]) -> float:
+    distance = sum(weight * abs(a - b) for a, b, weight in features)
+    return round(MISMATCH_DISTANCE + (1 - MISMATCH_DISTANCE) * distance, 4)
+
+
+def phone_distance(phone1: str, phone2: str) -> float:
+    """Return the distance between the phonetic features of two Nofabet phones, from 0 to 1.
+
+    Examples:
+        >>> phone_distance("T", "D"), phone_distance("II", "YY"), phone_distance("NX", "N"), phone_distance("S", "AA")
+        (0.52, 0.49, 0.1, 1.0)
+    """
+    if phone1 == phone2:
+        return 0.0
+    if phone1 in VOWEL_FEATURES and phone2 in VOWEL_FEATURES:
+        features = zip(VOWEL_FEATURES[phone1], VOWEL_FEATURES[phone2], VOWEL_WEIGHTS, strict=True)
+        return _feature_distance(features)
+    consonant1 = SYLLABIC_CONSONANTS.get(phone1, phone1)
+    consonant2 = SYLLABIC_CONSONANTS.get(phone2, phone2)
+    if consonant1 == consonant2:
+        return SYLLABIC_DISTANCE
+    if consonant1 in CONSONANT_FEATURES and consonant2 in CONSONANT_FEATURES:
+        features = zip(CONSONANT_FEATURES[consonant1], CONSONANT_FEATURES[consonant2], CONSONANT_WEIGHTS, strict=True)
+        return _feature_distance(features)
+    nucleus1 = phone1 in VOWEL_FEATURES or phone1 in SYLLABIC_CONSONANTS
+    nucleus2 = phone2 in VOWEL_FEATURES or phone2 in SYLLABIC_CONSONANTS
+    if nucleus1 and nucleus2:
+        return NUCLEUS_DISTANCE
+    return 1.0
+
+
+@functools.cache
+def distance_matrix() -> "np.ndarray":
+    """Return the distances between all the phones in `PHONES`, with a last row and column for other phones."""
+    import numpy as np
+
+    distances = np.ones((len(PHONES) + 1, len(PHONES) + 1))
+    for idx1, phone1 in enumerate(PHONES):
+        for idx2, phone2 in enumerate(PHONES):
+            distances[idx1, idx2] = phone_distance(phone1, phone2)
+    distances[UNKNOWN_PHONE, UNKNOWN_PHONE] = 0.0
+    distances.setflags(write=False)
+    return distances
+
+
+def rhyme_tail(transcription: str | list[str]) -> list[str]:
+    """Return the phones of a verse or a word from the nucleus of the last stressed syllable, without stress markers.
+
+    If no syllable is stressed, the tail starts at the first nucleus.
+
+    Examples:
+        >>> rhyme_tail(["D AX0 R", "V AA1 R", "UU2 F R EH3 D"])
+        ['EH', 'D']
+        >>> rhyme_tail("L AH2 N AX0")
+        ['AH', 'N', 'AX']
+    """
+    phones = (transcription if isinstance(transcription, str) else " ".join(transcription)).split()
+    nuclei = [idx for idx, phone in enumerate(phones) if utils.NUCLEUS_STRESS_PATTERN.search(phone)]
+    stressed = [idx for idx in nuclei if rhyme_detection.is_stressed(phones[idx])]
+    start = stressed[-1] if stressed else (nuclei[0] if nuclei else 0)
+    return [rhyme_detection.strip_stress(phone) for phone in phones[start:]]
+
+
+def _encode_tails(tails: Sequence[Sequence[str]]) -> tuple:
+    """Encode tails as padded rows of phone indexes, with the weight of each phone."""
+    import numpy as np
+
+    width = max((len(tail) for tail in tails), default=0)
+    codes = np.full((len(tails), width), UNKNOWN_PHONE, dtype=np.int64)
+    weights = np.zeros((len(tails), width))
+    for row, tail in enumerate(tails):
+        codes[row, : len(tail)] = [PHONE_INDEX.get(phone, UNKNOWN_PHONE) for phone in tail]
+        weights[row, : len(tail)] = 1.0
+        if tail:
+            weights[row, 0] = NUCLEUS_WEIGHT
+    lengths = np.fromiter(map(len, tails), dtype=np.int64, count=len(tails))
+    return codes, weights, lengths
+
+
+def score_near_rhymes(tails1: Sequence[Sequence[str]], tails2: Sequence[Sequence[str]]) -> "np.ndarray":
+    """Score how close each pair of rhyme tails is to rhyming, from 0 to 1, where identical tails score 1.
+
+    The tails are aligned with the lowest total cost of substituting, inserting and deleting phones,
+    and the score is 1 minus the cost divided by the weight of the longer tail. The alignments of all
+    the pairs are computed at once, one cell of the alignment table at a time.
+
+    Args:
+        tails1: The first rhyme tail of each pair, e.g. from `rhyme_tail`.
+        tails2: The second rhyme tail of each pair.
+    """
+    import numpy as np
+
+    if len(tails1) != len(tails2):
+        msg = f"Expected as many first tails as second tails, got {len(tails1)} and {len(tails2)}"
+        raise ValueError(msg)
+    distances = distance_matrix()
+    codes1, weights1, lengths1 = _encode_tails(tails1)
+    codes2, weights2, lengths2 = _encode_tails(tails2)
+    rows = np.arange(len(tails1))
+
+    # costs[:, i, j] is the cost of aligning the first i phones of tails1 with the first j phones of tails2
+    costs = np.zeros((len(tails1), codes1.shape[1] + 1, codes2.shape[1] + 1))
+    costs[:, 1:, 0] = np.cumsum(GAP_COST * weights1, axis=1)
+    costs[:, 0, 1:] = np.cumsum(GAP_COST * weights2, axis=1)
+    substitutions = (
+        distances[codes1[:, :, None], codes2[:, None, :]] * (weights1[:, :, None] + weights2[:, None, :]) / 2
+    )
+    for i in range(1, codes1.shape[1] + 1):
+        deletion = GAP_COST * weights1[:, i - 1]
+        for j in range(1, codes2.shape[1] + 1):
+            costs[:, i, j] = np.minimum(
+                costs[:, i - 1, j - 1] + substitutions[:, i - 1, j - 1],
+                np.minimum(costs[:, i - 1, j] + deletion, costs[:, i, j - 1] + GAP_COST * weights2[:, j - 1]),
+            )
+
+    total_weight = np.maximum(weights1.sum(axis=1), weights2.sum(axis=1))
+    cost = costs[rows, lengths1, lengths2]
+    scores = np.where(total_weight > 0, 1 - cost / np.maximum(total_weight, 1e-9), 0.0)
+    return scores.clip(0.0, 1.0)
+
+
+def near_rhyme_matrix(tails: Sequence[Sequence[str]]) -> "np.ndarray":
+    """Score every pair of rhyme tails in a stanza, in a single batch.
+
+    Returns:
+        A symmetric array with the `score_near_rhymes` score of each pair of tails.
+    """
+    import numpy as np
+
+    first, second = np.triu_indices(len(tails), k=1)
+    scores = score_near_rhymes([tails[idx] for idx in first], [tails[idx] for idx in second])
+    matrix = np.zeros((len(tails), len(tails)))
+    matrix[first, second] = scores
+    matrix[second, first] = scores
+    matrix[np.diag_indices(len(tails))] = [1.0 if tail else 0.0 for tail in tails]
+    return matrix
@@ -0,0 +1,191 @@
+"""Run the lyric feature extractors over many poems in a pool of worker processes.
+
+The poems are read lazily from any iterable, grouped into chunks and sent to the
+workers, with a bounded number of chunks in flight at any time. The results are
+yielded in the same order as the poems, or as soon as they are ready.
+"""
+
+import importlib
+import os
+from collections import deque
+from collections.abc import Callable, Generator, Iterable, Mapping
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, as_completed, wait
+from itertools import islice
+
+# Extractors that take the text of a poem, as "module:function" references,
+# so that worker processes only import the modules they need.
+EXTRACTORS = {
+    "rhyme": "poetry_analysis.rhyme_detection:tag_text",
+    "alliteration": "poetry_analysis.alliteration:extract_poem_alliterations",
+    "anaphora": "poetry_analysis.anaphora:extract_poem_anaphora",
+    "lyrical_subject": "poetry_analysis.lyrical_subject:detect_lyrical_subject",
+}
+
+# Extractors that take a poem dict with Nofabet transcriptions, see `is_transcription`
+TRANSCRIPTION_EXTRACTORS = {
+    "rhyme": "poetry_analysis.rhyme_detection:tag_transcription",
+}
+
+METADATA_FIELDS = ("ID", "URN", "Tittel på dikt")
+
+
+def get_extractor(name: str, transcription: bool = False) -> Callable:
+    """Import and return the extractor function registered under a name,
+    or the one for Nofabet transcriptions if `transcription` is True."""
+    if transcription and name in EXTRACTORS and name not in TRANSCRIPTION_EXTRACTORS:
+        msg = f"The {name!r} extractor does not support Nofabet transcriptions. Choose from: "
+        msg += ", ".join(TRANSCRIPTION_EXTRACTORS)
+        raise ValueError(msg)
+    try:
+        reference = (TRANSCRIPTION_EXTRACTORS if transcription else EXTRACTORS)[name]
+    except KeyError:
+        msg = f"Unknown extractor {name!r}. Choose from: {', '.join(EXTRACTORS)}"
+        raise ValueError(msg) from None
+    module_name, function_name = reference.split(":")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def is_transcription(poem: Mapping | str) -> bool:
+    """Check if a poem is a dict of Nofabet transcribed lines, with a `text_id` and `line_N` keys,
+    as in the JSON files read by `rhyme_detection.tag_poem_file`.
+
+    Examples:
+        >>> is_transcription({"text_id": "1", "line_0": [["Ensom", "EE2 N S AH0 M"]]})
+        True
+        >>> is_transcription({"ID": "1", "textV3": "Ensom"})
+        False
+    """
+    return isinstance(poem, Mapping) and "text_id" in poem and any(key.startswith("line_") for key in poem)
+
+
+def supported_extractors(poem: Mapping | str, extractors: Iterable[str]) -> list[str]:
+    """Return the extractors that can annotate a poem, leaving out the ones in
+    `EXTRACTORS` without Nofabet transcription support if the poem is a transcription.
+
+    Examples:
+        >>> supported_extractors({"text_id": "1", "line_0": []}, ["rhyme", "anaphora"])
+        ['rhyme']
+    """
+    if is_transcription(poem):
+        return [name for name in extractors if name not in EXTRACTORS or name in TRANSCRIPTION_EXTRACTORS]
+    return list(extractors)
+
+
+def poem_metadata(poem: Mapping | str) -> dict:
+    """Return the metadata fields of a poem dict, with the `text_id` of a transcription as ID."""
+    if not isinstance(poem, Mapping):
+        return {}
+    metadata = {"ID": poem["text_id"]} if is_transcription(poem) else {}
+    metadata.update({key: poem[key] for key in METADATA_FIELDS if key in poem})
+    return metadata
+
+
+def analyze_poem(poem: Mapping | str, extractors: Iterable[str], text_field: str = "textV3") -> dict:
+    """Apply a selection of extractors to a poem text, or a poem dict with metadata.
+
+    Poem dicts with Nofabet transcriptions, see `is_transcription`, are annotated with the
+    extractors in `TRANSCRIPTION_EXTRACTORS`, and get their `text_id` as ID.
+    The other extractors are skipped for them, see `supported_extractors`.
+
+    Examples:
+        >>> analyze_poem({"ID": "1", "textV3": "Jeg ser"}, extractors=["lyrical_subject"])
+        {'ID': '1', 'lyrical_subject': {'explicit_subject': True, 'explicit_object': False, 'implicit': False, 'deixis': False}}
+    """
+    annotations = poem_metadata(poem)
+    transcription = is_transcription(poem)
+    source = poem
+    if isinstance(poem, Mapping) and not transcription:
+        source = poem.get(text_field) or ""
+    for name in supported_extractors(poem, extractors):
+        result = get_extractor(name, transcription=transcription)(source)
+        annotations[name] = list(result) if isinstance(result, Generator) else result
+    return annotations
+
+
+def _analyze_chunk(chunk: list, extractors: tuple[str, ...], text_field: str) -> list[dict]:
+    return [analyze_poem(poem, extractors, text_field=text_field) for poem in chunk]
+
+
+def _chunked(items: Iterable, size: int) -> Generator[list, None, None]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def process_poems(
+    poems: Iterable[Mapping | str],
+    extractors: Iterable[str] | None = None,
+    text_field: str = "textV3",
+    jobs: int | None = None,
+    chunk_size: int = 32,
+    ordered: bool = True,
+    max_pending: int | None = None,
+    initializer: Callable | None = None,
+    initargs: tuple = (),
+) -> Generator[dict, None, None]:
+    """Annotate a stream of poems with a selection of extractors in parallel.
+
+    Args:
+        poems: Poem texts, or poem dicts with the text in `text_field`.
+            Metadata fields like ID and URN are copied to the annotations.
+        extractors: Names of the extractors in `EXTRACTORS` to apply. Defaults to all of them.
+        text_field: Key of the poem text in poem dicts.
+        jobs: Number of worker processes. Defaults to the number of CPUs.
+            With `jobs=1`, the poems are processed in the current process.
+        chunk_size: Number of poems sent to a worker at a time.
+        ordered: If True, yield annotations in the same order as the poems.
+            Otherwise, yield them as soon as a chunk is done.
+        max_pending: Maximum number of chunks in flight. Defaults to twice the number of jobs.
+        initializer: Function to call in each worker process on startup, e.g. to warm caches.
+        initargs: Arguments to the initializer.
+
+    Yields:
+        One dict of annotations per poem, with a key per extractor.
+    """
+    extractors = tuple(EXTRACTORS if extractors is None else extractors)
+    for name in extractors:
+        get_extractor(name)
+    jobs = jobs or os.cpu_count() or 1
+    chunks = _chunked(poems, chunk_size)
+
+    if jobs == 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for chunk in chunks:
+            yield from _analyze_chunk(chunk, extractors, text_field)
+        return
+
+    max_pending = max_pending or 2 * jobs
+    executor = ProcessPoolExecutor(max_workers=jobs, initializer=initializer, initargs=initargs)
+    try:
+        futures = (executor.submit(_analyze_chunk, chunk, extractors, text_field) for chunk in chunks)
+        if ordered:
+            yield from _collect_in_order(futures, max_pending)
+        else:
+            yield from _collect_when_done(futures, max_pending)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _collect_in_order(futures: Iterable[Future], max_pending: int) -> Generator[dict, None, None]:
+    """Yield the results of submitted chunks in submission order."""
+    queue: deque[Future] = deque()
+    for future in futures:
+        queue.append(future)
+        if len(queue) >= max_pending:
+            yield from queue.popleft().result()
+    while queue:
+        yield from queue.popleft().result()
+
+
+def _collect_when_done(futures: Iterable[Future], max_pending: int) -> Generator[dict, None, None]:
+    """Yield the results of submitted chunks in the order they are completed."""
+    pending: set[Future] = set()
+    for future in futures:
+        pending.add(future)
+        if len(pending) >= max_pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for finished in done:
+                yield from finished.result()
+    for finished in as_completed(pending):
+        yield from finished.result()
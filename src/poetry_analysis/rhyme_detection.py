@@ -1,15 +1,23 @@
+import functools
 import json
 import logging
 import re
 import string
-from collections.abc import Generator
+from array import array
+from collections import Counter
+from collections.abc import Generator, Iterable, Iterator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass
+from enum import IntEnum
+from itertools import chain
 from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
 
-import numpy as np
-from convert_pa import phonetic_inventory
+from poetry_analysis import instrumentation, serialization, utils
 
-from poetry_analysis import utils
+if TYPE_CHECKING:
+    import numpy as np
 
 
 @dataclass
@@ -23,16 +31,32 @@ class Verse:
     syllables: list | None = None
     last_token: str | None = None
     rhymes_with: str | int | None = None
+    near_rhyme_score: float | None = None
+    span: tuple[int, int] | None = None
+    token_spans: list | None = None
 
     @property
     def dict(self) -> dict:
-        """Return the Verse object as a dictionary."""
-        dictionary = self.__dict__
+        """Return the Verse object as a dictionary, without the optional fields that are not set.
+
+        Examples:
+            >>> Verse(0, rhyme_tag="a", text="Jeg ser", tokens=["jeg", "ser"], last_token="ser").dict
+            {'rhyme_score': 0, 'rhyme_tag': 'a', 'text': 'Jeg ser', 'transcription': '', 'tokens': ['jeg', 'ser'], 'syllables': None, 'last_token': 'ser', 'rhymes_with': None, 'verse_id': 0}
+        """
+        dictionary = {
+            key: value
+            for key, value in self.__dict__.items()
+            if key != "id_" and not (key in VERSE_OPTIONAL_FIELDS and value is None)
+        }
         dictionary["verse_id"] = self.id_
-        del dictionary["id_"]
         return dictionary
 
 
+# Fields of a Verse that are only set by some options of `tag_rhyming_verses`,
+# and are left out of `Verse.dict` when they are not set
+VERSE_OPTIONAL_FIELDS = frozenset(["span", "token_spans", "near_rhyme_score"])
+
+
 def is_stressed(syllable: str | list) -> bool:
     """Check if a syllable is stressed by searching for stress markers.
 
@@ -65,25 +89,45 @@ def strip_stress(phoneme: str) -> str:
 
 def is_nucleus(symbol: str, orthographic: bool = False) -> bool:
     """Check if a phoneme or a letter is a valid syllable nucleus."""
-    valid_nuclei = get_valid_nuclei(orthographic=orthographic)
-    return strip_stress(symbol) in valid_nuclei
+    return strip_stress(symbol) in _valid_nuclei_set(orthographic)
 
 
+@functools.cache
 def get_valid_nuclei(orthographic: bool = False) -> list:
     """Return the list of valid syllable nuclei with either graphemes or Nofabet phonemes.
 
+    The Nofabet nuclei are looked up in `convert_pa` on the first call only.
+
     Args:
         orthographic: If True, return graphemes
     """
-    return utils.VALID_NUCLEI if orthographic else phonetic_inventory.PHONES_NOFABET["nuclei"]
+    if orthographic:
+        return utils.VALID_NUCLEI
+    from convert_pa import phonetic_inventory
+
+    return phonetic_inventory.PHONES_NOFABET["nuclei"]
+
+
+@functools.cache
+def _valid_nuclei_set(orthographic: bool) -> frozenset[str]:
+    return frozenset(get_valid_nuclei(orthographic))
+
+
+# The first of the orthographic nuclei in a word. The Nofabet pattern is compiled by `_nucleus_pattern`,
+# since it needs the phonetic inventory from `convert_pa`.
+ORTHOGRAPHIC_NUCLEUS_PATTERN = re.compile(rf"({'|'.join(utils.VALID_NUCLEI)})")
+
+
+@functools.cache
+def _nucleus_pattern(orthographic: bool) -> re.Pattern:
+    if orthographic:
+        return ORTHOGRAPHIC_NUCLEUS_PATTERN
+    return re.compile(rf"({'|'.join(get_valid_nuclei(orthographic=False))})")
 
 
 def find_nucleus(word: str, orthographic: bool = False) -> re.Match | None:
     """Check if a word has a valid syllable nucleus."""
-    valid_nuclei = get_valid_nuclei(orthographic=orthographic)
-    rgx = re.compile(rf"({'|'.join(valid_nuclei)})")
-    nucleus = rgx.search(word)
-    return nucleus
+    return _nucleus_pattern(orthographic).search(word)
 
 
 def is_schwa(string: str) -> bool:
@@ -100,57 +144,297 @@ def remove_syllable_onset(syllable: list) -> list | None:
     logging.debug("No nucleus found in %s", syllable)
 
 
-def score_rhyme(sequence1: str, sequence2: str, orthographic: bool = False) -> float:
-    """Check if two words rhyme and return a rhyming score.
+class RhymeReason(IntEnum):
+    """Why `score_rhyme` gave two words the score it did."""
 
-    Returns:
-        `1.0`:    Only the syllable nucleus + coda (=rhyme) match # perfect or proper rhyme
-        `0.5`:    NØDRIM or lame rhyme. One of the words is fully contained in the other, e.g. 'tusenfryd' / 'fryd'
-        `0.0`:    No match
+    NO_SHARED_SUFFIX = 1
+    NO_NUCLEUS = 2
+    GRAMMATICAL_SUFFIX = 3
+    SUFFIX_NUCLEUS = 4
+    SCHWA = 5
+    NOT_END_RHYME = 6
+    NODRIM = 7
+    PROPER_RHYME = 8
+    NO_CONDITION = 9
+
+
+RHYME_SCORES = {
+    RhymeReason.NODRIM: 0.5,
+    RhymeReason.PROPER_RHYME: 1,
+}
+
+
+class RhymeTrace:
+    """A compact record of the reasons for each rhyme decision, one byte per call to `score_rhyme`."""
+
+    def __init__(self):
+        self.reasons = array("B")
+
+    def __len__(self) -> int:
+        return len(self.reasons)
+
+    def __iter__(self) -> Iterator[RhymeReason]:
+        return map(RhymeReason, self.reasons)
+
+    def record(self, reason: RhymeReason) -> None:
+        self.reasons.append(reason)
+
+    def extend(self, reasons: Iterable[int]) -> None:
+        """Record the reasons for many rhyme decisions, e.g. from `score_rhymes`."""
+        self.reasons.extend(reasons)
+
+    def clear(self) -> None:
+        del self.reasons[:]
+
+    def summary(self) -> Counter:
+        """Count how often each reason was recorded."""
+        return Counter({RhymeReason(reason): count for reason, count in Counter(self.reasons).items()})
+
+    @property
+    def dict(self) -> dict:
+        """Return the reason frequencies by reason name."""
+        return {reason.name.lower(): count for reason, count in sorted(self.summary().items())}
+
+
+# The trace that rhyme decisions are recorded in, if tracing is enabled.
+# Each thread and each asyncio task has its own trace, so concurrent requests do not mix their decisions.
+_active_trace: ContextVar[RhymeTrace | None] = ContextVar("active_rhyme_trace", default=None)
+
+
+@contextmanager
+def trace_rhymes(trace: RhymeTrace | None = None) -> Generator[RhymeTrace, None, None]:
+    """Record the reason for each rhyme decision within a block of code.
+
+    Args:
+        trace: An existing trace to add the decisions to, e.g. to aggregate over a corpus.
+
+    Examples:
+        >>> with trace_rhymes() as trace:
+        ...     _ = score_rhyme("fryd", "tusenfryd", orthographic=True), score_rhyme("sol", "måne", orthographic=True)
+        >>> trace.dict
+        {'no_shared_suffix': 1, 'nodrim': 1}
     """
+    trace = trace if trace is not None else RhymeTrace()
+    token = _active_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _active_trace.reset(token)
+
 
+def classify_rhyme(sequence1: str, sequence2: str, orthographic: bool = False) -> RhymeReason:
+    """Find the reason why two words rhyme, or why they do not."""
     substring = shared_ending_substring(sequence1, sequence2)
 
     if not substring:
-        logging.debug("No shared ending substring found in %s and %s", sequence1, sequence2)
-        return 0
+        return RhymeReason.NO_SHARED_SUFFIX
 
     nucleus = find_nucleus(substring, orthographic=orthographic)
 
     if not nucleus:
-        logging.debug("no nucleus found in %s", substring)
-        return 0
+        return RhymeReason.NO_NUCLEUS
     if utils.is_grammatical_suffix(substring):
-        logging.debug("only the grammatical suffixes match: %s", substring)
         # e.g. "arbeidet" / "skrevet"
-        return 0
+        return RhymeReason.GRAMMATICAL_SUFFIX
     if utils.is_grammatical_suffix(substring[nucleus.start() :]):
-        logging.debug("the rhyming part is a grammatical suffix: %s", substring[nucleus.start() :])
-        # e.g. "blomster" / "fester"
-        return 0
+        # the rhyming part is a grammatical suffix, e.g. "blomster" / "fester"
+        return RhymeReason.SUFFIX_NUCLEUS
     if is_schwa(substring):
-        logging.debug(
-            "the rhyming part is scwha (%s) and the words share no other vowels: %s",
-            substring,
-            (sequence1, sequence2),
-        )
-        return 0
+        # the rhyming part is schwa and the words share no other vowels
+        return RhymeReason.SCHWA
 
     if not sequence1.endswith(substring) or not sequence2.endswith(substring):
-        # not an end rhyme
-        logging.debug("not an end rhyme: %s and %s", sequence1, sequence2)
-        return 0
+        return RhymeReason.NOT_END_RHYME
     if substring in (sequence1, sequence2):
         # one of the words is fully contained in the other
-        logging.debug("Nødrim: %s and %s", sequence1, sequence2)
-        return 0.5
+        return RhymeReason.NODRIM
 
     if nucleus and (sequence1 != sequence2):
-        logging.debug("Proper rhyme: %s and %s", sequence1, sequence2)
-        return 1
+        return RhymeReason.PROPER_RHYME
     # otherwise, assume that the words do not rhyme
-    logging.debug("No condition met for a rhyme: %s and %s", sequence1, sequence2)
-    return 0
+    return RhymeReason.NO_CONDITION
+
+
+def score_rhyme(sequence1: str, sequence2: str, orthographic: bool = False) -> float:
+    """Check if two words rhyme and return a rhyming score.
+
+    Use `trace_rhymes` to record the reason for each score.
+
+    Returns:
+        `1.0`:    Only the syllable nucleus + coda (=rhyme) match # perfect or proper rhyme
+        `0.5`:    NØDRIM or lame rhyme. One of the words is fully contained in the other, e.g. 'tusenfryd' / 'fryd'
+        `0.0`:    No match
+    """
+    if instrumentation.enabled:
+        instrumentation.count("score_rhyme.calls")
+
+    reason = classify_rhyme(sequence1, sequence2, orthographic=orthographic)
+    trace = _active_trace.get()
+    if trace is not None:
+        trace.record(reason)
+    return RHYME_SCORES.get(reason, 0)
+
+
+# The number of word pairs that `score_rhymes` compares at a time, to bound the size of the arrays
+SCORE_RHYMES_CHUNK_SIZE = 2**15
+
+SCHWAS = ("e", "AX", "AX0")
+
+
+class _EncodedWords(NamedTuple):
+    """Distinct words as rows of code points from the last character to the first,
+    with the features of each position that `classify_rhyme` looks at."""
+
+    codes: "np.ndarray"
+    lengths: "np.ndarray"
+    nucleus_starts: "np.ndarray"
+    ends_with: dict
+    # numpy drops trailing null characters, so words with null characters are scored one by one
+    has_null: "np.ndarray"
+
+
+@functools.cache
+def _whitespace_codes() -> list[int]:
+    """The code points of the characters that `str.strip` removes."""
+    return [code for code in range(0x3001) if chr(code).isspace()]
+
+
+def _encode_words(words: list[str], orthographic: bool) -> _EncodedWords:
+    import numpy as np
+
+    lengths = np.fromiter(map(len, words), dtype=np.int64, count=len(words))
+    width = max(int(lengths.max(initial=0)), 1)
+    reversed_words = np.array([word[::-1] for word in words], dtype=f"<U{width}")
+    codes = reversed_words.view(np.uint32).reshape(len(words), width).astype(np.int32)
+    has_null = (codes != 0).sum(axis=1) != lengths
+
+    # The positions where a nucleus starts, counted from the end of the word.
+    # A regex search finds the first of these in the shared ending of two words.
+    nuclei = get_valid_nuclei(orthographic=orthographic)
+    letters = [nucleus for nucleus in nuclei if len(nucleus) == 1]
+    nucleus_starts = np.isin(codes, [ord(letter) for letter in letters])
+    for nucleus in nuclei:
+        n = len(nucleus)
+        # A longer nucleus that starts with a single letter nucleus starts at the same positions
+        if n > width or n == 1 or nucleus[0] in letters:
+            continue
+        found = np.ones((len(words), width - n + 1), dtype=bool)
+        for offset, char in enumerate(reversed(nucleus)):
+            found &= codes[:, offset : width - n + 1 + offset] == ord(char)
+        nucleus_starts[:, n - 1 :] |= found
+
+    ends_with = {}
+    for suffix in {*utils.GRAMMATICAL_SUFFIXES, *SCHWAS}:
+        suffix_codes = np.array([ord(char) for char in reversed(suffix)])
+        if len(suffix) <= width:
+            ends_with[suffix] = (codes[:, : len(suffix)] == suffix_codes).all(axis=1) & (lengths >= len(suffix))
+        else:
+            ends_with[suffix] = np.zeros(len(words), dtype=bool)
+    return _EncodedWords(codes, lengths, nucleus_starts, ends_with, has_null)
+
+
+def _classify_rhymes(words: _EncodedWords, ids1: "np.ndarray", ids2: "np.ndarray") -> tuple:
+    """Vectorized `classify_rhyme` of pairs of encoded words.
+
+    Returns:
+        The reason for the score of each pair, and a mask of the pairs that must be classified by `classify_rhyme`.
+    """
+    import numpy as np
+
+    reasons = np.full(len(ids1), RhymeReason.NO_SHARED_SUFFIX, dtype=np.uint8)
+    scalar = words.has_null[ids1] | words.has_null[ids2]
+    # Most pairs differ in the last character, so only the rest are compared in full
+    rows = np.flatnonzero((words.codes[ids1, 0] == words.codes[ids2, 0]) & (words.lengths[ids1] > 0))
+    if len(rows) == 0:
+        return reasons, scalar
+    ids1, ids2 = ids1[rows], ids2[rows]
+    lengths1, lengths2 = words.lengths[ids1], words.lengths[ids2]
+    width = words.codes.shape[1]
+
+    # Length of the shared ending
+    matches = (words.codes[ids1] == words.codes[ids2]) & (np.arange(width) < np.minimum(lengths1, lengths2)[:, None])
+    shared = np.concatenate([matches, np.zeros((len(rows), 1), dtype=bool)], axis=1).argmin(axis=1)
+
+    nucleus_starts = words.nucleus_starts[ids1] & (np.arange(width) < shared[:, None])
+    has_nucleus = nucleus_starts.any(axis=1)
+    rhyme_length = width - nucleus_starts[:, ::-1].argmax(axis=1)
+
+    grammatical = np.zeros(len(rows), dtype=bool)
+    suffix_nucleus = np.zeros(len(rows), dtype=bool)
+    for suffix in utils.GRAMMATICAL_SUFFIXES:
+        ends_with = words.ends_with[suffix][ids1]
+        grammatical |= ends_with & (shared == len(suffix))
+        suffix_nucleus |= ends_with & (rhyme_length == len(suffix))
+    schwa = np.zeros(len(rows), dtype=bool)
+    for suffix in SCHWAS:
+        schwa |= words.ends_with[suffix][ids1] & (shared == len(suffix))
+
+    # In order of increasing precedence, as the checks are done in `classify_rhyme`
+    stanza_reasons = np.full(len(rows), RhymeReason.PROPER_RHYME, dtype=np.uint8)
+    stanza_reasons[(shared == lengths1) | (shared == lengths2)] = RhymeReason.NODRIM
+    stanza_reasons[schwa] = RhymeReason.SCHWA
+    stanza_reasons[suffix_nucleus] = RhymeReason.SUFFIX_NUCLEUS
+    stanza_reasons[grammatical] = RhymeReason.GRAMMATICAL_SUFFIX
+    stanza_reasons[~has_nucleus] = RhymeReason.NO_NUCLEUS
+    reasons[rows] = stanza_reasons
+
+    # `is_schwa` strips whitespace from the shared ending, so endings that start or end with whitespace
+    # are classified by the scalar function
+    edges = np.stack([words.codes[ids1, 0], words.codes[ids1, shared - 1]])
+    scalar[rows] |= np.isin(edges, _whitespace_codes()).any(axis=0)
+    return reasons, scalar
+
+
+def score_rhymes(sequences1: Sequence[str], sequences2: Sequence[str], orthographic: bool = False) -> "np.ndarray":
+    """Score many pairs of words at once, with the same scores as `score_rhyme`.
+
+    The distinct words are encoded once as arrays of code points, and the rules of
+    `classify_rhyme` are applied to all the pairs at once as array operations.
+    Pairs with a shared ending that starts or ends with whitespace, or with null
+    characters, are scored by `score_rhyme` instead.
+
+    Args:
+        sequences1: The first word of each pair.
+        sequences2: The second word of each pair.
+        orthographic: If True, the words are orthographic, otherwise Nofabet transcriptions.
+
+    Returns:
+        An array with the rhyme score of each pair.
+
+    Examples:
+        >>> score_rhymes(["fryd", "sol", "hjerte", "blomster"], ["tusenfryd", "måne", "smerte", "fester"], orthographic=True)
+        array([0.5, 0. , 1. , 0. ])
+    """
+    import numpy as np
+
+    if len(sequences1) != len(sequences2):
+        msg = f"Expected as many first words as second words, got {len(sequences1)} and {len(sequences2)}"
+        raise ValueError(msg)
+    instrumentation.count("score_rhyme.calls", len(sequences1))
+
+    n = len(sequences1)
+    vocabulary = list(dict.fromkeys(chain(sequences1, sequences2)))
+    index = {word: idx for idx, word in enumerate(vocabulary)}
+    ids = np.fromiter(map(index.__getitem__, chain(sequences1, sequences2)), dtype=np.int64, count=2 * n)
+    words = _encode_words(vocabulary, orthographic=orthographic)
+
+    reasons = np.empty(n, dtype=np.uint8)
+    for start in range(0, n, SCORE_RHYMES_CHUNK_SIZE):
+        end = min(start + SCORE_RHYMES_CHUNK_SIZE, n)
+        ids1, ids2 = ids[start:end], ids[n + start : n + end]
+        chunk_reasons, scalar = _classify_rhymes(words, ids1, ids2)
+        for idx in np.flatnonzero(scalar).tolist():
+            word1, word2 = vocabulary[ids1[idx]], vocabulary[ids2[idx]]
+            chunk_reasons[idx] = classify_rhyme(word1, word2, orthographic=orthographic)
+        reasons[start:end] = chunk_reasons
+
+    trace = _active_trace.get()
+    if trace is not None:
+        trace.extend(reasons.tolist())
+    scores = np.zeros(max(RhymeReason) + 1)
+    for reason, score in RHYME_SCORES.items():
+        scores[reason] = score
+    return scores[reasons]
 
 
 def longest_common_substring(string1: str, string2: str) -> str:
@@ -161,19 +445,22 @@ def longest_common_substring(string1: str, string2: str) -> str:
     """
     m = len(string1)
     n = len(string2)
-    L = np.zeros((m + 1, n + 1))
     z = 0
     result = ""
 
+    # Only the previous row of the table is needed to fill in the current one
+    previous = [0] * (n + 1)
     for i in range(1, m + 1):
+        current = [0] * (n + 1)
+        symbol = string1[i - 1]
         for j in range(1, n + 1):
-            if string1[i - 1] == string2[j - 1]:
-                L[i][j] = L[i - 1][j - 1] + 1
-                if L[i][j] > z:
-                    z = L[i][j]
-                    result = string1[(i - int(z)) : i]
-            else:
-                L[i][j] = 0
+            if symbol == string2[j - 1]:
+                length = previous[j - 1] + 1
+                current[j] = length
+                if length > z:
+                    z = length
+                    result = string1[(i - z) : i]
+        previous = current
     return result
 
 
@@ -218,50 +505,191 @@ def find_rhyming_line(current: Verse, previous_lines: list[Verse], orthographic:
     return None, 0
 
 
-def tag_rhyming_verses(verses: list, orthographic: bool = False) -> list:
+def find_near_rhyming_line(
+    current: Verse, previous_lines: list[Verse], similarity: "np.ndarray", threshold: float
+) -> tuple:
+    """Find the most recent of the previous lines that is a near rhyme of the current line.
+
+    Args:
+        current: The current verse.
+        previous_lines: The verses before the current verse.
+        similarity: The near rhyme scores of all pairs of verses in the stanza, by verse ID,
+            from `near_rhyme.near_rhyme_matrix`.
+        threshold: The lowest score of a near rhyme.
+    """
+    for idx, previous in reversed(list(enumerate(previous_lines))):
+        score = float(similarity[previous.id_, current.id_])
+        if score >= threshold:
+            return idx, round(score, 4)
+    return None, 0
+
+
+# Short words that are usually unstressed, and do not carry an internal rhyme
+UNSTRESSED_WORDS = frozenset(
+    ["i", "og", "er", "en", "ei", "et", "at", "å", "af", "av", "paa", "på", "til", "de", "den", "det", "der", "som"]
+)
+
+
+@functools.lru_cache(maxsize=2**16)
+def rhyme_key(word: str, orthographic: bool = False) -> str | None:
+    """Return the part of a word that another word must end with to rhyme with it,
+    or None if the word is unstressed.
+
+    Nofabet transcriptions are keyed by the nucleus and coda of the last stressed syllable
+    and the syllables after it, without stress markers. Orthographic words are keyed from
+    the last vowel, or from the vowel before an unstressed final "e".
+
+    Examples:
+        >>> rhyme_key("S T OO1 D"), rhyme_key("D IH1 S K AX0 N"), rhyme_key("AH0 F")
+        ('OO D', 'IH S K AX N', None)
+        >>> rhyme_key("stille", orthographic=True), rhyme_key("fuld", orthographic=True)
+        ('ille', 'uld')
+    """
+    if orthographic:
+        word = word.casefold()
+        if word in UNSTRESSED_WORDS:
+            return None
+        nuclei = list(utils.NUCLEUS_PATTERN.finditer(word))
+        if not nuclei:
+            return None
+        nucleus = nuclei[-2] if len(nuclei) > 1 and nuclei[-1].group() == "e" else nuclei[-1]
+        key = word[nucleus.start() :]
+        return None if utils.is_grammatical_suffix(key) else key
+
+    syllables = utils.convert_to_syllables(word, ipa=False)
+    if not any(is_stressed(syllable) for syllable in syllables):
+        return None
+    phones = " ".join(find_last_stressed_syllable(syllables)).split()
+    rhyme = remove_syllable_onset(phones)
+    return " ".join(strip_stress(phone) for phone in rhyme) if rhyme else None
+
+
+def find_internal_rhymes(verses: list, orthographic: bool = False) -> list[dict]:
+    """Find groups of words in a stanza that rhyme, where at least one of the words is inside a verse.
+
+    The words are grouped by their `rhyme_key`, so each word is only looked at once,
+    instead of being compared with every other word in the stanza.
+    Groups where every word ends a verse are end rhymes, which `tag_rhyming_verses` finds,
+    and groups of a single repeated word are not rhymes.
+
+    Args:
+        verses: Verse lines, either as orthographic strings or as lists of Nofabet transcribed words.
+        orthographic: If True, the verses are orthographic, otherwise Nofabet transcriptions.
+
+    Returns:
+        The rhyme key, the number of words, and the verse number, word number and form
+        of each word in each group, in order of the first word of each group.
+
+    Examples:
+        >>> find_internal_rhymes(["Vinden stille, kvelden ville", "over stille sjø"], orthographic=True)
+        [{'rhyme_key': 'ille', 'count': 3, 'words': [(0, 1, 'stille'), (0, 3, 'ville'), (1, 1, 'stille')]}]
+    """
+    groups: dict[str, list[tuple[int, int, str]]] = {}
+    verse_ends = set()
+    for verse_id, verse in enumerate(verses):
+        words = utils.normalize(verse) if orthographic else verse
+        for word_id, word in enumerate(words):
+            key = rhyme_key(word, orthographic=orthographic)
+            if key is not None:
+                groups.setdefault(key, []).append((verse_id, word_id, word))
+        if words:
+            verse_ends.add((verse_id, len(words) - 1))
+
+    return [
+        {"rhyme_key": key, "count": len(words), "words": words}
+        for key, words in groups.items()
+        if len({word.casefold() for _, _, word in words}) > 1
+        and any((verse_id, word_id) not in verse_ends for verse_id, word_id, _ in words)
+    ]
+
+
+def extract_poem_internal_rhymes(text: str) -> list[dict]:
+    """Find the internal rhymes in each stanza of a poem, see `find_internal_rhymes`.
+
+    Examples:
+        >>> extract_poem_internal_rhymes("Dag og natt\\n\\nSang og klang i dagens trang")
+        [{'rhyme_key': 'ang', 'count': 3, 'words': [(0, 0, 'sang'), (0, 2, 'klang'), (0, 5, 'trang')], 'stanza_id': 1}]
+    """
+    annotations = []
+    for stanza_id, stanza in enumerate(utils.split_stanzas(text)):
+        for group in find_internal_rhymes(stanza, orthographic=True):
+            group["stanza_id"] = stanza_id
+            annotations.append(group)
+    return annotations
+
+
+def _make_verse(idx: int, verseline: str | list, orthographic: bool, span: tuple | None = None) -> Verse | None:
+    """Create the Verse of a verseline, or None if an orthographic verse has no words."""
+    if not orthographic:
+        syllables = utils.convert_to_syllables(verseline, ipa=False)
+        last_syllable = " ".join(find_last_stressed_syllable(syllables))
+        return Verse(
+            id_=idx,
+            transcription="\t".join(verseline),
+            tokens=verseline,
+            syllables=syllables,
+            last_token=re.sub(r"[0123]", "", last_syllable),
+        )
+    if span is not None:
+        start, end = span
+        tokens, token_spans = utils.normalize_with_spans(verseline, offset=start)
+    else:
+        tokens = utils.normalize(verseline)
+    last_word = find_last_word(tokens)
+    if not last_word:
+        logging.debug("No tokens found in %s", verseline)
+        return None
+    if span is not None:
+        return Verse(id_=idx, span=(start, end), token_spans=token_spans, last_token=last_word.casefold())
+    return Verse(id_=idx, text=verseline, tokens=tokens, last_token=last_word.casefold())
+
+
+def tag_rhyming_verses(
+    verses: list, orthographic: bool = False, spans: list | None = None, near_rhyme_threshold: float | None = None
+) -> list:
     """Annotate end rhyme patterns in a poem stanza.
 
     Args:
         verses: list of verselines with words
         orthographic: if True, the words strings are orthographic,
             otherwise assume phonemic nofabet transcriptions
+        spans: (start, end) character offsets of each orthographic verse in the poem.
+            If given, the verses are annotated with the offsets of the verse and its tokens,
+            instead of copies of the verse text and tokens.
+        near_rhyme_threshold: If given, a phonemic verse that does not rhyme with a previous verse
+            gets the rhyme tag of the most recent verse with a `near_rhyme.score_near_rhymes` score
+            of at least the threshold. The score is its `near_rhyme_score`, and its `rhyme_score` is 0.
     Return:
         list of annotated verses with rhyme scores and rhyme tags
     """
     alphabet = iter(string.ascii_letters)
+    similarity = None
+    if near_rhyme_threshold is not None:
+        if orthographic:
+            msg = "Near rhymes are only scored for phonemic transcriptions"
+            raise ValueError(msg)
+        from poetry_analysis import near_rhyme
+
+        similarity = near_rhyme.near_rhyme_matrix([near_rhyme.rhyme_tail(verse) for verse in verses])
 
     processed = []  # needs to be a list!
     for idx, verseline in enumerate(verses):
         if not verseline:
             continue
-
-        if orthographic:
-            tokens = utils.normalize(verseline)
-            last_word = find_last_word(tokens)
-            if not last_word:
-                logging.debug("No tokens found in %s", verseline)
-                continue
-            current_verse = Verse(
-                id_=idx,
-                text=verseline,
-                tokens=tokens,
-                last_token=last_word.casefold(),
-            )
-        else:
-            syllables = utils.convert_to_syllables(verseline, ipa=False)
-            last_syllable = " ".join(find_last_stressed_syllable(syllables))
-
-            current_verse = Verse(
-                id_=idx,
-                transcription="\t".join(verseline),
-                tokens=verseline,
-                syllables=syllables,
-                last_token=re.sub(r"[0123]", "", last_syllable),
-            )
+        current_verse = _make_verse(
+            idx, verseline, orthographic=orthographic, span=spans[idx] if spans is not None else None
+        )
+        if current_verse is None:
+            continue
 
         rhyming_idx, rhyme_score = find_rhyming_line(current_verse, processed, orthographic=orthographic)
+        if rhyming_idx is None and similarity is not None:
+            rhyming_idx, near_rhyme_score = find_near_rhyming_line(
+                current_verse, processed, similarity, near_rhyme_threshold
+            )
+            current_verse.near_rhyme_score = near_rhyme_score if rhyming_idx is not None else None
 
-        if rhyming_idx is not None and rhyme_score > 0:
+        if rhyming_idx is not None and (rhyme_score > 0 or current_verse.near_rhyme_score is not None):
             rhyming_verse = processed[rhyming_idx]
             current_verse.rhyme_tag = rhyming_verse.rhyme_tag
             current_verse.rhyme_score = rhyme_score
@@ -307,10 +735,28 @@ def get_stanzas_from_transcription(transcription: dict, orthographic: bool = Fal
     return poem
 
 
-def tag_stanzas(stanzas: list, orthographic: bool = False) -> Generator:
-    """Iterate over stanzas and tag verses with a rhyme scheme."""
+def tag_transcription(transcription: dict) -> list:
+    """Annotate rhyming schemes in a poem dict with Nofabet transcriptions, as in the JSON files read by `tag_poem_file`."""
+    return list(tag_stanzas(get_stanzas_from_transcription(transcription), orthographic=False))
+
+
+def tag_stanzas(
+    stanzas: list, orthographic: bool = False, spans: list | None = None, near_rhyme_threshold: float | None = None
+) -> Generator:
+    """Iterate over stanzas and tag verses with a rhyme scheme.
+
+    Args:
+        stanzas: list of stanzas with verselines
+        orthographic: if True, the verses are orthographic, otherwise Nofabet transcriptions
+        spans: (start, end) character offsets of each verse in each stanza, see `tag_rhyming_verses`
+        near_rhyme_threshold: the lowest score of a near rhyme, see `tag_rhyming_verses`
+    """
     for idx, stanza in enumerate(stanzas):
-        tagged = tag_rhyming_verses(stanza, orthographic=orthographic)
+        stanza_spans = spans[idx] if spans is not None else None
+        instrumentation.count("rhyme.stanzas")
+        tagged = tag_rhyming_verses(
+            stanza, orthographic=orthographic, spans=stanza_spans, near_rhyme_threshold=near_rhyme_threshold
+        )
         rhyme_scheme = collate_rhyme_scheme(tagged)
 
         yield {
@@ -320,39 +766,67 @@ def tag_stanzas(stanzas: list, orthographic: bool = False) -> Generator:
         }
 
 
-def tag_text(text: str) -> Generator:
-    """Annotate rhyming schemes in a text where stanzas are separated by two empty lines."""
+def tag_text(text: str, offsets: bool = False) -> Generator:
+    """Annotate rhyming schemes in a text where stanzas are separated by two empty lines.
+
+    Args:
+        text: The poem text.
+        offsets: If True, annotate each verse with the character offsets of the verse
+            and its tokens in the text, instead of copying the verse text and tokens.
+    """
+    if offsets:
+        spans = utils.split_stanza_spans(text)
+        stanzas = [[text[start:end] for start, end in stanza] for stanza in spans]
+        return tag_stanzas(stanzas, orthographic=True, spans=spans)
     stanzas = utils.split_stanzas(text)
     file_annotations = tag_stanzas(stanzas, orthographic=True)
     return file_annotations
 
 
-def tag_poem_file(poem_file: str, write_to_file: bool = False) -> list:
-    """Annotate rhyming schemes in a poem from a file."""
+def _read_stanzas(filepath: Path) -> Generator[list[str], None, None]:
+    with filepath.open(encoding="utf-8") as poem_file:
+        yield from utils.iter_stanzas(poem_file)
+
+
+def tag_poem_file(poem_file: str, write_to_file: bool = False, backend: str = "auto", pretty: bool = False) -> list:
+    """Annotate rhyming schemes in a poem from a file.
+
+    Args:
+        poem_file: A text file with a poem, or a JSON file with Nofabet transcriptions.
+        write_to_file: If True, save the annotations next to the poem file.
+        backend: The serialization backend of the saved annotations, see `poetry_analysis.serialization`.
+        pretty: If True, indent the saved JSON annotations.
+    """
     # Assume that the stanzas are independent of each other
     # and that the rhyme scheme is unique to each stanza
 
     filepath = Path(poem_file)
-    file_content = filepath.read_text(encoding="utf-8")
     if filepath.suffix == ".json":
-        poem = json.loads(file_content)
-        poem_id = poem.get("text_id")
-        orthographic = False
-        stanzas = get_stanzas_from_transcription(poem, orthographic=orthographic)
+        with instrumentation.stage("read"):
+            file_content = filepath.read_text(encoding="utf-8")
+        with instrumentation.stage("parse"):
+            poem = json.loads(file_content)
+            poem_id = poem.get("text_id")
+            orthographic = False
+            stanzas = get_stanzas_from_transcription(poem, orthographic=orthographic)
 
     elif filepath.suffix == ".txt":
         poem_id = filepath.stem.split("_")[0]
-        stanzas = utils.split_stanzas(file_content)
+        # The stanzas are read from the file while they are tagged
+        stanzas = _read_stanzas(filepath)
         orthographic = True
 
     logging.debug("Tagging poem: %s", poem_id)
 
-    file_annotations = list(tag_stanzas(stanzas, orthographic=orthographic))
+    with instrumentation.stage("tag"):
+        file_annotations = list(tag_stanzas(stanzas, orthographic=orthographic))
 
     if write_to_file:
-        outputfile = filepath.parent / f"{filepath.stem}_rhyme_scheme.json"
-        with outputfile.open("w") as f:
-            f.write(json.dumps(file_annotations, ensure_ascii=False, indent=4))
+        outputfile = filepath.parent / f"{filepath.stem}_rhyme_scheme{serialization.suffix(backend)}"
+        with instrumentation.stage("serialize"):
+            serialized = serialization.dumps(file_annotations, backend=backend, pretty=pretty)
+        with instrumentation.stage("write"):
+            outputfile.write_bytes(serialized)
 
         logging.debug("Saved rhyme scheme annotations for poem %s to \n\t%s", poem_id, outputfile)
     return file_annotations
@@ -0,0 +1,223 @@
+"""Find poems and stanzas with rhyme schemes that are equal or similar to a query.
+
+Rhyme schemes are canonicalized before they are indexed, so that the letters only
+show which verses rhyme with each other: the first rhyme in each stanza is `a`,
+the next new rhyme is `b`, and so on. "ABAB CDCD" thus becomes "abab abab".
+
+The index keeps a posting list of the stanzas and the poems with each canonical
+scheme, for exact search, and a BK-tree of the distinct schemes for search by edit
+distance. A BK-tree only compares the query with a fraction of the schemes when the
+distance is small, since the triangle inequality rules out whole subtrees.
+
+Examples:
+    >>> index = RhymeSchemeIndex()
+    >>> index.add_poem("1", ["abab", "cdcd"])
+    >>> index.add_poem("2", ["aabb", "abab"])
+    >>> index.find_poems("ABAB CDCD")
+    [('1', 0)]
+    >>> index.find_stanzas("abab")
+    [('1', 0, 0), ('1', 1, 0), ('2', 1, 0)]
+    >>> index.find_stanzas("abba", max_distance=2)
+    [('2', 0, 2), ('1', 0, 2), ('1', 1, 2), ('2', 1, 2)]
+"""
+
+import string
+from collections.abc import Hashable, Iterable, Mapping
+
+# Labels of the rhymes in canonical schemes, like the rhyme tags of `rhyme_detection.tag_rhyming_verses`
+LABELS = string.ascii_letters
+
+
+def canonicalize_stanza_scheme(scheme: str) -> str:
+    """Relabel the rhymes of a stanza in order of first occurrence.
+
+    Examples:
+        >>> canonicalize_stanza_scheme("CDCD")
+        'abab'
+        >>> canonicalize_stanza_scheme("baab")
+        'abba'
+    """
+    labels = {}
+    for tag in scheme:
+        if tag not in labels:
+            n = len(labels)
+            labels[tag] = LABELS[n] if n < len(LABELS) else chr(0x100 + n)
+    return "".join(labels[tag] for tag in scheme)
+
+
+def canonicalize_scheme(scheme: str | Iterable[str]) -> str:
+    """Canonicalize each stanza of a rhyme scheme, given as a string with the stanzas
+    separated by whitespace or as a list of stanza schemes.
+
+    Examples:
+        >>> canonicalize_scheme("ABAB CDCD")
+        'abab abab'
+        >>> canonicalize_scheme(["aabb", "ccdd", "efe"])
+        'aabb aabb aba'
+    """
+    stanzas = scheme.split() if isinstance(scheme, str) else scheme
+    return " ".join(canonicalize_stanza_scheme(stanza) for stanza in stanzas if stanza)
+
+
+def levenshtein(string1: str, string2: str) -> int:
+    """Count the insertions, deletions and substitutions it takes to turn one string into the other.
+
+    Examples:
+        >>> levenshtein("abab", "abba")
+        2
+        >>> levenshtein("aabb", "aabbcc")
+        2
+    """
+    if len(string1) < len(string2):
+        string1, string2 = string2, string1
+    previous = list(range(len(string2) + 1))
+    for i, char1 in enumerate(string1, start=1):
+        current = [i]
+        for j, char2 in enumerate(string2, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char1 != char2)))
+        previous = current
+    return previous[-1]
+
+
+class BKTree:
+    """A tree of strings for search by edit distance.
+
+    Each child of a node is stored under its distance to the node. A search for strings
+    within a distance `d` of a query only visits the children whose distance to the node
+    is within `d` of the query's distance to the node.
+
+    Examples:
+        >>> tree = BKTree(["abab", "aabb", "abba", "abcb"])
+        >>> tree.search("abab", max_distance=1)
+        [(0, 'abab'), (1, 'abcb')]
+    """
+
+    def __init__(self, words: Iterable[str] = ()):
+        self.words: list[str] = []
+        self.children: list[dict[int, int]] = []
+        for word in words:
+            self.add(word)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __contains__(self, word: str) -> bool:
+        return bool(self.words) and self.search(word, max_distance=0) != []
+
+    def add(self, word: str) -> None:
+        """Add a word to the tree, unless it is already there."""
+        if not self.words:
+            self.words.append(word)
+            self.children.append({})
+            return
+        node = 0
+        while True:
+            distance = levenshtein(word, self.words[node])
+            if distance == 0:
+                return
+            child = self.children[node].get(distance)
+            if child is None:
+                self.children[node][distance] = len(self.words)
+                self.words.append(word)
+                self.children.append({})
+                return
+            node = child
+
+    def search(self, query: str, max_distance: int) -> list[tuple[int, str]]:
+        """Return the distance and the word of each word within a distance of the query, closest first."""
+        if not self.words:
+            return []
+        matches = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            distance = levenshtein(query, self.words[node])
+            if distance <= max_distance:
+                matches.append((distance, self.words[node]))
+            for child_distance, child in self.children[node].items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return sorted(matches)
+
+
+class RhymeSchemeIndex:
+    """An index of the rhyme schemes of the stanzas and poems in a corpus."""
+
+    def __init__(self):
+        self.stanza_postings: dict[str, list[tuple[Hashable, int]]] = {}
+        self.poem_postings: dict[str, list[Hashable]] = {}
+        self.stanza_tree = BKTree()
+        self.poem_tree = BKTree()
+
+    def __len__(self) -> int:
+        """The number of poems in the index."""
+        return sum(len(poems) for poems in self.poem_postings.values())
+
+    def add_poem(self, poem_id: Hashable, stanzas: Iterable[str | Mapping]) -> None:
+        """Index the rhyme schemes of a poem.
+
+        Args:
+            poem_id: The ID the poem is found by.
+            stanzas: The rhyme scheme of each stanza, e.g. from `rhyme_detection.collate_rhyme_scheme`,
+                or the stanza annotations from `rhyme_detection.tag_stanzas`.
+        """
+        schemes = []
+        for stanza_id, stanza in enumerate(stanzas):
+            scheme = stanza["rhyme_scheme"] if isinstance(stanza, Mapping) else stanza
+            if not scheme:
+                continue
+            scheme = canonicalize_stanza_scheme(scheme)
+            schemes.append(scheme)
+            if scheme not in self.stanza_postings:
+                self.stanza_postings[scheme] = []
+                self.stanza_tree.add(scheme)
+            self.stanza_postings[scheme].append((poem_id, stanza_id))
+        poem_scheme = " ".join(schemes)
+        if poem_scheme not in self.poem_postings:
+            self.poem_postings[poem_scheme] = []
+            self.poem_tree.add(poem_scheme)
+        self.poem_postings[poem_scheme].append(poem_id)
+
+    def add_annotations(self, annotations: Iterable[Mapping]) -> None:
+        """Index the rhyme annotations of poems, e.g. from `parallel.process_poems`."""
+        for n, poem in enumerate(annotations):
+            self.add_poem(poem.get("ID", n), poem["rhyme"])
+
+    def similar_stanza_schemes(self, scheme: str, max_distance: int = 0) -> list[tuple[int, str]]:
+        """Return the indexed stanza schemes within an edit distance of a canonicalized stanza scheme."""
+        query = canonicalize_stanza_scheme(scheme)
+        if max_distance == 0:
+            return [(0, query)] if query in self.stanza_postings else []
+        return self.stanza_tree.search(query, max_distance)
+
+    def similar_poem_schemes(self, scheme: str | Iterable[str], max_distance: int = 0) -> list[tuple[int, str]]:
+        """Return the indexed poem schemes within an edit distance of a canonicalized poem scheme."""
+        query = canonicalize_scheme(scheme)
+        if max_distance == 0:
+            return [(0, query)] if query in self.poem_postings else []
+        return self.poem_tree.search(query, max_distance)
+
+    def find_stanzas(self, scheme: str, max_distance: int = 0) -> list[tuple[Hashable, int, int]]:
+        """Find the stanzas with a rhyme scheme within an edit distance of the query.
+
+        Returns:
+            The poem ID, stanza number and distance of each stanza, closest first.
+        """
+        return [
+            (poem_id, stanza_id, distance)
+            for distance, match in self.similar_stanza_schemes(scheme, max_distance)
+            for poem_id, stanza_id in self.stanza_postings[match]
+        ]
+
+    def find_poems(self, scheme: str | Iterable[str], max_distance: int = 0) -> list[tuple[Hashable, int]]:
+        """Find the poems with a rhyme scheme within an edit distance of the query,
+        where stanzas are separated by whitespace.
+
+        Returns:
+            The poem ID and distance of each poem, closest first.
+        """
+        return [
+            (poem_id, distance)
+            for distance, match in self.similar_poem_schemes(scheme, max_distance)
+            for poem_id in self.poem_postings[match]
+        ]
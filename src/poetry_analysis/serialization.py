@@ -0,0 +1,103 @@
+"""Write and read annotations with a choice of serialization backends.
+
+Backends:
+    `json`: The standard library encoder, with compact separators.
+    `orjson`: A faster JSON encoder, if `orjson` is installed.
+    `msgpack`: A compact binary format, if `msgpack` is installed.
+    `auto`: `orjson` if it is installed, and `json` otherwise.
+
+The JSON backends give the same data, and both write UTF-8 without escaping non-ASCII
+characters. The output is compact by default. Pass `pretty=True` to indent it for reading.
+Install both optional backends with `pip install 'poetry-analysis[serialization]'`.
+
+Examples:
+    >>> dumps({"ord": "blåklokke", "antall": [1, 2]}, backend="json")
+    b'{"ord":"bl\\xc3\\xa5klokke","antall":[1,2]}'
+    >>> loads(dumps({"ord": "blåklokke"}))
+    {'ord': 'blåklokke'}
+"""
+
+import importlib.util
+import json
+from pathlib import Path
+
+BACKENDS = ("json", "orjson", "msgpack")
+
+SUFFIXES = {
+    "json": ".json",
+    "orjson": ".json",
+    "msgpack": ".msgpack",
+}
+
+
+def available_backends() -> list[str]:
+    """Return the backends that can be used in this environment."""
+    return [backend for backend in BACKENDS if backend == "json" or importlib.util.find_spec(backend) is not None]
+
+
+def resolve_backend(backend: str = "auto") -> str:
+    """Return the name of the backend to use, replacing `auto` with the fastest available JSON backend."""
+    if backend == "auto":
+        return "orjson" if importlib.util.find_spec("orjson") is not None else "json"
+    if backend not in BACKENDS:
+        msg = f"Unknown serialization backend {backend!r}. Choose from: auto, {', '.join(BACKENDS)}"
+        raise ValueError(msg)
+    return backend
+
+
+def dumps(data: object, backend: str = "auto", pretty: bool = False) -> bytes:
+    """Serialize annotations to bytes.
+
+    Args:
+        data: The annotations, made of dicts, lists, tuples, strings, numbers, booleans and None.
+        backend: One of `auto`, `json`, `orjson` and `msgpack`.
+        pretty: If True, indent JSON output. Has no effect on msgpack.
+    """
+    backend = resolve_backend(backend)
+    if backend == "orjson":
+        import orjson
+
+        options = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(data, option=options)
+    if backend == "msgpack":
+        import msgpack
+
+        return msgpack.packb(data, use_bin_type=True)
+    if pretty:
+        # Indented like `orjson.OPT_INDENT_2`, so that both JSON backends give the same bytes
+        return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: bytes | str, backend: str = "auto") -> object:
+    """Deserialize annotations written with `dumps`."""
+    backend = resolve_backend(backend)
+    if backend == "orjson":
+        import orjson
+
+        return orjson.loads(data)
+    if backend == "msgpack":
+        import msgpack
+
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+    return json.loads(data)
+
+
+def dump(data: object, outputfile: str | Path, backend: str = "auto", pretty: bool = False) -> Path:
+    """Serialize annotations to a file."""
+    outputfile = Path(outputfile)
+    outputfile.write_bytes(dumps(data, backend=backend, pretty=pretty))
+    return outputfile
+
+
+def load(inputfile: str | Path, backend: str | None = None) -> object:
+    """Read annotations from a file, with the backend given by the file suffix if no backend is given."""
+    inputfile = Path(inputfile)
+    if backend is None:
+        backend = "msgpack" if inputfile.suffix == SUFFIXES["msgpack"] else "auto"
+    return loads(inputfile.read_bytes(), backend=backend)
+
+
+def suffix(backend: str = "auto") -> str:
+    """Return the file suffix for the output of a backend."""
+    return SUFFIXES[resolve_backend(backend)]
@@ -0,0 +1,359 @@
+"""A long-running local HTTP service that annotates poems with warm caches.
+
+Start it with `poetry-analysis serve`, or `python -m poetry_analysis serve --port 8000`.
+The extractors, the tokenizer and the phonetic inventories are imported and warmed up
+once at startup, instead of once per request.
+
+Endpoints:
+    POST /rhyme, /alliteration, /anaphora, /lyrical-subject, /all:
+        Annotate `{"text": "..."}` or `{"texts": ["...", ...]}`.
+        The response is a dict with the annotations of each extractor, or a list of such dicts.
+    GET /health:
+        Status, uptime and the available endpoints.
+    GET /metrics:
+        Request counts and latencies, batch sizes and token cache statistics in the Prometheus text format.
+
+Concurrent requests to the same extractor are collected into micro-batches, which run
+in a shared pool of worker threads. Identical poems in a batch are only annotated once.
+
+Examples:
+    >>> import json, urllib.request
+    >>> server = AnnotationServer(port=0, warm_up=False)
+    >>> server.start()
+    >>> request = urllib.request.Request(f"{server.url}/lyrical-subject", data=b'{"text": "Jeg ser"}')
+    >>> with urllib.request.urlopen(request) as response:
+    ...     json.load(response)
+    {'lyrical_subject': {'explicit_subject': True, 'explicit_object': False, 'implicit': False, 'deixis': False}}
+    >>> server.stop()
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable, Generator, Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from poetry_analysis import instrumentation, serialization
+from poetry_analysis.parallel import EXTRACTORS, TRANSCRIPTION_EXTRACTORS, get_extractor
+
+# Poem used to import the extractors and fill the caches at startup
+WARM_UP_POEM = """Jeg ser paa den hvide himmel,
+jeg ser paa de graablaa skyer,
+jeg ser paa den blodige sol.
+
+Dette er altsaa verden.
+Dette er altsaa klodernes hjem.
+"""
+
+# Nofabet transcription used to import `convert_pa` and compile the Nofabet patterns at startup
+WARM_UP_TRANSCRIPTION = {
+    "text_id": "warm_up",
+    "line_0": [["Ensom", "EE2 N S AH0 M"], ["stod", "S T OO1 D"]],
+    "line_1": [["ved", "V EE1"], ["flod", "F L OO1 D"]],
+}
+
+_STOP = object()
+
+DEFAULT_MAX_BODY_SIZE = 16 * 1024 * 1024
+
+
+def _route(extractor: str) -> str:
+    return "/" + extractor.replace("_", "-")
+
+
+class MicroBatcher:
+    """Collect the texts submitted to an extractor within a short time into batches,
+    and annotate each batch in a shared thread pool.
+
+    Args:
+        function: The extractor to apply to each text.
+        executor: The thread pool that runs the batches.
+        batch_size: The maximum number of texts in a batch.
+        max_wait: Seconds to wait for more texts after the first text of a batch arrives.
+        metrics: Where to count batches and batch sizes.
+        name: The name of the extractor in the metrics.
+    """
+
+    def __init__(
+        self,
+        function: Callable,
+        executor: ThreadPoolExecutor,
+        batch_size: int = 32,
+        max_wait: float = 0.002,
+        metrics: instrumentation.Metrics | None = None,
+        name: str = "",
+    ):
+        self.function = function
+        self.executor = executor
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.metrics = metrics or instrumentation.Metrics()
+        self.name = name
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._collect, name=f"batcher-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        """Queue a text for annotation, and return a future with its annotations."""
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def stop(self) -> None:
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _next_batch(self) -> list | None:
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # Annotate the texts that are already collected before stopping
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _collect(self) -> None:
+        while (batch := self._next_batch()) is not None:
+            self.metrics.count(f"batches.{self.name}")
+            self.metrics.count(f"batched_texts.{self.name}", len(batch))
+            self.executor.submit(self._annotate, batch)
+
+    def _annotate(self, batch: list[tuple[str, Future]]) -> None:
+        results = {}
+        for text, future in batch:
+            try:
+                if text not in results:
+                    result = self.function(text)
+                    results[text] = list(result) if isinstance(result, Generator) else result
+                future.set_result(results[text])
+            except Exception as error:
+                future.set_exception(error)
+
+
+class AnnotationServer:
+    """An HTTP server with an endpoint for each extractor.
+
+    Args:
+        host: The address to listen on.
+        port: The port to listen on. Use 0 to pick a free port.
+        extractors: Names of the extractors in `parallel.EXTRACTORS` to serve. Defaults to all of them.
+        max_concurrency: The number of worker threads that annotate batches.
+        max_pending: The maximum number of requests being handled at a time.
+            Further requests get the response 503 Service Unavailable.
+        batch_size: The maximum number of texts in a batch.
+        batch_wait: Seconds to wait for more requests to the same extractor before annotating a batch.
+        max_body_size: The maximum size of a request body in bytes.
+            Larger requests get the response 413 Content Too Large.
+        warm_up: If True, annotate a sample poem with each extractor before serving.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        extractors: Iterable[str] | None = None,
+        max_concurrency: int = 4,
+        max_pending: int = 64,
+        batch_size: int = 32,
+        batch_wait: float = 0.002,
+        max_body_size: int = DEFAULT_MAX_BODY_SIZE,
+        warm_up: bool = True,
+    ):
+        self.max_body_size = max_body_size
+        self.extractors = tuple(EXTRACTORS if extractors is None else extractors)
+        self.metrics = instrumentation.Metrics()
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="annotate")
+        self.batchers = {
+            name: MicroBatcher(
+                get_extractor(name),
+                self.executor,
+                batch_size=batch_size,
+                max_wait=batch_wait,
+                metrics=self.metrics,
+                name=name,
+            )
+            for name in self.extractors
+        }
+        self.routes = {_route(name): [name] for name in self.extractors}
+        self.routes["/all"] = list(self.extractors)
+        self.pending = threading.BoundedSemaphore(max_pending)
+        if warm_up:
+            self.warm_up()
+        self.started = time.time()
+        self.httpd = ThreadingHTTPServer((host, port), AnnotationRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.app = self
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def warm_up(self) -> None:
+        """Import the extractors and their dependencies, and fill the caches with a sample poem,
+        and with a sample transcription for the extractors with a phonemic version."""
+        for name in self.extractors:
+            self.batchers[name].submit(WARM_UP_POEM).result()
+            if name in TRANSCRIPTION_EXTRACTORS:
+                list(get_extractor(name, transcription=True)(WARM_UP_TRANSCRIPTION))
+        logging.info("Warmed up the extractors: %s", ", ".join(self.extractors))
+
+    def annotate(self, texts: list[str], extractors: list[str]) -> list[dict]:
+        """Submit texts to the batchers of the extractors, and wait for the annotations."""
+        futures = [{name: self.batchers[name].submit(text) for name in extractors} for text in texts]
+        return [{name: future.result() for name, future in annotations.items()} for annotations in futures]
+
+    def health(self) -> dict:
+        return {
+            "status": "ok",
+            "uptime": time.time() - self.started,
+            "endpoints": sorted(self.routes),
+        }
+
+    def prometheus_metrics(self) -> str:
+        """Return the server metrics and the token cache statistics in the Prometheus text format."""
+        from poetry_analysis import utils
+
+        cache_info = utils.token_cache_info()
+        prefix = instrumentation.PROMETHEUS_PREFIX
+        lines = [
+            f"# HELP {prefix}_token_cache Hits, misses and size of the tokenization cache.",
+            f"# TYPE {prefix}_token_cache gauge",
+            f'{prefix}_token_cache{{value="hits"}} {cache_info.hits}',
+            f'{prefix}_token_cache{{value="misses"}} {cache_info.misses}',
+            f'{prefix}_token_cache{{value="size"}} {cache_info.currsize}',
+        ]
+        return self.metrics.to_prometheus() + "\n".join(lines) + "\n"
+
+    def start(self) -> None:
+        """Serve requests in a background thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="annotation-server", daemon=True)
+        self._thread.start()
+
+    def serve_forever(self) -> None:
+        logging.info("Serving poem annotations at %s", self.url)
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        """Stop serving, and finish the batches that are already submitted."""
+        if self._thread is not None:
+            self.httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.httpd.server_close()
+        for batcher in self.batchers.values():
+            batcher.stop()
+        self.executor.shutdown(wait=True)
+
+
+class AnnotationRequestHandler(BaseHTTPRequestHandler):
+    """Route requests to the `AnnotationServer` that the HTTP server belongs to."""
+
+    server_version = "poetry-analysis"
+
+    @property
+    def app(self) -> AnnotationServer:
+        return self.server.app
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A002
+        logging.debug("%s - %s", self.address_string(), format % args)
+
+    def send_body(self, status: HTTPStatus, body: str | bytes, content_type: str = "application/json") -> None:
+        encoded = body.encode("utf-8") if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def send_json(self, status: HTTPStatus, data: object) -> None:
+        self.send_body(status, serialization.dumps(data))
+
+    def send_error_json(self, status: HTTPStatus, message: str) -> None:
+        self.app.metrics.count(f"errors.{status.value}")
+        self.send_json(status, {"error": message})
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self.send_json(HTTPStatus.OK, self.app.health())
+        elif self.path == "/metrics":
+            self.send_body(HTTPStatus.OK, self.app.prometheus_metrics(), content_type="text/plain; version=0.0.4")
+        else:
+            self.send_error_json(HTTPStatus.NOT_FOUND, f"Unknown endpoint: {self.path}")
+
+    def do_POST(self) -> None:
+        extractors = self.app.routes.get(self.path)
+        if extractors is None:
+            self.send_error_json(HTTPStatus.NOT_FOUND, f"Unknown endpoint: {self.path}")
+            return
+        if not self.app.pending.acquire(blocking=False):
+            self.send_error_json(HTTPStatus.SERVICE_UNAVAILABLE, "Too many pending requests")
+            return
+        try:
+            start = time.perf_counter()
+            self.handle_annotation(extractors)
+            self.app.metrics.record(f"request{self.path.replace('/', '.')}", time.perf_counter() - start)
+        finally:
+            self.app.pending.release()
+
+    def read_body(self) -> bytes | None:
+        """Read the request body, or send an error response and return None if its length is missing or invalid."""
+        length = self.headers.get("Content-Length")
+        if length is None:
+            self.send_error_json(HTTPStatus.LENGTH_REQUIRED, "Missing Content-Length header")
+        elif not (length.isascii() and length.strip().isdigit()):
+            self.send_error_json(HTTPStatus.BAD_REQUEST, f"Invalid Content-Length header: {length!r}")
+        elif int(length) > self.app.max_body_size:
+            self.send_error_json(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Request body is larger than {self.app.max_body_size} bytes"
+            )
+        else:
+            return self.rfile.read(int(length))
+        # The body is not read, so the connection cannot be reused for another request
+        self.close_connection = True
+        return None
+
+    def handle_annotation(self, extractors: list[str]) -> None:
+        body = self.read_body()
+        if body is None:
+            return
+        try:
+            request = serialization.loads(body)
+            texts = [request["text"]] if "text" in request else request["texts"]
+            if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+                raise TypeError  # noqa: TRY301
+        except (ValueError, KeyError, TypeError):
+            self.send_error_json(HTTPStatus.BAD_REQUEST, 'Expected a JSON object with "text" or "texts"')
+            return
+        try:
+            annotations = self.app.annotate(texts, extractors)
+        except Exception as error:
+            logging.exception("Failed to annotate %s texts", len(texts))
+            self.send_error_json(HTTPStatus.INTERNAL_SERVER_ERROR, str(error))
+            return
+        self.send_json(HTTPStatus.OK, annotations[0] if "text" in request else annotations)
+
+
+def serve(host: str = "127.0.0.1", port: int = 8000, **options) -> None:
+    """Run an `AnnotationServer` until it is interrupted."""
+    server = AnnotationServer(host=host, port=port, **options)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("Stopped the annotation server")
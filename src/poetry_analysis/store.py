@@ -0,0 +1,264 @@
+"""Store the annotations of a corpus in a local SQLite database, and query them.
+
+The annotations are the dicts that `parallel.process_poems` and the `poetry-analysis`
+command line tool give for each poem, with the metadata fields `ID`, `URN` and
+`Tittel på dikt`, and a key for each extractor. They are split into a table for poems,
+stanzas, verses, alliterations, anaphora and lyrical subject categories, with indexes
+on the columns that are commonly queried.
+
+Examples:
+    >>> from poetry_analysis.parallel import process_poems
+    >>> poems = [{"ID": "1", "textV3": "Sees Sirius, sydhimlens smukkeste\\nSees Sirius!"}]
+    >>> with AnnotationStore(":memory:") as store:
+    ...     store.add_poems(process_poems(poems, jobs=1))
+    ...     store.find_poems(alliteration="s", lyrical_subject="explicit_subject")
+    ...     store.find_poems(alliteration="s", rhyme_scheme="ab")
+    1
+    []
+    ['1']
+"""
+
+import json
+import sqlite3
+from collections import Counter
+from collections.abc import Generator, Iterable, Mapping
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS poems (
+    poem_id INTEGER PRIMARY KEY,
+    id TEXT UNIQUE,
+    urn TEXT,
+    title TEXT
+);
+CREATE TABLE IF NOT EXISTS stanzas (
+    poem_id INTEGER NOT NULL REFERENCES poems (poem_id) ON DELETE CASCADE,
+    stanza_id INTEGER NOT NULL,
+    rhyme_scheme TEXT,
+    PRIMARY KEY (poem_id, stanza_id)
+);
+CREATE TABLE IF NOT EXISTS verses (
+    poem_id INTEGER NOT NULL REFERENCES poems (poem_id) ON DELETE CASCADE,
+    stanza_id INTEGER NOT NULL,
+    verse_id INTEGER NOT NULL,
+    text TEXT,
+    last_token TEXT,
+    rhyme_tag TEXT,
+    rhyme_score REAL,
+    rhymes_with INTEGER,
+    PRIMARY KEY (poem_id, stanza_id, verse_id)
+);
+CREATE TABLE IF NOT EXISTS alliterations (
+    poem_id INTEGER NOT NULL REFERENCES poems (poem_id) ON DELETE CASCADE,
+    stanza_id INTEGER NOT NULL,
+    line_id INTEGER NOT NULL,
+    symbol TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    words TEXT
+);
+CREATE TABLE IF NOT EXISTS anaphora (
+    poem_id INTEGER NOT NULL REFERENCES poems (poem_id) ON DELETE CASCADE,
+    stanza_id INTEGER NOT NULL,
+    phrase TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    first_line INTEGER,
+    last_line INTEGER
+);
+CREATE TABLE IF NOT EXISTS lyrical_subjects (
+    poem_id INTEGER NOT NULL REFERENCES poems (poem_id) ON DELETE CASCADE,
+    category TEXT NOT NULL,
+    present INTEGER NOT NULL,
+    PRIMARY KEY (poem_id, category)
+);
+CREATE INDEX IF NOT EXISTS poems_urn ON poems (urn);
+CREATE INDEX IF NOT EXISTS stanzas_rhyme_scheme ON stanzas (rhyme_scheme);
+CREATE INDEX IF NOT EXISTS verses_last_token ON verses (last_token);
+CREATE INDEX IF NOT EXISTS alliterations_symbol ON alliterations (symbol, poem_id);
+CREATE INDEX IF NOT EXISTS alliterations_poem ON alliterations (poem_id);
+CREATE INDEX IF NOT EXISTS anaphora_phrase ON anaphora (phrase, poem_id);
+CREATE INDEX IF NOT EXISTS anaphora_poem ON anaphora (poem_id);
+CREATE INDEX IF NOT EXISTS lyrical_subjects_category ON lyrical_subjects (category, present, poem_id);
+"""
+
+INSERTS = {
+    "poems": "INSERT INTO poems (poem_id, id, urn, title) VALUES (?, ?, ?, ?)",
+    "stanzas": "INSERT INTO stanzas VALUES (?, ?, ?)",
+    "verses": "INSERT INTO verses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+    "alliterations": "INSERT INTO alliterations VALUES (?, ?, ?, ?, ?, ?)",
+    "anaphora": "INSERT INTO anaphora VALUES (?, ?, ?, ?, ?, ?)",
+    "lyrical_subjects": "INSERT INTO lyrical_subjects VALUES (?, ?, ?)",
+}
+
+# Conditions of `find_poems`, with a single parameter each
+FILTERS = {
+    "rhyme_scheme": "EXISTS (SELECT 1 FROM stanzas s WHERE s.poem_id = p.poem_id AND s.rhyme_scheme = ?)",
+    "alliteration": "EXISTS (SELECT 1 FROM alliterations a WHERE a.poem_id = p.poem_id AND a.symbol = ?)",
+    "anaphora": "EXISTS (SELECT 1 FROM anaphora n WHERE n.poem_id = p.poem_id AND n.phrase = ?)",
+    "lyrical_subject": (
+        "EXISTS (SELECT 1 FROM lyrical_subjects l WHERE l.poem_id = p.poem_id AND l.category = ? AND l.present = 1)"
+    ),
+    "last_token": "EXISTS (SELECT 1 FROM verses v WHERE v.poem_id = p.poem_id AND v.last_token = ?)",
+}
+
+
+def poem_rows(poem_id: int, annotations: Mapping) -> Generator[tuple[str, tuple], None, None]:
+    """Split the annotations of a poem into rows of the tables they belong in."""
+    yield "poems", (poem_id, annotations.get("ID"), annotations.get("URN"), annotations.get("Tittel på dikt"))
+    for stanza in annotations.get("rhyme") or []:
+        stanza_id = stanza["stanza_id"]
+        yield "stanzas", (poem_id, stanza_id, stanza.get("rhyme_scheme"))
+        for verse in stanza.get("verses", []):
+            yield (
+                "verses",
+                (
+                    poem_id,
+                    stanza_id,
+                    verse["verse_id"],
+                    verse.get("text") or None,
+                    verse.get("last_token"),
+                    verse.get("rhyme_tag"),
+                    verse.get("rhyme_score"),
+                    verse.get("rhymes_with"),
+                ),
+            )
+    for group in annotations.get("alliteration") or []:
+        words = group.get("words", group.get("spans"))
+        yield (
+            "alliterations",
+            (poem_id, group["stanza_id"], group["line_id"], group["symbol"], group["count"], json.dumps(words)),
+        )
+    for item in annotations.get("anaphora") or []:
+        lines = item["line_id"]
+        yield "anaphora", (poem_id, item["stanza_id"], item["phrase"], item["count"], min(lines), max(lines))
+    for category, present in (annotations.get("lyrical_subject") or {}).items():
+        yield "lyrical_subjects", (poem_id, category, int(bool(present)))
+
+
+def read_annotation_files(paths: Iterable[str | Path]) -> Generator[dict, None, None]:
+    """Read poem annotations from JSON files with a dict or a list of dicts, or from JSONL files."""
+    from poetry_analysis import serialization
+
+    for path in map(Path, paths):
+        if path.suffix == ".jsonl":
+            with path.open(encoding="utf-8") as lines:
+                yield from (json.loads(line) for line in lines if line.strip())
+            continue
+        annotations = serialization.load(path)
+        yield from annotations if isinstance(annotations, list) else [annotations]
+
+
+class AnnotationStore:
+    """A SQLite database with the annotations of a corpus.
+
+    Args:
+        database: Path to the database file, which is created if it does not exist,
+            or ":memory:" for a temporary database.
+    """
+
+    def __init__(self, database: str | Path):
+        self.connection = sqlite3.connect(database)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        if str(database) != ":memory:":
+            self.connection.execute("PRAGMA journal_mode = WAL")
+            self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self) -> "AnnotationStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def add_poems(self, poems: Iterable[Mapping], batch_size: int = 1000) -> int:
+        """Insert the annotations of many poems, with a transaction per batch of poems.
+
+        Poems with the same `ID` as a poem in the store replace it.
+
+        Args:
+            poems: Poem annotations, e.g. from `parallel.process_poems` or `read_annotation_files`.
+            batch_size: The number of poems to insert in each transaction.
+
+        Returns:
+            The number of poems inserted.
+        """
+        (next_id,) = self.connection.execute("SELECT COALESCE(MAX(poem_id), 0) + 1 FROM poems").fetchone()
+        n_poems = 0
+        batch_ids = []
+        rows = {table: [] for table in INSERTS}
+        for annotations in poems:
+            if annotations.get("ID") is not None and annotations.get("ID") in batch_ids:
+                # A later version of a poem in the same batch replaces the earlier one
+                self._insert_batch(batch_ids, rows)
+                batch_ids = []
+                rows = {table: [] for table in INSERTS}
+            for table, row in poem_rows(next_id, annotations):
+                rows[table].append(row)
+            batch_ids.append(annotations.get("ID"))
+            next_id += 1
+            n_poems += 1
+            if len(batch_ids) >= batch_size:
+                self._insert_batch(batch_ids, rows)
+                batch_ids = []
+                rows = {table: [] for table in INSERTS}
+        if batch_ids:
+            self._insert_batch(batch_ids, rows)
+        return n_poems
+
+    def _insert_batch(self, poem_ids: list, rows: dict[str, list]) -> None:
+        with self.connection:
+            ids = [poem_id for poem_id in poem_ids if poem_id is not None]
+            self.connection.executemany("DELETE FROM poems WHERE id = ?", ((poem_id,) for poem_id in ids))
+            for table, statement in INSERTS.items():
+                self.connection.executemany(statement, rows[table])
+
+    def add_files(self, paths: Iterable[str | Path], batch_size: int = 1000) -> int:
+        """Insert the annotations in JSON or JSONL files, see `read_annotation_files`."""
+        return self.add_poems(read_annotation_files(paths), batch_size=batch_size)
+
+    def query(self, sql: str, parameters: Iterable = ()) -> list[tuple]:
+        """Run a SQL query on the store and return all the rows."""
+        return self.connection.execute(sql, tuple(parameters)).fetchall()
+
+    def count_poems(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM poems").fetchone()[0]
+
+    def find_poems(self, **conditions: str) -> list[str]:
+        """Return the IDs of the poems that match all the conditions.
+
+        Args:
+            rhyme_scheme: A stanza has this rhyme scheme, e.g. "abab".
+            alliteration: A line alliterates on this symbol, e.g. "s".
+            anaphora: A stanza has this anaphora, e.g. "jeg ser".
+            lyrical_subject: This lyrical subject category is present, e.g. "explicit_subject".
+            last_token: A verse ends with this word.
+        """
+        unknown = set(conditions) - set(FILTERS)
+        if unknown:
+            msg = f"Unknown conditions: {', '.join(sorted(unknown))}. Choose from: {', '.join(FILTERS)}"
+            raise ValueError(msg)
+        sql = "SELECT p.id FROM poems p"
+        if conditions:
+            sql += " WHERE " + " AND ".join(FILTERS[name] for name in conditions)
+        sql += " ORDER BY p.poem_id"
+        return [poem_id for (poem_id,) in self.query(sql, conditions.values())]
+
+    def find_stanzas(self, rhyme_scheme: str) -> list[tuple[str, int]]:
+        """Return the poem IDs and stanza numbers of all stanzas with a rhyme scheme."""
+        return self.query(
+            """SELECT p.id, s.stanza_id FROM stanzas s JOIN poems p USING (poem_id)
+            WHERE s.rhyme_scheme = ? ORDER BY s.poem_id, s.stanza_id""",
+            (rhyme_scheme,),
+        )
+
+    def rhyme_scheme_counts(self) -> Counter:
+        """Count the stanzas with each rhyme scheme."""
+        return Counter(
+            dict(self.query("SELECT rhyme_scheme, COUNT(*) FROM stanzas GROUP BY rhyme_scheme ORDER BY rhyme_scheme"))
+        )
+
+    def alliteration_symbol_counts(self) -> Counter:
+        """Count the alliterating lines with each symbol."""
+        return Counter(dict(self.query("SELECT symbol, COUNT(*) FROM alliterations GROUP BY symbol ORDER BY symbol")))
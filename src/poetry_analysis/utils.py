@@ -1,11 +1,18 @@
-import json
+import functools
+import io
+import os
 import re
 import string
-from collections.abc import Callable, Generator
+import threading
+from collections.abc import Callable, Generator, Iterable
+from itertools import pairwise
 from pathlib import Path
+from typing import IO, TYPE_CHECKING, NamedTuple
 
-from convert_pa import nofabet_to_ipa, nofabet_to_syllables
-from nb_tokenizer import tokenize
+if TYPE_CHECKING:
+    import numpy as np
+
+from poetry_analysis import instrumentation, serialization
 
 PUNCTUATION_MARKS = str(
     string.punctuation + "‒.,!€«»’”—⁷⁶⁰–‒––!”-?‒"
@@ -18,6 +25,7 @@ VALID_NUCLEI = [
     "ou",
     "ei",
     "øy",
+    "øi",
     "ai",
     "oi",
     "au",
@@ -32,6 +40,67 @@ VALID_NUCLEI = [
     "å",
 ]
 
+# Longest nuclei first, so that digraphs like "au" are matched as a single nucleus
+NUCLEUS_PATTERN = re.compile("|".join(sorted(VALID_NUCLEI, key=len, reverse=True)))
+
+VOWELS = "".join(nucleus for nucleus in VALID_NUCLEI if len(nucleus) == 1)
+
+# A syllable of a lowercase orthographic text: a vowel nucleus, or a whole word without one, like "hm"
+ORTHOGRAPHIC_SYLLABLE_PATTERN = re.compile(rf"{NUCLEUS_PATTERN.pattern}|\b[^\W_{VOWELS}]+\b")
+
+CONSONANTS = frozenset("bcdfghjklmnpqrstvwxz")
+
+# Consonant clusters that can start a syllable in Norwegian orthography
+VALID_ONSET_CLUSTERS = frozenset(
+    {
+        "bj",
+        "bl",
+        "br",
+        "dr",
+        "dj",
+        "fl",
+        "fj",
+        "fr",
+        "gl",
+        "gr",
+        "gj",
+        "kj",
+        "kl",
+        "kr",
+        "kn",
+        "kv",
+        "pl",
+        "pj",
+        "pr",
+        "mj",
+        "nj",
+        "sj",
+        "sl",
+        "sm",
+        "sn",
+        "sp",
+        "st",
+        "sv",
+        "tr",
+        "tj",
+        "tl",
+        "vr",
+        "sk",
+        "skr",
+        "spr",
+        "str",
+        "skj",
+        "gn",
+        "hv",
+    }
+)
+
+# Maximum number of distinct words to keep in the syllabification cache
+SYLLABLE_CACHE_SIZE = 2**16
+
+# Maximum number of distinct lines to keep in the tokenization cache, 0 disables it
+TOKEN_CACHE_SIZE = int(os.environ.get("POETRY_ANALYSIS_TOKEN_CACHE_SIZE", 2**16))
+
 GRAMMATICAL_SUFFIXES = [
     "ene",
     "ane",
@@ -43,6 +112,14 @@ GRAMMATICAL_SUFFIXES = [
 ]
 
 
+def tokenize(text: str) -> list[str]:
+    """Split a text into tokens with `nb_tokenizer`, which is imported on first use."""
+    from nb_tokenizer import tokenize as nb_tokenize
+
+    with instrumentation.stage("tokenize"):
+        return nb_tokenize(text)
+
+
 def is_grammatical_suffix(string: str) -> bool:
     return string in GRAMMATICAL_SUFFIXES
 
@@ -64,37 +141,121 @@ def is_punctuation(char: str) -> bool:
     return char in PUNCTUATION_MARKS
 
 
+WHITESPACE = re.compile(r"\s+")
+WHITESPACE_WITHIN_LINE = re.compile(r"[^\S\n]+")
+STRESS_MARKERS = "0123"
+# The stress marker that ends each syllable nucleus in a Nofabet transcription
+NUCLEUS_STRESS_PATTERN = re.compile(rf"[{STRESS_MARKERS}](?=\s|$)")
+PUNCTUATION_TABLE = str.maketrans("", "", PUNCTUATION_MARKS)
+
+# Historical spellings that can be folded into their modern forms
+HISTORICAL_SPELLINGS = {
+    "aa": "å",
+}
+
+
 def strip_redundant_whitespace(text: str) -> str:
     """Strip redundant whitespace and reduce it to a single space."""
-    return re.sub(r"\s+", " ", text).strip()
+    return WHITESPACE.sub(" ", text).strip()
 
 
 def strip_punctuation(string: str) -> str:
     """Remove punctuation from a string"""
-    alphanumstr = ""
-    for char in string:
-        if not is_punctuation(char):
-            alphanumstr += char
-    return strip_redundant_whitespace(alphanumstr)
+    return strip_redundant_whitespace(string.translate(PUNCTUATION_TABLE))
+
+
+class TextNormalizer:
+    """Normalize text with precompiled translation tables and regular expressions.
+
+    Args:
+        case: "lower" or "casefold" to convert the text to lowercase, or None to keep the case.
+        strip_punctuation: If True, remove the characters in `PUNCTUATION_MARKS`.
+        strip_stress: If True, remove the Nofabet stress markers 0, 1, 2 and 3.
+        fold_spelling: If True, replace the historical spellings in `HISTORICAL_SPELLINGS`
+            with their modern forms, e.g. "aa" with "å". A custom mapping can also be given.
+
+    Examples:
+        >>> normalizer = TextNormalizer(fold_spelling=True)
+        >>> normalizer.normalize("Jeg ser paa den  hvide himmel,")
+        'jeg ser på den hvide himmel'
+        >>> normalizer.normalize_many(["Aase!", "Straale saa smukt"])
+        ['åse', 'stråle så smukt']
+    """
+
+    def __init__(
+        self,
+        case: str | None = "lower",
+        strip_punctuation: bool = True,
+        strip_stress: bool = False,
+        fold_spelling: bool | dict[str, str] = False,
+    ):
+        if case not in ("lower", "casefold", None):
+            msg = f"Invalid case conversion {case!r}. Use 'lower', 'casefold' or None."
+            raise ValueError(msg)
+        self.case = case
+        deleted_characters = (PUNCTUATION_MARKS if strip_punctuation else "") + (STRESS_MARKERS if strip_stress else "")
+        self.table = str.maketrans("", "", deleted_characters)
+
+        spellings = HISTORICAL_SPELLINGS if fold_spelling is True else (fold_spelling or {})
+        self.spellings = {}
+        for old, new in spellings.items():
+            self.spellings.update({old: new, old.capitalize(): new.capitalize(), old.upper(): new.upper()})
+        self.spelling_pattern = (
+            re.compile("|".join(re.escape(old) for old in sorted(self.spellings, key=len, reverse=True)))
+            if self.spellings
+            else None
+        )
+
+    def _convert(self, text: str) -> str:
+        if self.case == "lower":
+            text = text.lower()
+        elif self.case == "casefold":
+            text = text.casefold()
+        text = text.translate(self.table)
+        if self.spelling_pattern is not None:
+            text = self.spelling_pattern.sub(lambda match: self.spellings[match.group()], text)
+        return text
+
+    def normalize(self, text: str) -> str:
+        """Normalize a string and reduce all whitespace to single spaces."""
+        return strip_redundant_whitespace(self._convert(text))
+
+    def normalize_many(self, lines: Iterable[str]) -> list[str]:
+        """Normalize many lines at once, e.g. a whole stanza or poem.
+
+        The lines are joined and converted in a single pass over the text.
+        """
+        lines = list(lines)
+        text = "\n".join(lines)
+        if text.count("\n") != len(lines) - 1:
+            # Some lines contain line breaks themselves
+            return [self.normalize(line) for line in lines]
+        text = WHITESPACE_WITHIN_LINE.sub(" ", self._convert(text))
+        return [line.strip() for line in text.split("\n")] if lines else []
+
+
+COMPARABLE_STRING_NORMALIZER = TextNormalizer(case="casefold", strip_stress=True)
+TOKEN_NORMALIZER = TextNormalizer(case="lower")
 
 
 def make_comparable_string(item: list | str) -> str:
     """Convert a list of strings into a single comparable string."""
     string = " ".join(item) if isinstance(item, list) else str(item)
-    string = strip_punctuation(string)
-    string = re.sub(r"[0123]", "", string)  # remove stress markers
-    return string.casefold()
+    return COMPARABLE_STRING_NORMALIZER.normalize(string)
 
 
 def convert_to_syllables(phonemes: str | list, ipa: bool = False) -> list:
     """Turn a sequence of phonemes into syllable groups."""
+    from convert_pa import nofabet_to_ipa, nofabet_to_syllables
+
     transcription = phonemes if isinstance(phonemes, str) else " ".join(phonemes)
-    if ipa:
-        ipa_str = nofabet_to_ipa(transcription)
-        syllables = ipa_str.split(".")
-    else:
-        nofabet_syllables = nofabet_to_syllables(transcription)
-        syllables = [" ".join(syll) for syll in nofabet_syllables]
+    with instrumentation.stage("syllabify"):
+        if ipa:
+            ipa_str = nofabet_to_ipa(transcription)
+            syllables = ipa_str.split(".")
+        else:
+            nofabet_syllables = nofabet_to_syllables(transcription)
+            syllables = [" ".join(syll) for syll in nofabet_syllables]
     return syllables
 
 
@@ -108,115 +269,154 @@ def syllabify(transcription: list[list]) -> list:
     return syllables
 
 
-def split_orthographic_text_into_syllables(words: list[str]) -> list:
-    """
-    WORK IN PROGRESS
-    Split orthographic text into syllables using basic rules.
-    This is a simplified implementation and may not handle all edge cases.
+def split_orthographic_text_into_syllables(words: Iterable[str]) -> list[list[str]]:
+    """Split orthographic words into syllables.
 
     Args:
-        words (list of str): A list of orthographic words, already tokenized
+        words: Orthographic words, already tokenized
 
     Returns:
-        list: A list of syllables for each word in the text.
+        A list of syllables for each word.
+
+    Examples:
+        >>> split_orthographic_text_into_syllables(["Straale", "saa", "smukt"])
+        [['Straa', 'le'], ['saa'], ['smukt']]
     """
-    syllables = []
+    return [list(_syllabify_orthographic_word(word)) for word in words]
 
-    for word in words:
-        word_syllables = []
-        current_syllable = ""
 
-        for i, char in enumerate(word):
-            current_syllable += char
+def syllabify_orthographic_word(word: str) -> list[str]:
+    """Split an orthographic word into syllables.
 
-            # Check if the character is a vowel
-            if char in VALID_NUCLEI:
-                # Check if the next character could be part of the same nucleus
-                is_not_last = i + 1 < len(word)
-                if is_not_last and word[i + 1] in VALID_NUCLEI:
-                    continue
+    Each syllable has one nucleus, where digraphs like "au" and "ei" count as one nucleus.
+    The consonants between two nuclei start the next syllable if they form
+    a valid onset, otherwise as few of them as needed are moved to the end of
+    the previous syllable (the maximal onset principle).
 
-                # Check if the next character could be part of a valid onset
-                if is_not_last and word[i + 1] not in VALID_NUCLEI:
-                    consonant_cluster = char + word[i + 1]
-                    if len(consonant_cluster) > 1 and is_valid_onset(consonant_cluster):
-                        continue
+    Examples:
+        >>> syllabify_orthographic_word("vandrende")
+        ['van', 'dren', 'de']
+        >>> syllabify_orthographic_word("journalist")
+        ['jour', 'na', 'list']
+    """
+    return list(_syllabify_orthographic_word(word))
 
-                # Otherwise, split the syllable
-                word_syllables.append(current_syllable)
-                current_syllable = ""
 
-        # Add any remaining characters as a syllable
-        if current_syllable:
-            word_syllables.append(current_syllable)
+@functools.lru_cache(maxsize=SYLLABLE_CACHE_SIZE)
+def _syllabify_orthographic_word(word: str) -> tuple[str, ...]:
+    lowercase = word.lower()
+    if len(lowercase) != len(word):
+        word = lowercase
+    nuclei = [match.span() for match in NUCLEUS_PATTERN.finditer(lowercase)]
+    if len(nuclei) < 2:
+        return (word,) if word else ()
 
-        syllables.append(word_syllables)
+    boundaries = [0]
+    for (_, previous_end), (next_start, _) in pairwise(nuclei):
+        cluster = lowercase[previous_end:next_start]
+        onset_length = next((n for n in range(len(cluster), 0, -1) if is_valid_onset(cluster[-n:])), 0)
+        boundaries.append(next_start - onset_length)
+    boundaries.append(len(word))
+    return tuple(word[start:end] for start, end in pairwise(boundaries))
 
-    return syllables
 
+def count_orthographic_syllables(words: Iterable[str]) -> list[int]:
+    """Count the syllables in each of a list of orthographic words.
 
-def is_valid_onset(phonelist: str) -> bool:
+    Examples:
+        >>> count_orthographic_syllables(["Sydhimlens", "smukkeste", "Stjerne"])
+        [3, 3, 2]
     """
-    WORK IN PROGRESS
-    Check if a sequence of characters forms a valid onset in Norwegian orthography.
+    return [len(_syllabify_orthographic_word(word)) for word in words]
+
+
+def _transcription_string(verse: str | list[str]) -> str:
+    return verse if isinstance(verse, str) else " ".join(verse)
+
+
+def count_syllables(verse: str | list[str], orthographic: bool = False) -> int:
+    """Count the syllables in a verse without splitting it into syllables.
+
+    A Nofabet transcription has a syllable for each stress marker, and an orthographic verse
+    has a syllable for each vowel nucleus, where digraphs like "au" and "ei" count as one nucleus.
+    Like in `syllabify_orthographic_word`, a word without a vowel nucleus, like "hm", is one syllable.
+
+    Args:
+        verse: A Nofabet transcription or an orthographic text, as a string or a list of words.
+        orthographic: If True, the verse is orthographic, otherwise a Nofabet transcription.
+
+    Examples:
+        >>> count_syllables(["KJ OE2 P M AH0 N S B OO3 D", "S II1 N"])
+        4
+        >>> count_syllables("Svæve saa stille", orthographic=True)
+        5
+        >>> count_syllables("Hm, svæve", orthographic=True)
+        3
+    """
+    text = _transcription_string(verse)
+    if orthographic:
+        return len(ORTHOGRAPHIC_SYLLABLE_PATTERN.findall(text.lower()))
+    return len(NUCLEUS_STRESS_PATTERN.findall(text))
+
+
+def count_syllables_batch(verses: Iterable[str | list[str]], orthographic: bool = False) -> "np.ndarray":
+    """Count the syllables in each of many verses, see `count_syllables`.
+
+    The verses are joined into one string that is searched once, and the positions
+    of the nuclei are assigned to the verses with a binary search.
+
+    Examples:
+        >>> count_syllables_batch(["Svæve saa stille,", "", "Straale saa smukt"], orthographic=True)
+        array([5, 0, 4])
+    """
+    import numpy as np
+
+    texts = [_transcription_string(verse) for verse in verses]
+    if orthographic:
+        texts = [text.lower() for text in texts]
+    pattern = ORTHOGRAPHIC_SYLLABLE_PATTERN if orthographic else NUCLEUS_STRESS_PATTERN
+    joined = "\n".join(texts)
+    positions = np.fromiter((match.start() for match in pattern.finditer(joined)), dtype=np.int64)
+    # Each verse ends at the newline that separates it from the next verse
+    ends = np.cumsum(np.fromiter((len(text) + 1 for text in texts), dtype=np.int64, count=len(texts)))
+    return np.diff(np.searchsorted(positions, ends), prepend=0)
+
+
+def count_poem_syllables(text: str) -> list["np.ndarray"]:
+    """Count the syllables in each verse of each stanza of an orthographic poem.
+
+    Examples:
+        >>> count_poem_syllables("Svæve saa stille,\\nstraale saa smukt\\n\\nSvæve!")
+        [array([5, 4]), array([2])]
+    """
+    import numpy as np
+
+    stanzas = split_stanzas(text)
+    counts = count_syllables_batch((verse for stanza in stanzas for verse in stanza), orthographic=True)
+    return np.split(counts, np.cumsum([len(stanza) for stanza in stanzas])[:-1])
+
+
+def is_valid_onset(phonelist: str) -> bool:
+    """Check if a sequence of characters forms a valid onset in Norwegian orthography.
 
     Args:
         phonelist (str): A string representing the onset (e.g., "bl", "tr").
 
     Returns:
         bool: True if the onset is valid, False otherwise.
-    """
-    # Define valid single consonants and consonant clusters for Norwegian
-    valid_single_consonants = set("bcdfghjklmnpqrstvwxyz")
-    valid_clusters = {
-        "bj",
-        "bl",
-        "br",
-        "dr",
-        "dj",
-        "fl",
-        "fj",
-        "fr",
-        "gl",
-        "gr",
-        "gj",
-        "kj",
-        "kl",
-        "kr",
-        "kn",
-        "kv",
-        "pl",
-        "pj",
-        "pr",
-        "mj",
-        "nj",
-        "sj",
-        "sl",
-        "sm",
-        "sn",
-        "sp",
-        "st",
-        "sv",
-        "tr",
-        "tj",
-        "tl",
-        "vr",
-        "sk",
-        "skr",
-        "spr",
-        "str",
-        "skj",
-        "gn",
-        "hv",
-    }
 
-    if len(phonelist) == 1 and phonelist in valid_single_consonants:
-        return True
-
-    return phonelist in valid_clusters
+    Examples:
+        >>> is_valid_onset("str"), is_valid_onset("rt")
+        (True, False)
+    """
+    if len(phonelist) == 1:
+        return phonelist in CONSONANTS
+    return phonelist in VALID_ONSET_CLUSTERS
 
 
 def annotate_transcriptions(transcription: list) -> Generator:
+    from convert_pa import nofabet_to_ipa, nofabet_to_syllables
+
     for word, pronunciation in transcription:
         nofabet = format_transcription(pronunciation)
         yield {
@@ -254,39 +454,281 @@ def gather_stanza_annotations(func) -> Callable:
     return wrapper
 
 
+def _split_verses(stanza: str) -> list[str]:
+    return [verse.rstrip() for verse in stanza.rstrip().splitlines()]
+
+
 def split_stanzas(text: str) -> list:
     """Split a poem into stanzas and stanzas into verses."""
-    return [[verse.rstrip() for verse in stanza.rstrip().splitlines()] for stanza in re.split("\n{2,}", text) if stanza]
+    return [_split_verses(stanza) for stanza in re.split("\n{2,}", text) if stanza]
+
+
+def iter_stanzas(stream: IO, encoding: str = "utf-8") -> Generator[list[str], None, None]:
+    """Read a poem or a book from a file handle, and yield each stanza as a list of verses
+    as soon as the blank line after it has been read.
+
+    The stanzas are the same as `split_stanzas` gives for the whole text,
+    but only one stanza is kept in memory at a time.
+
+    Args:
+        stream: A text file handle, or a binary stream which is decoded with `encoding`.
+        encoding: The encoding of binary streams.
+
+    Examples:
+        >>> import io
+        >>> stream = io.BytesIO("Svæve saa stille,\\nStraale saa smukt\\n\\n\\nSkue sørgmodigt\\n".encode())
+        >>> for stanza in iter_stanzas(stream):
+        ...     print(stanza)
+        ['Svæve saa stille,', 'Straale saa smukt']
+        ['Skue sørgmodigt']
+    """
+    text_stream = stream if isinstance(stream, io.TextIOBase) else io.TextIOWrapper(stream, encoding=encoding)
+    try:
+        stanza = [""]  # lines of the current stanza, without the line breaks between them
+        newlines = 0  # number of consecutive line breaks before the next line
+        for line in text_stream:
+            content = line.removesuffix("\n")
+            if content:
+                if newlines >= 2:
+                    # A stanza separator is complete when the next stanza starts
+                    if stanza_text := "\n".join(stanza):
+                        yield _split_verses(stanza_text)
+                    stanza = [content]
+                elif newlines == 1:
+                    stanza.append(content)
+                else:
+                    stanza[-1] += content
+                newlines = 0
+            if line.endswith("\n"):
+                newlines += 1
+        if newlines == 1:
+            stanza.append("")
+        if stanza_text := "\n".join(stanza):
+            yield _split_verses(stanza_text)
+    finally:
+        if text_stream is not stream:
+            # Leave the binary stream open for the caller
+            text_stream.detach()
+
+
+STANZA_SEPARATOR = re.compile("\n{2,}")
+
+
+def split_stanza_spans(text: str) -> list[list[tuple[int, int]]]:
+    """Split a poem into stanzas and verses like `split_stanzas`,
+    but return the (start, end) character offsets of each verse instead of a copy.
+
+    Examples:
+        >>> text = "Svæve saa stille,\\nStraale saa smukt\\n\\nSkue sørgmodigt"
+        >>> spans = split_stanza_spans(text)
+        >>> spans
+        [[(0, 17), (18, 35)], [(37, 52)]]
+        >>> [[text[start:end] for start, end in stanza] for stanza in spans] == split_stanzas(text)
+        True
+    """
+    stanza_spans = []
+    stanza_start = 0
+    separators = [(match.start(), match.end()) for match in STANZA_SEPARATOR.finditer(text)]
+    for stanza_end, next_start in [*separators, (len(text), len(text))]:
+        if stanza_end > stanza_start:
+            stanza = text[stanza_start:stanza_end].rstrip()
+            verse_spans = []
+            position = stanza_start
+            for line in stanza.splitlines(keepends=True):
+                verse_spans.append((position, position + len(line.rstrip())))
+                position += len(line)
+            stanza_spans.append(verse_spans)
+        stanza_start = next_start
+    return stanza_spans
+
+
+def _normalize(text: str) -> tuple[str, ...]:
+    return tuple(tokenize(TOKEN_NORMALIZER.normalize(text)))
+
+
+# Whether the last lookup in the tokenization cache in each thread was a miss
+_token_cache_lookup = threading.local()
+
+
+def _normalize_on_miss(text: str) -> tuple[str, ...]:
+    _token_cache_lookup.missed = True
+    return _normalize(text)
+
+
+_cached_normalize = functools.lru_cache(maxsize=TOKEN_CACHE_SIZE)(_normalize_on_miss)
+_token_cache_enabled = TOKEN_CACHE_SIZE > 0
 
 
 def normalize(text: str) -> list[str]:
-    """Lowercase, remove punctuation and tokenize a string of text."""
-    lowercase = text.strip().lower()
-    alpanumeric_only = strip_punctuation(lowercase)
-    words = tokenize(alpanumeric_only)
-    return words
+    """Lowercase, remove punctuation and tokenize a string of text.
 
+    The tokens of each distinct line are kept in a bounded LRU cache,
+    since refrains and repeated lines are tokenized by several extractors.
+    """
+    if not _token_cache_enabled:
+        return list(_normalize(text))
+    if instrumentation.enabled:
+        _token_cache_lookup.missed = False
+        tokens = list(_cached_normalize(text))
+        instrumentation.count("token_cache.misses" if _token_cache_lookup.missed else "token_cache.hits")
+        return tokens
+    return list(_cached_normalize(text))
 
-def annotate(func, text: str, stanzaic: bool = False, outputfile: str | Path | None = None):
-    if stanzaic:
-        new_func = gather_stanza_annotations(func)
-        annotations = new_func(text)
-    else:
-        annotations = func(text)
+
+def normalize_with_spans(text: str, offset: int = 0) -> tuple[list[str], list[tuple[int, int]]]:
+    """Normalize and tokenize a text like `normalize`, and also return
+    the (start, end) character offsets of each token in the original text.
+
+    Args:
+        text: The text to tokenize.
+        offset: Position of the text in a larger buffer, e.g. a whole poem,
+            which is added to the offsets.
+
+    Examples:
+        >>> text = "Kjærligheden - kjendte du dens glød?"
+        >>> tokens, spans = normalize_with_spans(text)
+        >>> tokens
+        ['kjærligheden', 'kjendte', 'du', 'dens', 'glød']
+        >>> text[spans[-1][0] : spans[-1][1]]
+        'glød'
+    """
+    from nb_tokenizer import regex as token_pattern
+
+    characters = []
+    origins = []
+    pending_space = False
+    lowercase = text.lower()
+    if len(lowercase) != len(text):
+        lowercase = "".join(char.lower() if len(char.lower()) == 1 else char for char in text)
+    for position, char in enumerate(lowercase):
+        if char in PUNCTUATION_MARKS:
+            continue
+        if char.isspace():
+            pending_space = bool(characters)
+            continue
+        if pending_space:
+            characters.append(" ")
+            origins.append(position)
+            pending_space = False
+        characters.append(char)
+        origins.append(position)
+
+    normalized = "".join(characters)
+    tokens = []
+    spans = []
+    for match in token_pattern.finditer(normalized):
+        tokens.append(match.group())
+        spans.append((origins[match.start()] + offset, origins[match.end() - 1] + 1 + offset))
+    return tokens, spans
+
+
+def normalize_many(lines: Iterable[str]) -> list[list[str]]:
+    """Lowercase, remove punctuation and tokenize each line in a sequence of lines.
+
+    Each line is looked up in the tokenization cache like in `normalize`.
+    When the cache is disabled, the lines are normalized together in a single pass.
+
+    Examples:
+        >>> normalize_many(["Sees Sirius,", "Sydhimlens smukkeste"])
+        [['sees', 'sirius'], ['sydhimlens', 'smukkeste']]
+    """
+    if _token_cache_enabled:
+        return [normalize(line) for line in lines]
+    return [tokenize(line) for line in TOKEN_NORMALIZER.normalize_many(lines)]
+
+
+def configure_token_cache(maxsize: int | None = None, enabled: bool | None = None) -> None:
+    """Resize, enable or disable the tokenization cache used by `normalize`.
+
+    Resizing the cache clears it.
+    """
+    global _cached_normalize, _token_cache_enabled
+    if maxsize is not None:
+        _cached_normalize = functools.lru_cache(maxsize=maxsize)(_normalize_on_miss)
+        _token_cache_enabled = maxsize > 0
+    if enabled is not None:
+        _token_cache_enabled = enabled
+
+
+class TokenCacheInfo(NamedTuple):
+    """Statistics of the tokenization cache used by `normalize`."""
+
+    hits: int
+    misses: int
+    maxsize: int | None
+    currsize: int
+
+
+def token_cache_info() -> TokenCacheInfo:
+    """Return the hits, misses, maximum size and current size of the tokenization cache.
+
+    Examples:
+        >>> clear_token_cache()
+        >>> _ = normalize("Sees Sirius"), normalize("Sees Sirius")
+        >>> token_cache_info().hits, token_cache_info().currsize
+        (1, 1)
+    """
+    return TokenCacheInfo(*_cached_normalize.cache_info())
+
+
+def clear_token_cache() -> None:
+    """Remove all lines from the tokenization cache and reset its statistics."""
+    _cached_normalize.cache_clear()
+
+
+def warm_token_cache(lines: Iterable[str]) -> None:
+    """Tokenize lines ahead of time, e.g. as the initializer of a worker process."""
+    for line in lines:
+        normalize(line)
+
+
+def annotate(
+    func,
+    text: str,
+    stanzaic: bool = False,
+    outputfile: str | Path | None = None,
+    backend: str = "auto",
+    pretty: bool = False,
+):
+    """Apply an extractor to a text, and save the annotations to a file if given.
+
+    Args:
+        func: The extractor to apply.
+        text: The poem text.
+        stanzaic: If True, apply the extractor to each stanza separately.
+        outputfile: Where to save the annotations. If None, they are returned instead.
+        backend: The serialization backend, see `poetry_analysis.serialization`.
+        pretty: If True, indent the JSON output.
+    """
+    with instrumentation.stage("analyze"):
+        if stanzaic:
+            new_func = gather_stanza_annotations(func)
+            annotations = new_func(text)
+        else:
+            annotations = func(text)
     if outputfile is not None:
-        Path(outputfile).write_text(json.dumps(annotations, indent=4, ensure_ascii=False), encoding="utf-8")
+        with instrumentation.stage("serialize"):
+            serialized = serialization.dumps(annotations, backend=backend, pretty=pretty)
+        with instrumentation.stage("write"):
+            Path(outputfile).write_bytes(serialized)
         print(f"Saved annotated data to {outputfile}")
     else:
         return annotations
 
 
-def save_annotations(annotations: dict | list, outputfile: str | Path | None = None):
+def save_annotations(
+    annotations: dict | list,
+    outputfile: str | Path | None = None,
+    backend: str = "auto",
+    pretty: bool = False,
+) -> Path:
+    """Save annotations to a file, by default with a timestamped name in the current directory."""
     if outputfile is None:
         import time
 
-        outputfile = f"annotations_{int(time.time())}.json"
+        outputfile = f"annotations_{int(time.time())}{serialization.suffix(backend)}"
 
-    Path(outputfile).write_text(json.dumps(annotations, indent=4, ensure_ascii=False), encoding="utf-8")
+    return serialization.dump(annotations, outputfile, backend=backend, pretty=pretty)
 
 
 def group_consecutive_numbers(nums: list[int]) -> list[list[int]]:
@@ -0,0 +1,25 @@
+from poetry_analysis.alliteration import extract_poem_alliterations
+
+
+def test_extract_poem_alliterations_annotates_stanza_and_line(example_poem_landsmaal):
+    result = extract_poem_alliterations(example_poem_landsmaal)
+    assert result == [
+        {"stanza_id": 2, "line_id": 0, "symbol": "n", "count": 2, "words": ["nyreist", "norig"]},
+        {"stanza_id": 2, "line_id": 2, "symbol": "h", "count": 2, "words": ["hovding", "hæv"]},
+        {"stanza_id": 2, "line_id": 3, "symbol": "t", "count": 2, "words": ["tufti", "tryggjande"]},
+    ]
+
+
+def test_extract_poem_alliterations_skips_empty_lines():
+    result = extract_poem_alliterations("\nSvæve saa stille")
+    assert result[0]["line_id"] == 1
+
+
+def test_extract_poem_alliterations_with_offsets(example_poem_landsmaal):
+    expected = extract_poem_alliterations(example_poem_landsmaal)
+    result = extract_poem_alliterations(example_poem_landsmaal, offsets=True)
+    assert [annotation["symbol"] for annotation in result] == [annotation["symbol"] for annotation in expected]
+    for annotation, expected_annotation in zip(result, expected, strict=True):
+        words = [example_poem_landsmaal[start:end].lower() for start, end in annotation["spans"]]
+        assert words == expected_annotation["words"]
+        assert "words" not in annotation
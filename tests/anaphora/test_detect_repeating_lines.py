@@ -7,3 +7,12 @@ def test_detect_repeating_lines_returns_both_linenumber_and_full_line():
     assert result == [
         ([0, 2], "Idag er en fin dag"),
     ]
+
+
+def test_detect_repeating_lines_finds_repetitions_across_stanzas_in_order():
+    text = "Hei på deg\nIdag er en fin dag\n\nHei på deg\nbladibladibla\nIdag er en fin dag\nHei på deg\n"
+    result = detect_repeating_lines(text)
+    assert result == [
+        ([0, 2, 5], "Hei på deg"),
+        ([1, 4], "Idag er en fin dag"),
+    ]
@@ -0,0 +1,35 @@
+from benchmarks.corpus import CorpusConfig, build_vocabulary, generate_corpus, generate_transcribed_corpus
+from poetry_analysis import rhyme_detection, utils
+
+CONFIG = CorpusConfig(n_poems=3, stanzas_per_poem=2, lines_per_stanza=4, vocabulary_size=300)
+
+
+def test_generate_corpus_is_reproducible_with_the_same_seed():
+    assert generate_corpus(CONFIG) == generate_corpus(CONFIG)
+    assert generate_transcribed_corpus(CONFIG) == generate_transcribed_corpus(CONFIG)
+
+
+def test_generate_corpus_differs_with_another_seed():
+    other_config = CorpusConfig(n_poems=3, stanzas_per_poem=2, lines_per_stanza=4, vocabulary_size=300, seed=1)
+    assert generate_corpus(CONFIG) != generate_corpus(other_config)
+
+
+def test_generate_corpus_has_the_configured_shape():
+    corpus = generate_corpus(CONFIG)
+    assert len(corpus) == CONFIG.n_poems
+    for poem in corpus:
+        stanzas = utils.split_stanzas(poem)
+        assert len(stanzas) == CONFIG.stanzas_per_poem
+        assert all(len(stanza) == CONFIG.lines_per_stanza for stanza in stanzas)
+
+
+def test_generate_transcribed_corpus_can_be_split_into_stanzas():
+    for poem in generate_transcribed_corpus(CONFIG):
+        stanzas = rhyme_detection.get_stanzas_from_transcription(poem)
+        assert len(stanzas) == CONFIG.stanzas_per_poem
+        assert all(len(stanza) == CONFIG.lines_per_stanza for stanza in stanzas)
+
+
+def test_build_vocabulary_has_the_requested_size():
+    assert len(build_vocabulary(50)) == 50
+    assert len(build_vocabulary(1000)) == 1000
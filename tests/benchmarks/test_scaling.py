@@ -0,0 +1,41 @@
+import pytest
+
+from benchmarks import scaling
+
+
+@pytest.mark.parametrize("exponent", [1, 1.5, 2, 3])
+def test_fit_exponent_recovers_the_exponent_of_a_power_law(exponent):
+    sizes = [10, 20, 40, 80]
+    timings = [0.001 * size**exponent for size in sizes]
+    assert scaling.fit_exponent(sizes, timings) == pytest.approx(exponent)
+
+
+def test_run_scaling_reports_the_exponent_and_budget_of_each_case():
+    results = scaling.run_scaling(["detect_repeating_lines"], repeat=1)
+    result = results["detect_repeating_lines"]
+    assert result["sizes"] == list(scaling.CASES["detect_repeating_lines"].sizes)
+    assert len(result["timings"]) == len(result["sizes"])
+    assert result["within_budget"] == (result["exponent"] <= result["budget"])
+
+
+def count_triples(size: int) -> int:
+    return sum(1 for _ in range(size) for _ in range(size) for _ in range(size))
+
+
+def test_super_quadratic_case_is_over_budget(monkeypatch):
+    cubic = scaling.ScalingCase(
+        run=count_triples,
+        make_input=lambda size, rng: size,
+        sizes=(20, 40, 80, 160),
+        budget=2.3,
+        known_failure="Counts every triple of numbers",
+    )
+    monkeypatch.setitem(scaling.CASES, "count_triples", cubic)
+    results = scaling.run_scaling(["count_triples"], repeat=3)
+    assert results["count_triples"]["exponent"] > cubic.budget
+    assert scaling.over_budget(results) == ["count_triples"]
+
+
+def test_known_quadratic_cases_have_a_budget_below_cubic():
+    for case in scaling.CASES.values():
+        assert case.budget < 3 if case.known_failure else case.budget < 2
@@ -0,0 +1,173 @@
+import io
+import json
+
+import pytest
+
+from poetry_analysis import cli
+
+
+@pytest.fixture
+def poem_dir(tmp_path, example_poem_riksmaal, poem_with_anaphore):
+    poems = tmp_path / "poems"
+    poems.mkdir()
+    (poems / "1_riksmaal.txt").write_text(example_poem_riksmaal, encoding="utf-8")
+    (poems / "2_anaphora.txt").write_text(poem_with_anaphore, encoding="utf-8")
+    (poems / "more.jsonl").write_text(
+        json.dumps({"ID": "3", "URN": "urn_3", "textV3": "Jeg ser paa dig"}) + "\n", encoding="utf-8"
+    )
+    (poems / "notes.md").write_text("Not a poem", encoding="utf-8")
+    return poems
+
+
+def read_jsonl(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_main_annotates_all_poems_in_a_directory(poem_dir, tmp_path):
+    output = tmp_path / "annotations.jsonl"
+    exit_code = cli.main(["all", str(poem_dir), "--format", "jsonl", "-o", str(output)])
+    assert exit_code == 0
+    annotations = read_jsonl(output)
+    assert [item["ID"] for item in annotations] == ["1_riksmaal", "2_anaphora", "3"]
+    assert annotations[2]["URN"] == "urn_3"
+    for item in annotations:
+        assert set(cli.SUBCOMMANDS["all"]) <= set(item)
+
+
+def test_main_expands_glob_patterns(poem_dir, tmp_path):
+    output = tmp_path / "anaphora.json"
+    cli.main(["anaphora", str(poem_dir / "*.txt"), "-o", str(output)])
+    annotations = json.loads(output.read_text(encoding="utf-8"))
+    assert [item["ID"] for item in annotations] == ["1_riksmaal", "2_anaphora"]
+    assert set(annotations[0]) == {"ID", "anaphora"}
+
+
+def test_main_reads_a_poem_from_stdin(monkeypatch, capsys):
+    monkeypatch.setattr("sys.stdin", io.StringIO("Jeg ser paa dig"))
+    cli.main(["lyrical-subject"])
+    annotations = json.loads(capsys.readouterr().out)
+    assert annotations == [
+        {
+            "ID": "stdin",
+            "lyrical_subject": {"explicit_subject": True, "explicit_object": False, "implicit": True, "deixis": False},
+        }
+    ]
+
+
+def test_json_output_is_compact_unless_pretty(poem_dir, tmp_path):
+    compact, pretty = tmp_path / "compact.json", tmp_path / "pretty.json"
+    cli.main(["anaphora", str(poem_dir), "-o", str(compact)])
+    cli.main(["anaphora", str(poem_dir), "-o", str(pretty), "--pretty"])
+    assert compact.read_text(encoding="utf-8").count("\n") == 1
+    assert pretty.read_text(encoding="utf-8").startswith("[\n  {")
+    assert json.loads(compact.read_text(encoding="utf-8")) == json.loads(pretty.read_text(encoding="utf-8"))
+
+
+def test_main_reuses_cached_annotations(poem_dir, tmp_path):
+    cache_dir = tmp_path / "cache"
+    first, second = tmp_path / "first.jsonl", tmp_path / "second.jsonl"
+    cli.main(["rhyme", str(poem_dir), "--format", "jsonl", "-o", str(first), "--cache-dir", str(cache_dir)])
+    cached_files = list(cache_dir.rglob("*.json"))
+    assert len(cached_files) == 3
+
+    # Cached annotations are returned as they are, without analysing the poem again
+    for cached_file in cached_files:
+        cached_file.write_text('"from cache"', encoding="utf-8")
+    cli.main(["rhyme", str(poem_dir), "--format", "jsonl", "-o", str(second), "--cache-dir", str(cache_dir)])
+    assert [item["rhyme"] for item in read_jsonl(second)] == ["from cache"] * 3
+    assert [item["ID"] for item in read_jsonl(second)] == [item["ID"] for item in read_jsonl(first)]
+
+
+def test_main_runs_in_several_processes(poem_dir, tmp_path):
+    serial, parallel = tmp_path / "serial.json", tmp_path / "parallel.json"
+    cli.main(["alliteration", str(poem_dir), "-o", str(serial)])
+    cli.main(["alliteration", str(poem_dir), "-o", str(parallel), "--jobs", "2"])
+    assert json.loads(serial.read_text(encoding="utf-8")) == json.loads(parallel.read_text(encoding="utf-8"))
+
+
+def test_main_reports_missing_inputs(tmp_path, capsys):
+    exit_code = cli.main(["rhyme", str(tmp_path / "missing.txt")])
+    assert exit_code == 1
+    assert "missing.txt" in capsys.readouterr().err
+
+
+def test_parquet_output_requires_an_output_file():
+    with pytest.raises(SystemExit):
+        cli.main(["rhyme", "--format", "parquet"])
+
+
+@pytest.fixture
+def transcription_file(tmp_path):
+    transcription = {
+        "text_id": "7",
+        "line_0": [["Ensom", "EE2 N S AH0 M"], ["stod", "S T OO1 D"]],
+        "line_1": [["ved", "V EE1"], ["flod", "F L OO1 D"]],
+    }
+    path = tmp_path / "7_transcription.json"
+    path.write_text(json.dumps(transcription), encoding="utf-8")
+    return path
+
+
+def test_main_tags_rhymes_in_transcription_files(transcription_file, tmp_path):
+    output = tmp_path / "rhyme.json"
+    exit_code = cli.main(["rhyme", str(transcription_file), "-o", str(output)])
+    assert exit_code == 0
+    (annotations,) = json.loads(output.read_text(encoding="utf-8"))
+    assert annotations["ID"] == "7"
+    assert annotations["rhyme"][0]["rhyme_scheme"] == "aa"
+
+
+def test_main_skips_extractors_without_transcription_support(transcription_file, tmp_path, caplog):
+    (tmp_path / "1_poem.txt").write_text("Jeg ser paa dig", encoding="utf-8")
+    output = tmp_path / "all.jsonl"
+    exit_code = cli.main(["all", str(tmp_path), "--format", "jsonl", "-o", str(output)])
+    assert exit_code == 0
+    poem, transcription = read_jsonl(output)
+    assert set(cli.SUBCOMMANDS["all"]) <= set(poem)
+    assert transcription["rhyme"][0]["rhyme_scheme"] == "aa"
+    assert not {"alliteration", "anaphora", "lyrical_subject"} & set(transcription)
+    assert [record.levelname for record in caplog.records] == ["WARNING"]
+    assert "Nofabet transcriptions" in caplog.text
+
+
+def test_cached_annotations_run_one_pool_per_batch(monkeypatch, poem_dir, tmp_path):
+    from poetry_analysis import parallel
+
+    calls = []
+    original_process_poems = parallel.process_poems
+
+    def process_poems(poems, extractors, **kwargs):
+        calls.append(list(extractors))
+        return original_process_poems(poems, extractors, **kwargs)
+
+    monkeypatch.setattr(parallel, "process_poems", process_poems)
+    poems = list(cli.read_poems([str(poem_dir)]))
+    cache_dir = tmp_path / "cache"
+    list(cli.annotate_poems(poems, ["rhyme"], jobs=1, cache_dir=cache_dir))
+    calls.clear()
+    annotations = list(cli.annotate_poems(poems, cli.SUBCOMMANDS["all"], jobs=1, cache_dir=cache_dir))
+    assert calls == [["alliteration", "anaphora", "lyrical_subject"]]
+    assert all(set(cli.SUBCOMMANDS["all"]) <= set(item) for item in annotations)
+
+
+def test_main_reports_poems_without_text_field(tmp_path, capsys):
+    poems = tmp_path / "poems.jsonl"
+    poems.write_text(json.dumps({"ID": "1", "text": "Jeg ser paa dig"}) + "\n", encoding="utf-8")
+    exit_code = cli.main(["rhyme", str(poems)])
+    assert exit_code == 1
+    assert "'textV3'" in capsys.readouterr().err
+
+
+def test_cached_annotations_are_streamed(tmp_path):
+    read = []
+
+    def poems():
+        for n in range(5):
+            read.append(n)
+            yield {"ID": str(n), "textV3": f"Jeg ser {n}"}
+
+    annotations = cli.annotate_poems(poems(), ["anaphora"], jobs=1, cache_dir=tmp_path, batch_size=2)
+    first = next(iter(annotations))
+    assert first["ID"] == "0"
+    assert read == [0, 1]
+    assert [item["ID"] for item in annotations] == ["1", "2", "3", "4"]
@@ -0,0 +1,78 @@
+import json
+from collections import Counter
+
+import pytest
+
+from poetry_analysis.alliteration import find_line_alliterations
+from poetry_analysis.corpus_statistics import CorpusStatistics, collect_statistics
+from poetry_analysis.parallel import process_poems
+
+
+@pytest.fixture
+def annotations(example_poem_landsmaal, example_poem_riksmaal, poem_with_anaphore, poem_with_alliteration):
+    texts = [example_poem_landsmaal, example_poem_riksmaal, poem_with_anaphore, poem_with_alliteration]
+    return list(process_poems(texts, jobs=1))
+
+
+def test_collect_statistics_counts_annotations(annotations):
+    statistics = collect_statistics(annotations)
+
+    stanzas = [stanza for poem in annotations for stanza in poem["rhyme"]]
+    scores = [verse["rhyme_score"] for stanza in stanzas for verse in stanza["verses"]]
+    assert statistics.poems == len(annotations)
+    assert statistics.rhyme_schemes == Counter(stanza["rhyme_scheme"] for stanza in stanzas)
+    assert statistics.verses == len(scores)
+    assert statistics.nodrim_verses == scores.count(0.5)
+    assert statistics.rhyming_verses == sum(score > 0 for score in scores)
+    assert statistics.alliteration_symbols == Counter(
+        group["symbol"] for poem in annotations for group in poem["alliteration"]
+    )
+    assert statistics.anaphora_lengths == Counter(item["count"] for poem in annotations for item in poem["anaphora"])
+    assert statistics.lyrical_subjects["deixis"] == sum(poem["lyrical_subject"]["deixis"] for poem in annotations)
+
+
+@pytest.mark.parametrize("n_shards", [1, 2, 3])
+def test_merged_shards_equal_whole_corpus(annotations, n_shards):
+    shards = [collect_statistics(annotations[i::n_shards]) for i in range(n_shards)]
+
+    merged = sum(shards, CorpusStatistics())
+
+    assert merged == collect_statistics(annotations)
+    assert shards[0] == collect_statistics(annotations[::n_shards]), "Adding must not change the shards"
+
+
+def test_statistics_survive_json_round_trip(annotations):
+    statistics = collect_statistics(annotations)
+
+    restored = CorpusStatistics.from_dict(json.loads(json.dumps(statistics.dict)))
+
+    assert restored == statistics
+    assert restored.nodrim_rate == statistics.nodrim_rate
+
+
+def test_update_alliteration_accepts_line_word_groups():
+    statistics = CorpusStatistics()
+
+    statistics.update_alliteration(find_line_alliterations("Svæve saa stille, mens maanen mørkner"))
+
+    assert statistics.alliteration_symbols == Counter({"s": 1, "m": 1})
+
+
+def test_update_alliteration_looks_up_the_symbol_of_word_offsets_in_the_text():
+    line = "Svæve saa stille, mens maanen mørkner"
+    statistics = CorpusStatistics()
+
+    statistics.update_alliteration(find_line_alliterations(line, offsets=True), text=line)
+
+    assert statistics.alliteration_symbols == Counter({"s": 1, "m": 1})
+
+
+def test_update_alliteration_needs_the_text_of_word_offsets():
+    groups = find_line_alliterations("Svæve saa stille", offsets=True)
+
+    with pytest.raises(ValueError, match="offsets"):
+        CorpusStatistics().update_alliteration(groups)
+
+
+def test_nodrim_rate_of_empty_statistics_is_zero():
+    assert CorpusStatistics().nodrim_rate == 0.0
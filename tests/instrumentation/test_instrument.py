@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+from poetry_analysis import instrumentation, utils
+from poetry_analysis.rhyme_detection import tag_poem_file
+
+
+@pytest.fixture
+def poem_file(tmp_path, example_poem_riksmaal):
+    filepath = tmp_path / "1_poem.txt"
+    filepath.write_text(example_poem_riksmaal, encoding="utf-8")
+    return filepath
+
+
+def test_instrument_times_the_stages_of_tag_poem_file(poem_file):
+    utils.clear_token_cache()
+    with instrumentation.instrument() as metrics:
+        tag_poem_file(poem_file, write_to_file=True)
+
+    for stage in ("tag", "serialize", "write", "tokenize"):
+        assert metrics.stages[stage].calls >= 1
+        assert metrics.stages[stage].total >= metrics.stages[stage].max >= 0
+    assert metrics.counters["rhyme.stanzas"] == len(utils.split_stanzas(poem_file.read_text(encoding="utf-8")))
+    assert metrics.counters["score_rhyme.calls"] > 0
+
+
+def test_instrument_counts_token_cache_hits_and_misses():
+    utils.clear_token_cache()
+    with instrumentation.instrument() as metrics:
+        for line in ["Sees Sirius", "Sydhimlens smukkeste", "Sees Sirius"]:
+            utils.normalize(line)
+    assert metrics.counters["token_cache.hits"] == 1
+    assert metrics.counters["token_cache.misses"] == 2
+    assert metrics.stages["tokenize"].calls == 2
+
+
+def test_nothing_is_recorded_outside_instrument(poem_file):
+    with instrumentation.instrument() as metrics:
+        pass
+    assert not instrumentation.enabled
+    tag_poem_file(poem_file)
+    assert metrics.stages == {}
+    assert not metrics.counters
+
+
+def test_instrument_restores_the_previous_state_after_an_error():
+    with pytest.raises(ValueError), instrumentation.instrument():
+        raise ValueError
+    assert not instrumentation.enabled
+
+
+def test_metrics_are_exported_to_json_and_prometheus_files(tmp_path):
+    with instrumentation.instrument() as metrics, instrumentation.stage("tag"):
+        instrumentation.count("score_rhyme.calls", 4)
+
+    instrumentation.write_metrics(tmp_path / "metrics.json")
+    instrumentation.write_metrics(tmp_path / "metrics.prom")
+
+    exported = json.loads((tmp_path / "metrics.json").read_text(encoding="utf-8"))
+    assert exported["stages"]["tag"]["calls"] == 1
+    assert exported["counters"] == {"score_rhyme.calls": 4}
+    assert (tmp_path / "metrics.prom").read_text(encoding="utf-8") == metrics.to_prometheus()
+    assert 'poetry_analysis_events_total{event="score_rhyme.calls"} 4' in metrics.to_prometheus()
+
+
+def test_nested_instrument_blocks_keep_instrumentation_on():
+    with instrumentation.instrument() as outer:
+        instrumentation.count("outer")
+        with instrumentation.instrument():
+            instrumentation.count("inner")
+        instrumentation.count("outer")
+        assert instrumentation.enabled
+    assert not instrumentation.enabled
+    assert outer.counters == {"outer": 2, "inner": 1}
+
+
+def test_instrument_stays_on_until_the_last_concurrent_block_ends():
+    import threading
+
+    entered = threading.Barrier(2)
+    first_done = threading.Event()
+
+    def first():
+        with instrumentation.instrument(reset=False):
+            entered.wait()
+        first_done.set()
+
+    def second():
+        with instrumentation.instrument(reset=False):
+            entered.wait()
+            first_done.wait()
+            for line in ["Sees Sirius", "Sydhimlens smukkeste"] * 50:
+                utils.normalize(line)
+
+    instrumentation.METRICS.reset()
+    utils.clear_token_cache()
+    threads = [threading.Thread(target=first), threading.Thread(target=second)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counters = instrumentation.METRICS.counters
+    assert not instrumentation.enabled
+    assert counters["token_cache.hits"] == 98
+    assert counters["token_cache.misses"] == 2
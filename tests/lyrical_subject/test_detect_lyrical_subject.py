@@ -1,3 +1,5 @@
+import pytest
+
 from poetry_analysis.lyrical_subject import detect_lyrical_subject
 
 
@@ -19,3 +21,19 @@ def test_detects_implicit():
 def test_detects_deixis():
     poem_text = "I går var en fin dag."
     assert detect_lyrical_subject(poem_text)["deixis"] is True
+
+
+def test_detects_nothing_when_no_words_are_present():
+    poem_text = "Skyer samler seg over fjellet"
+    assert not any(detect_lyrical_subject(poem_text).values())
+
+
+@pytest.mark.parametrize("poem_text", ["Dukken ligger i sengen", "Herren er god", "Minnene blekner"])
+def test_does_not_match_words_inside_other_words(poem_text):
+    result = detect_lyrical_subject(poem_text)
+    assert not any(result.values())
+
+
+def test_does_not_match_phrase_across_lines():
+    poem_text = "Han bor i\ngår og tenker"
+    assert detect_lyrical_subject(poem_text)["deixis"] is False
@@ -0,0 +1,81 @@
+import json
+import os
+
+import pytest
+
+from poetry_analysis import lyrical_subject as ls
+
+
+@pytest.fixture
+def restore_default_matcher():
+    yield
+    ls.use_wordbags(None)
+
+
+@pytest.fixture
+def nynorsk_toml(tmp_path):
+    wordbag_file = tmp_path / "nynorsk.toml"
+    wordbag_file.write_text(
+        """implicit = ["du", "me", "oss"]
+
+[explicit_subject]
+name = "Eksplisitt subjekt"
+words = ["eg"]
+""",
+        encoding="utf-8",
+    )
+    return wordbag_file
+
+
+def test_load_wordbags_from_toml(nynorsk_toml):
+    matcher = ls.load_wordbags(nynorsk_toml)
+    assert matcher.categories == ["implicit", "explicit_subject"]
+    assert matcher.names["explicit_subject"] == "Eksplisitt subjekt"
+    assert matcher.names["implicit"] == "implicit"
+    assert matcher.detect("Eg og du") == {"implicit": True, "explicit_subject": True}
+
+
+def test_load_wordbags_from_json(tmp_path):
+    wordbag_file = tmp_path / "wordbags.json"
+    wordbag_file.write_text(json.dumps({"deixis": {"words": ["her", "i dag"]}}), encoding="utf-8")
+    matcher = ls.load_wordbags(wordbag_file)
+    assert matcher.hits("Her er eg i dag") == {"deixis": ["her", "i dag"]}
+
+
+def test_load_wordbags_rejects_unknown_format(tmp_path):
+    wordbag_file = tmp_path / "wordbags.yaml"
+    wordbag_file.write_text("deixis: [her]", encoding="utf-8")
+    with pytest.raises(ValueError):
+        ls.load_wordbags(wordbag_file)
+
+
+def test_load_wordbags_rejects_invalid_word_bag(tmp_path):
+    wordbag_file = tmp_path / "wordbags.json"
+    wordbag_file.write_text(json.dumps({"deixis": "her"}), encoding="utf-8")
+    with pytest.raises(ValueError):
+        ls.load_wordbags(wordbag_file)
+
+
+def test_use_wordbags_replaces_default_matcher(nynorsk_toml, restore_default_matcher):
+    assert ls.detect_lyrical_subject("Eg ser")["explicit_subject"] is True
+    ls.use_wordbags({"deixis": ["her"]})
+    assert ls.detect_lyrical_subject("Eg er her") == {"deixis": True}
+
+    ls.use_wordbags(None)
+    assert ls.get_matcher() is ls.DEFAULT_MATCHER
+
+
+def test_reload_wordbags_only_reloads_changed_file(nynorsk_toml, restore_default_matcher):
+    ls.use_wordbags(nynorsk_toml)
+    assert ls.reload_wordbags() is False
+
+    nynorsk_toml.write_text('implicit = ["me"]\n', encoding="utf-8")
+    stat = nynorsk_toml.stat()
+    os.utime(nynorsk_toml, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert ls.reload_wordbags() is True
+    assert ls.get_matcher().categories == ["implicit"]
+    assert ls.detect_lyrical_subject("Eg og du") == {"implicit": False}
+
+
+def test_reload_wordbags_without_file_does_nothing(restore_default_matcher):
+    assert ls.reload_wordbags() is False
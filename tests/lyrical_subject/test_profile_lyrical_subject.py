@@ -0,0 +1,60 @@
+import json
+
+import numpy as np
+import pytest
+
+from poetry_analysis.lyrical_subject import DEFAULT_MATCHER, profile_lyrical_subject, stack_profiles
+from poetry_analysis.utils import split_stanzas
+
+
+def test_profile_counts_each_category():
+    poem_text = "Jeg ser deg, og du ser meg.\nVi er her nå."
+    profile = profile_lyrical_subject(poem_text)
+    assert profile.counts.tolist() == [1, 1, 3, 2]
+    assert profile.n_tokens == 11
+
+
+def test_profile_counts_each_word():
+    poem_text = "Du og du og jeg"
+    profile = profile_lyrical_subject(poem_text)
+    assert profile.word_counts["implicit"] == {"du": 2}
+    assert profile.word_counts["explicit_subject"] == {"jeg": 1}
+
+
+def test_profile_frequencies_are_relative_to_number_of_tokens():
+    profile = profile_lyrical_subject("Jeg ser en fugl")
+    assert profile.frequencies[0] == pytest.approx(0.25)
+
+
+def test_profile_of_empty_text_has_zero_frequencies():
+    profile = profile_lyrical_subject("")
+    assert profile.frequencies.tolist() == [0.0, 0.0, 0.0, 0.0]
+
+
+def test_profile_positions_match_split_stanzas(example_poem_riksmaal):
+    profile = profile_lyrical_subject(example_poem_riksmaal)
+    stanzas = split_stanzas(example_poem_riksmaal)
+    for match in profile.matches:
+        verse = stanzas[match.stanza][match.line]
+        assert match.phrase in verse.lower()
+    assert profile.positions["implicit"][0] == (0, 0)
+    assert profile.positions["implicit"][-1] == (3, 0)
+
+
+def test_profile_positions_skip_leading_empty_stanza():
+    profile = profile_lyrical_subject("\n\nHer\n\n\nog nå")
+    assert profile.positions["deixis"] == [(0, 0), (1, 0)]
+
+
+def test_profile_dict_is_json_serialisable():
+    profile = profile_lyrical_subject("Jeg ser deg")
+    result = json.loads(json.dumps(profile.dict))
+    assert result["explicit_subject"]["count"] == 1
+    assert result["implicit"]["positions"] == [[0, 0]]
+
+
+def test_stack_profiles_returns_array_per_poem():
+    profiles = [profile_lyrical_subject(text) for text in ["jeg", "du og deg", "ingenting"]]
+    result = stack_profiles(profiles)
+    assert result.shape == (3, len(DEFAULT_MATCHER.categories))
+    assert np.array_equal(result.sum(axis=0), [1, 0, 2, 0])
@@ -0,0 +1,35 @@
+from poetry_analysis.lyrical_subject import WordbagMatch, WordbagMatcher
+
+
+def test_scan_returns_offsets_into_original_text():
+    matcher = WordbagMatcher({"deixis": ["i morgen", "nå"]})
+    text = "Nå kommer\nhan I  Morgen"
+    result = list(matcher.scan(text))
+    assert result == [
+        WordbagMatch("deixis", "nå", 0, 2),
+        WordbagMatch("deixis", "i morgen", 14, 23, stanza=0, line=1),
+    ]
+    assert text[14:23] == "I  Morgen"
+
+
+def test_scan_finds_overlapping_phrases():
+    matcher = WordbagMatcher({"a": ["i går"], "b": ["går"], "c": ["i går kveld"]})
+    result = [match.category for match in matcher.scan("i går kveld")]
+    assert result == ["a", "b", "c"]
+
+
+def test_scan_recovers_after_partial_phrase_match():
+    matcher = WordbagMatcher({"deixis": ["i i morgen"]})
+    result = matcher.hits("i i i morgen")
+    assert result == {"deixis": ["i i morgen"]}
+
+
+def test_hits_counts_each_occurrence():
+    matcher = WordbagMatcher({"subject": ["jeg"], "object": ["meg"]})
+    result = matcher.hits("Jeg ser meg, og jeg ser deg")
+    assert result == {"subject": ["jeg", "jeg"], "object": ["meg"]}
+
+
+def test_detect_reports_all_categories():
+    matcher = WordbagMatcher({"subject": ["jeg"], "object": ["meg"]})
+    assert matcher.detect("jeg") == {"subject": True, "object": False}
@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+from poetry_analysis import meter
+from poetry_analysis.rhyme_detection import is_stressed
+from poetry_analysis.utils import convert_to_syllables
+
+
+def test_stress_pattern_has_a_bit_per_syllable(transcribed_poem_lines):
+    for verse in transcribed_poem_lines:
+        syllables = convert_to_syllables(verse, ipa=False)
+
+        assert meter.stress_pattern(verse) == "".join(str(int(is_stressed(syllable))) for syllable in syllables)
+
+
+def test_vectorized_scores_equal_scores_of_each_verse():
+    rng = random.Random(3)  # noqa: S311
+    patterns = ["".join(rng.choice("01") for _ in range(rng.randint(1, 16))) for _ in range(200)]
+
+    scores = meter.score_meters(patterns)
+
+    for pattern, row in zip(patterns, scores, strict=True):
+        for foot, score in zip(meter.METERS.values(), row, strict=True):
+            expected = sum(int(bit) == foot[i % len(foot)] for i, bit in enumerate(pattern)) / len(pattern)
+            assert score == pytest.approx(expected)
+
+
+@pytest.mark.parametrize(
+    "pattern, expected",
+    [
+        ("01010101", "iamb"),
+        ("1010101", "trochee"),
+        ("100100100", "dactyl"),
+        ("001001001", "anapest"),
+    ],
+)
+def test_scan_verses_finds_regular_meter(pattern, expected):
+    verse = " ".join(f"AH{bit}" if bit == "0" else "AH1" for bit in pattern)
+
+    (line,) = meter.scan_verses([verse])
+
+    assert line["meter"] == expected
+    assert line["score"] == 1.0
+    assert line["syllables"] == len(pattern)
+
+
+def test_scan_poem_of_transcribed_lines(transcribed_poem_lines):
+    poem = meter.scan_poem([transcribed_poem_lines[:2], transcribed_poem_lines[2:]])
+
+    assert [line["stanza_id"] for line in poem["lines"]] == [0, 0, 1, 1]
+    assert [line["syllables"] for line in poem["lines"]] == [11, 10, 10, 12]
+    assert poem["meter"] in meter.METERS
+    assert 0 < poem["regularity"] <= 1
+    assert 0 < poem["consistency"] <= 1
+
+
+def test_scan_transcription_reads_pronunciation():
+    transcription = {
+        "text_id": "1",
+        "line_0": [["Ensom", "EE2 N S AH0 M"], ["er", "AE1 R"]],
+        "line_1": [["Det", "D AX0"]],
+    }
+
+    poem = meter.scan_transcription(transcription)
+
+    assert [line["stress"] for line in poem["lines"]] == ["101", "0"]
+    assert poem["meter"] == "trochee"
+    assert poem["lines"][1]["meter"] is None
+
+
+def test_scan_empty_poem():
+    assert meter.scan_poem([]) == {"meter": None, "regularity": None, "consistency": None, "lines": []}
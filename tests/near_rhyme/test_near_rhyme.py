@@ -0,0 +1,133 @@
+import random
+
+import numpy as np
+import pytest
+
+from poetry_analysis import near_rhyme
+from poetry_analysis.corpus_statistics import CorpusStatistics
+from poetry_analysis.rhyme_detection import tag_rhyming_verses, tag_stanzas
+
+
+def test_distance_matrix_is_symmetric_with_zero_diagonal():
+    distances = near_rhyme.distance_matrix()
+
+    np.testing.assert_array_equal(distances, distances.T)
+    np.testing.assert_array_equal(np.diag(distances), 0)
+    assert distances.min() == 0
+    assert distances.max() == 1
+
+
+def test_distance_matrix_matches_phone_distance():
+    distances = near_rhyme.distance_matrix()
+
+    for phone1, phone2 in [("T", "D"), ("OO", "UU"), ("NX", "N"), ("AJ", "S")]:
+        idx1, idx2 = near_rhyme.PHONE_INDEX[phone1], near_rhyme.PHONE_INDEX[phone2]
+        assert distances[idx1, idx2] == near_rhyme.phone_distance(phone1, phone2)
+
+
+def test_unknown_phones_only_match_themselves():
+    scores = near_rhyme.score_near_rhymes([["OO", "XX"], ["OO", "XX"]], [["OO", "XX"], ["OO", "L"]])
+
+    assert scores.tolist() == [1.0, pytest.approx(2 / 3)]
+
+
+@pytest.mark.parametrize(
+    "verse, expected",
+    [
+        (["S OO1 L"], ["OO", "L"]),
+        (["D AX0 R", "V AA1 R", "UU2 F R EH3 D"], ["EH", "D"]),
+        (["L AH2 N AX0"], ["AH", "N", "AX"]),
+        (["D AX0 N"], ["AX", "N"]),
+        ([], []),
+    ],
+)
+def test_rhyme_tail_starts_at_last_stressed_nucleus(verse, expected):
+    assert near_rhyme.rhyme_tail(verse) == expected
+
+
+def test_identical_tails_score_one():
+    tails = [["OO", "L"], ["AJ"], ["EH", "N", "AX"]]
+
+    np.testing.assert_array_equal(near_rhyme.score_near_rhymes(tails, tails), 1.0)
+
+
+def test_near_rhymes_score_between_rhymes_and_unrelated_tails():
+    rhyme, assonance, consonance, unrelated = near_rhyme.score_near_rhymes(
+        [["OO", "L"], ["OO", "L"], ["UU", "S"], ["OO", "L"]],
+        [["OO", "L"], ["OO", "G"], ["II", "S"], ["AJ", "K", "T"]],
+    )
+
+    assert rhyme > assonance > unrelated
+    assert rhyme > consonance > unrelated
+
+
+def test_batched_scores_equal_scores_of_each_pair():
+    rng = random.Random(5)  # noqa: S311
+    phones = [*near_rhyme.PHONES, "XX"]
+    tails = [[rng.choice(phones) for _ in range(rng.randint(0, 5))] for _ in range(100)]
+    others = list(reversed(tails))
+
+    scores = near_rhyme.score_near_rhymes(tails, others)
+
+    for tail, other, score in zip(tails, others, scores, strict=True):
+        assert score == pytest.approx(near_rhyme.score_near_rhymes([tail], [other])[0])
+        assert score == pytest.approx(near_rhyme.score_near_rhymes([other], [tail])[0])
+
+
+def test_near_rhyme_matrix_is_symmetric():
+    tails = [["OO", "L"], ["OO", "G"], ["UU", "S"], ["II", "S"]]
+
+    matrix = near_rhyme.near_rhyme_matrix(tails)
+
+    np.testing.assert_array_equal(matrix, matrix.T)
+    assert matrix[1, 2] == near_rhyme.score_near_rhymes([tails[1]], [tails[2]])[0]
+
+
+def test_score_near_rhymes_needs_as_many_tails_on_each_side():
+    with pytest.raises(ValueError, match="as many"):
+        near_rhyme.score_near_rhymes([["OO"]], [])
+
+
+def test_tag_rhyming_verses_tags_near_rhymes_above_threshold():
+    verses = [["S OO1 L"], ["H UU1 S"], ["T OO1 G"], ["II1 S"]]
+
+    tagged = tag_rhyming_verses(verses, near_rhyme_threshold=0.6)
+
+    assert [verse.rhyme_tag for verse in tagged] == ["a", "b", "a", "b"]
+    assert [verse.rhymes_with for verse in tagged] == [None, None, 0, 1]
+    assert [verse.rhyme_score for verse in tagged] == [0, 0, 0, 0]
+    assert 0.6 <= tagged[2].near_rhyme_score < 1
+    assert 0.6 <= tagged[3].near_rhyme_score < 1
+
+
+def test_near_rhymes_are_not_counted_as_rhymes_or_nodrim():
+    stanzas = [[["S OO1 L"], ["T OO1 G"]]]
+    statistics = CorpusStatistics()
+
+    statistics.update_rhyme(tag_stanzas(stanzas, near_rhyme_threshold=0.4))
+
+    assert statistics.rhyme_schemes == {"aa": 1}
+    assert statistics.rhyming_verses == 0
+    assert statistics.nodrim_verses == 0
+
+
+def test_exact_rhymes_are_preferred_over_near_rhymes():
+    verses = [["S OO1 L"], ["T OO1 G"], ["S T OO1 L"]]
+
+    tagged = tag_rhyming_verses(verses, near_rhyme_threshold=0.6)
+
+    assert tagged[2].rhymes_with == 0
+    assert tagged[2].rhyme_score == 1
+    assert tagged[2].near_rhyme_score is None
+
+
+def test_tag_rhyming_verses_without_threshold_is_unchanged(transcribed_poem_lines):
+    tagged = tag_rhyming_verses(transcribed_poem_lines)
+    near_tagged = tag_rhyming_verses(transcribed_poem_lines, near_rhyme_threshold=1.01)
+
+    assert [verse.dict for verse in tagged] == [verse.dict for verse in near_tagged]
+
+
+def test_near_rhymes_need_phonemic_verses():
+    with pytest.raises(ValueError, match="phonemic"):
+        tag_rhyming_verses([["sol"], ["tog"]], orthographic=True, near_rhyme_threshold=0.6)
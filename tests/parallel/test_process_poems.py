@@ -0,0 +1,54 @@
+import pytest
+
+from poetry_analysis import parallel
+from poetry_analysis.lyrical_subject import detect_lyrical_subject
+
+
+@pytest.fixture
+def poems(example_poem_landsmaal, example_poem_riksmaal, poem_with_anaphore):
+    texts = [example_poem_landsmaal, example_poem_riksmaal, poem_with_anaphore] * 4
+    return [{"ID": str(i), "URN": f"urn_{i}", "textV3": text} for i, text in enumerate(texts)]
+
+
+def test_process_poems_returns_one_result_per_poem_with_metadata(poems):
+    result = list(parallel.process_poems(poems, extractors=["lyrical_subject"], jobs=1))
+    assert len(result) == len(poems)
+    assert result[0]["ID"] == "0"
+    assert result[0]["URN"] == "urn_0"
+    assert result[1]["lyrical_subject"] == detect_lyrical_subject(poems[1]["textV3"])
+
+
+def test_process_poems_applies_selected_extractors(poems):
+    result = next(parallel.process_poems(poems, extractors=["anaphora", "rhyme"], jobs=1))
+    assert set(result) == {"ID", "URN", "anaphora", "rhyme"}
+    assert isinstance(result["rhyme"], list)
+
+
+def test_process_poems_accepts_plain_texts_from_a_generator(poems):
+    texts = (poem["textV3"] for poem in poems)
+    result = list(parallel.process_poems(texts, extractors=["alliteration"], jobs=1))
+    assert len(result) == len(poems)
+    assert set(result[0]) == {"alliteration"}
+
+
+def test_parallel_results_are_ordered_like_sequential_results(poems):
+    sequential = list(parallel.process_poems(poems, jobs=1))
+    result = list(parallel.process_poems(poems, jobs=2, chunk_size=2, max_pending=2))
+    assert result == sequential
+
+
+def test_unordered_results_contain_all_poems(poems):
+    result = list(parallel.process_poems(poems, extractors=["lyrical_subject"], jobs=2, chunk_size=3, ordered=False))
+    assert sorted(int(annotation["ID"]) for annotation in result) == list(range(len(poems)))
+
+
+def test_process_poems_can_stop_early(poems):
+    results = parallel.process_poems(poems, extractors=["lyrical_subject"], jobs=2, chunk_size=1)
+    first = next(results)
+    results.close()
+    assert first["ID"] == "0"
+
+
+def test_unknown_extractor_raises_value_error(poems):
+    with pytest.raises(ValueError):
+        list(parallel.process_poems(poems, extractors=["meter"], jobs=1))
@@ -21,3 +21,18 @@ def test_verse_also_contains_unset_attributes():
     assert "text" in result
     assert "rhyme_score" in result
     assert result["last_token"] is None
+
+
+def test_verse_dict_leaves_out_unset_optional_fields():
+    result = rd.Verse(1, text="").dict
+
+    assert result["text"] == ""
+    assert {"transcription", "tokens", "syllables"} <= set(result)
+    assert not {"span", "token_spans", "near_rhyme_score"} & set(result)
+
+
+def test_verse_dict_can_be_read_twice():
+    verse = rd.Verse(1)
+
+    assert verse.dict == verse.dict
+    assert verse.id_ == 1
@@ -0,0 +1,53 @@
+import pytest
+
+from poetry_analysis import rhyme_detection as rd
+
+
+def test_find_internal_rhymes_in_transcribed_stanza(transcribed_poem_lines):
+    result = rd.find_internal_rhymes(transcribed_poem_lines)
+
+    assert result == [{"rhyme_key": "OA", "count": 3, "words": [(0, 5, "P OA3"), (2, 3, "L OA1"), (3, 5, "OA1")]}]
+
+
+def test_end_rhymes_are_not_internal_rhymes():
+    verses = ["Kvass som kniv", "i daudkjøt flengjande", "Sanningstyrst", "mot ljoset trengjande"]
+
+    assert rd.find_internal_rhymes(verses, orthographic=True) == []
+
+
+def test_repeated_word_is_not_an_internal_rhyme():
+    assert rd.find_internal_rhymes(["Jeg ser, jeg ser den hvide himmel"], orthographic=True) == []
+
+
+@pytest.mark.parametrize(
+    "word, orthographic, expected",
+    [
+        ("S T OO1 D", False, "OO D"),
+        ("UU2 F R EH3 D", False, "EH D"),
+        ("IH0", False, None),
+        ("Stille", True, "ille"),
+        ("fryd", True, "yd"),
+        ("og", True, None),
+        ("brr", True, None),
+    ],
+)
+def test_rhyme_key(word, orthographic, expected):
+    assert rd.rhyme_key(word, orthographic=orthographic) == expected
+
+
+def test_words_with_the_same_rhyme_key_rhyme(orthographic_poem_lines):
+    words = [word for line in orthographic_poem_lines for word in line]
+    keys = {word: rd.rhyme_key(word, orthographic=True) for word in words}
+
+    for word1 in words:
+        for word2 in words:
+            if keys[word1] is not None and keys[word1] == keys[word2] and word1.casefold() != word2.casefold():
+                assert rd.score_rhyme(word1.casefold(), word2.casefold(), orthographic=True) > 0
+
+
+def test_grouping_scales_to_long_stanzas():
+    verse = " ".join(f"ord{i}ang" for i in range(200))
+    result = rd.find_internal_rhymes([verse] * 50, orthographic=True)
+
+    assert len(result) == 1
+    assert result[0]["count"] == 200 * 50
@@ -0,0 +1,89 @@
+import random
+
+import numpy as np
+import pytest
+
+from poetry_analysis import rhyme_detection as rd
+from poetry_analysis.utils import GRAMMATICAL_SUFFIXES
+
+
+def random_words(rng, alphabet, n, max_length=8):
+    return ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_length))) for _ in range(n)]
+
+
+@pytest.fixture
+def rng():
+    return random.Random(49)  # noqa: S311
+
+
+def assert_same_scores(words1, words2, orthographic):
+    expected = [
+        rd.score_rhyme(word1, word2, orthographic=orthographic) for word1, word2 in zip(words1, words2, strict=True)
+    ]
+
+    result = rd.score_rhymes(words1, words2, orthographic=orthographic)
+
+    assert isinstance(result, np.ndarray)
+    assert result.tolist() == expected
+
+
+def test_orthographic_scores_equal_scalar_scores(rng):
+    words = random_words(rng, "aeiouyæøå" + "bdfgklmnprst" + " ", 3000, max_length=6)
+    endings = ["e", "er", "en", "et", "ene", "ane", "te", "and", "ille", "y", " e", "e "]
+    words += [rng.choice(words[:50]) + ending for ending in endings for _ in range(20)]
+    shuffled = words[:]
+    rng.shuffle(shuffled)
+
+    assert_same_scores(words, shuffled, orthographic=True)
+    assert_same_scores(words, [word[-rng.randint(0, 4) :] for word in words], orthographic=True)
+
+
+def test_phonemic_scores_equal_scalar_scores(rng, transcribed_poem_lines):
+    phones = ["AX", "AX0", "EH", "AA", "R", "N", "NX", "RNX", "D", "T", "OAH", "OA", "J", "E"]
+    words = [" ".join(rng.choice(phones) for _ in range(rng.randint(0, 4))) for _ in range(3000)]
+    words += [word for line in transcribed_poem_lines for word in line]
+    shuffled = words[:]
+    rng.shuffle(shuffled)
+
+    assert_same_scores(words, shuffled, orthographic=False)
+    assert_same_scores(words, [word[-rng.randint(0, 6) :] for word in words], orthographic=False)
+
+
+@pytest.mark.parametrize(
+    "word1, word2",
+    [
+        ("", ""),
+        ("hus", "hus"),
+        ("a\0", "ba\0"),
+        ("blomster", "fester"),
+        ("sol ", "fiol "),
+        ("R AX", "L AX"),
+        ("😀sol", "fiol"),
+        *[(f"x{suffix}", f"y{suffix}") for suffix in GRAMMATICAL_SUFFIXES],
+    ],
+)
+def test_edge_case_scores_equal_scalar_scores(word1, word2):
+    assert_same_scores([word1, word2], [word2, word1], orthographic=True)
+    assert_same_scores([word1, word2], [word2, word1], orthographic=False)
+
+
+def test_score_rhymes_records_trace():
+    with rd.trace_rhymes() as scalar_trace:
+        rd.score_rhyme("fryd", "tusenfryd", orthographic=True)
+        rd.score_rhyme("sol", "måne", orthographic=True)
+    with rd.trace_rhymes() as trace:
+        rd.score_rhymes(["fryd", "sol"], ["tusenfryd", "måne"], orthographic=True)
+
+    assert list(trace) == list(scalar_trace)
+
+
+def test_score_rhymes_in_chunks(monkeypatch, rng):
+    monkeypatch.setattr(rd, "SCORE_RHYMES_CHUNK_SIZE", 7)
+    words = random_words(rng, "aeiobdfgkl", 100)
+
+    assert_same_scores(words, words[::-1], orthographic=True)
+
+
+def test_score_rhymes_with_different_numbers_of_words():
+    with pytest.raises(ValueError, match="as many"):
+        rd.score_rhymes(["sol"], ["fiol", "viol"])
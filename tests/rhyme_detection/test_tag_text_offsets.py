@@ -0,0 +1,30 @@
+from poetry_analysis import rhyme_detection as rd
+
+
+def test_tag_text_with_offsets_gives_same_rhyme_schemes(example_poem_riksmaal):
+    expected = list(rd.tag_text(example_poem_riksmaal))
+    result = list(rd.tag_text(example_poem_riksmaal, offsets=True))
+    assert [stanza["rhyme_scheme"] for stanza in result] == [stanza["rhyme_scheme"] for stanza in expected]
+
+
+def test_tag_text_with_offsets_does_not_copy_text(example_poem_riksmaal):
+    result = list(rd.tag_text(example_poem_riksmaal, offsets=True))
+    verse = result[1]["verses"][2]
+    start, end = verse["span"]
+    assert example_poem_riksmaal[start:end] == "Mange vande kan ei slukke ud"
+    assert verse["text"] == ""
+    assert verse["tokens"] is None
+
+
+def test_tag_text_without_offsets_leaves_out_spans(example_poem_riksmaal):
+    verse = next(rd.tag_text(example_poem_riksmaal))["verses"][0]
+    assert {"text", "tokens"} <= set(verse)
+    assert not {"span", "token_spans"} & set(verse)
+
+
+def test_tag_text_with_offsets_annotates_token_spans(example_poem_riksmaal):
+    result = list(rd.tag_text(example_poem_riksmaal, offsets=True))
+    verse = result[0]["verses"][0]
+    start, end = verse["token_spans"][-1]
+    assert example_poem_riksmaal[start:end] == "glød"
+    assert verse["last_token"] == "glød"
@@ -0,0 +1,79 @@
+import pytest
+
+from poetry_analysis import rhyme_detection as rd
+from poetry_analysis.rhyme_detection import RhymeReason
+
+
+@pytest.mark.parametrize(
+    "word1, word2, orthographic, expected",
+    [
+        ("klangen", "fryd", True, RhymeReason.NO_SHARED_SUFFIX),
+        ("skrevet", "arbeidet", True, RhymeReason.GRAMMATICAL_SUFFIX),
+        ("blomster", "fester", True, RhymeReason.SUFFIX_NUCLEUS),
+        ("tusenfryd", "fryd", True, RhymeReason.NODRIM),
+        ("hjerte", "smerte", True, RhymeReason.PROPER_RHYME),
+        ("G UH L", "J UH L", False, RhymeReason.PROPER_RHYME),
+    ],
+)
+def test_classify_rhyme_gives_the_reason_for_the_score(word1, word2, orthographic, expected):
+    reason = rd.classify_rhyme(word1, word2, orthographic=orthographic)
+    assert reason == expected
+    assert rd.score_rhyme(word1, word2, orthographic=orthographic) == rd.RHYME_SCORES.get(reason, 0)
+
+
+def test_trace_rhymes_records_a_reason_for_each_rhyme_decision():
+    stanza = ["Jeg ser paa den hvide himmel,", "og hjertet slaar i smerte", "den blaa og stille himmel", "mit hjerte"]
+    with rd.trace_rhymes() as trace:
+        rd.tag_rhyming_verses(stanza, orthographic=True)
+    assert len(trace) > 0
+    assert all(isinstance(reason, RhymeReason) for reason in trace)
+    assert sum(trace.summary().values()) == len(trace)
+    assert trace.summary()[RhymeReason.PROPER_RHYME] == 1
+
+
+def test_trace_rhymes_aggregates_over_several_blocks():
+    trace = rd.RhymeTrace()
+    with rd.trace_rhymes(trace):
+        rd.score_rhyme("hjerte", "smerte", orthographic=True)
+    with rd.trace_rhymes(trace):
+        rd.score_rhyme("syr", "myr", orthographic=True)
+        rd.score_rhyme("fryd", "tusenfryd", orthographic=True)
+    assert trace.dict == {"nodrim": 1, "proper_rhyme": 2}
+
+
+def test_nothing_is_traced_outside_trace_rhymes():
+    with rd.trace_rhymes() as trace:
+        pass
+    rd.score_rhyme("hjerte", "smerte", orthographic=True)
+    assert len(trace) == 0
+    assert rd._active_trace.get() is None
+
+
+def test_concurrent_traces_are_kept_apart():
+    import threading
+
+    words = {"proper_rhyme": ("hjerte", "smerte"), "nodrim": ("fryd", "tusenfryd")}
+    barrier = threading.Barrier(len(words))
+    traces = {}
+
+    def trace_words(name):
+        with rd.trace_rhymes() as trace:
+            barrier.wait()
+            for _ in range(100):
+                rd.score_rhyme(*words[name], orthographic=True)
+            barrier.wait()
+        traces[name] = trace.dict
+
+    threads = [threading.Thread(target=trace_words, args=(name,)) for name in words]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert traces == {name: {name: 100} for name in words}
+
+
+def test_clear_empties_the_trace():
+    with rd.trace_rhymes() as trace:
+        rd.score_rhyme("hjerte", "smerte", orthographic=True)
+    trace.clear()
+    assert not trace.summary()
@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+from poetry_analysis.parallel import process_poems
+from poetry_analysis.rhyme_index import BKTree, RhymeSchemeIndex, canonicalize_scheme, levenshtein
+
+
+@pytest.fixture
+def schemes():
+    rng = random.Random(42)  # noqa: S311
+    return ["".join(rng.choice("abcd") for _ in range(rng.randint(2, 8))) for _ in range(500)]
+
+
+@pytest.mark.parametrize("max_distance", [0, 1, 2, 3])
+def test_bk_tree_search_equals_linear_scan(schemes, max_distance):
+    tree = BKTree(schemes)
+    query = "abcab"
+
+    expected = sorted({(levenshtein(query, scheme), scheme) for scheme in schemes})
+    expected = [match for match in expected if match[0] <= max_distance]
+
+    assert tree.search(query, max_distance) == expected
+
+
+def test_bk_tree_search_compares_few_words(schemes, monkeypatch):
+    tree = BKTree(schemes)
+    calls = []
+    original = levenshtein
+
+    def counting_levenshtein(string1, string2):
+        calls.append(string2)
+        return original(string1, string2)
+
+    monkeypatch.setattr("poetry_analysis.rhyme_index.levenshtein", counting_levenshtein)
+    tree.search("abab", max_distance=1)
+
+    assert len(calls) < len(tree) / 2
+
+
+@pytest.mark.parametrize(
+    "scheme, expected",
+    [
+        ("ABAB CDCD", "abab abab"),
+        ("abab\ncdcd\nefef", "abab abab abab"),
+        (["ABBA", "cddc"], "abba abba"),
+        ("", ""),
+    ],
+)
+def test_canonicalize_scheme(scheme, expected):
+    assert canonicalize_scheme(scheme) == expected
+
+
+def test_index_finds_poems_by_rhyme_scheme_of_annotations(example_poem_landsmaal, example_poem_riksmaal):
+    annotations = list(process_poems([example_poem_landsmaal, example_poem_riksmaal], extractors=["rhyme"], jobs=1))
+    index = RhymeSchemeIndex()
+    index.add_annotations(annotations)
+    first_scheme = [stanza["rhyme_scheme"] for stanza in annotations[0]["rhyme"]]
+
+    assert len(index) == 2
+    assert (0, 0) in index.find_poems(" ".join(first_scheme).upper())
+    assert index.find_stanzas(first_scheme[0]) == [
+        (poem_id, stanza["stanza_id"], 0)
+        for poem_id, poem in enumerate(annotations)
+        for stanza in poem["rhyme"]
+        if canonicalize_scheme(stanza["rhyme_scheme"]) == canonicalize_scheme(first_scheme[0])
+    ]
+
+
+def test_approximate_search_returns_closest_first():
+    index = RhymeSchemeIndex()
+    index.add_poem("sonnet", ["abba", "abba", "cdc", "dcd"])
+    index.add_poem("ballad", ["abcb", "abcb"])
+    index.add_poem("couplets", ["aabb", "aabb"])
+
+    assert index.find_poems("abab abab", max_distance=0) == []
+    assert index.find_poems("abab abab", max_distance=4) == [("ballad", 2), ("couplets", 4)]
+    assert index.find_stanzas("abcb", max_distance=1) == [("ballad", 0, 0), ("ballad", 1, 0)]
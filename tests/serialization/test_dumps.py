@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from poetry_analysis import serialization, utils
+from poetry_analysis.anaphora import extract_poem_anaphora
+from poetry_analysis.rhyme_detection import tag_poem_file, tag_text
+
+ANNOTATIONS = [
+    {"stanza_id": 0, "rhyme_scheme": "aa", "verses": [{"text": "Blåklokken gror", "score": 0.5, "span": (0, 14)}]}
+]
+
+
+@pytest.mark.parametrize("backend", ["json", "orjson"])
+@pytest.mark.parametrize("pretty", [False, True])
+def test_json_backends_give_the_same_data(backend, pretty):
+    pytest.importorskip(backend)
+    serialized = serialization.dumps(ANNOTATIONS, backend=backend, pretty=pretty)
+    assert json.loads(serialized) == json.loads(json.dumps(ANNOTATIONS))
+    assert "Blåklokken".encode() in serialized
+
+
+@pytest.mark.parametrize("backend", ["json", "orjson"])
+def test_output_is_compact_unless_pretty(backend):
+    pytest.importorskip(backend)
+    assert b"\n" not in serialization.dumps(ANNOTATIONS, backend=backend)
+    assert b"\n" in serialization.dumps(ANNOTATIONS, backend=backend, pretty=True)
+
+
+@pytest.mark.parametrize("pretty", [False, True])
+def test_json_backends_give_the_same_bytes(pretty):
+    pytest.importorskip("orjson")
+    data = [{"ord": "blåklokke", "antall": [1, 2], "tom": [], "ingen": None}]
+    assert serialization.dumps(data, backend="json", pretty=pretty) == serialization.dumps(
+        data, backend="orjson", pretty=pretty
+    )
+
+
+def test_msgpack_round_trip(tmp_path):
+    pytest.importorskip("msgpack")
+    outputfile = serialization.dump(ANNOTATIONS, tmp_path / f"annotations{serialization.suffix('msgpack')}", "msgpack")
+    assert serialization.load(outputfile) == json.loads(json.dumps(ANNOTATIONS))
+
+
+def test_auto_backend_is_a_json_backend():
+    assert serialization.resolve_backend("auto") in ("json", "orjson")
+    assert serialization.suffix("auto") == ".json"
+
+
+def test_unknown_backend_raises_error():
+    with pytest.raises(ValueError, match="Unknown serialization backend"):
+        serialization.dumps(ANNOTATIONS, backend="pickle")
+
+
+def test_available_backends_always_include_json():
+    assert serialization.available_backends()[0] == "json"
+
+
+def test_save_annotations_writes_compact_json(tmp_path):
+    outputfile = utils.save_annotations(ANNOTATIONS, tmp_path / "annotations.json", backend="json")
+    assert outputfile.read_text(encoding="utf-8").count("\n") == 0
+    assert serialization.load(outputfile) == json.loads(json.dumps(ANNOTATIONS))
+
+
+def test_annotate_writes_with_the_chosen_backend(tmp_path, poem_with_anaphore):
+    outputfile = tmp_path / "anaphora.json"
+    utils.annotate(extract_poem_anaphora, poem_with_anaphore, outputfile=outputfile, backend="json", pretty=True)
+    assert outputfile.read_text(encoding="utf-8").startswith("[\n  {")
+    assert serialization.load(outputfile) == extract_poem_anaphora(poem_with_anaphore)
+
+
+def test_tag_poem_file_writes_annotations_next_to_the_poem(tmp_path, example_poem_riksmaal):
+    poem_file = tmp_path / "1_poem.txt"
+    poem_file.write_text(example_poem_riksmaal, encoding="utf-8")
+    tag_poem_file(poem_file, write_to_file=True)
+    saved = serialization.load(tmp_path / "1_poem_rhyme_scheme.json")
+    assert saved == json.loads(json.dumps(list(tag_text(example_poem_riksmaal))))
@@ -0,0 +1,162 @@
+import json
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from poetry_analysis.lyrical_subject import detect_lyrical_subject
+from poetry_analysis.server import AnnotationServer, MicroBatcher
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = AnnotationServer(port=0, batch_wait=0.01)
+    server.start()
+    yield server
+    server.stop()
+
+
+def post(server, path, data):
+    request = urllib.request.Request(f"{server.url}{path}", data=json.dumps(data).encode())  # noqa: S310
+    with urllib.request.urlopen(request) as response:  # noqa: S310
+        return json.load(response)
+
+
+def get(server, path):
+    with urllib.request.urlopen(f"{server.url}{path}") as response:  # noqa: S310
+        return response.read().decode()
+
+
+@pytest.mark.parametrize(
+    "path, key", [("/rhyme", "rhyme"), ("/anaphora", "anaphora"), ("/alliteration", "alliteration")]
+)
+def test_post_annotates_a_text_with_one_extractor(server, path, key, poem_with_anaphore):
+    result = post(server, path, {"text": poem_with_anaphore})
+    assert list(result) == [key]
+
+
+def test_post_to_all_annotates_many_texts_with_all_extractors(server, example_poem_riksmaal, poem_with_anaphore):
+    result = post(server, "/all", {"texts": [example_poem_riksmaal, poem_with_anaphore]})
+    assert len(result) == 2
+    assert all(set(item) == set(server.extractors) for item in result)
+    assert result[1]["lyrical_subject"] == detect_lyrical_subject(poem_with_anaphore)
+
+
+def test_concurrent_requests_are_batched(server, example_poem_riksmaal):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: post(server, "/lyrical-subject", {"text": example_poem_riksmaal}), range(16)))
+    assert all(result == results[0] for result in results)
+    batches = server.metrics.counters["batches.lyrical_subject"]
+    assert server.metrics.counters["batched_texts.lyrical_subject"] >= batches
+
+
+def test_health_and_metrics(server):
+    health = json.loads(get(server, "/health"))
+    assert health["status"] == "ok"
+    assert "/lyrical-subject" in health["endpoints"]
+    post(server, "/anaphora", {"text": "Jeg ser\njeg ser"})
+    metrics = get(server, "/metrics")
+    assert 'poetry_analysis_stage_calls_total{stage="request.anaphora"}' in metrics
+    assert 'poetry_analysis_token_cache{value="hits"}' in metrics
+
+
+@pytest.mark.parametrize(
+    "path, data, status",
+    [
+        ("/rhyme", {"poem": "Jeg ser"}, 400),
+        ("/rhyme", {"texts": "Jeg ser"}, 400),
+        ("/unknown", {"text": "Jeg ser"}, 404),
+    ],
+)
+def test_invalid_requests_get_an_error_status(server, path, data, status):
+    with pytest.raises(urllib.error.HTTPError) as error:
+        post(server, path, data)
+    assert error.value.code == status
+    assert "error" in json.load(error.value)
+
+
+def test_requests_above_the_pending_limit_are_rejected():
+    server = AnnotationServer(port=0, extractors=["lyrical_subject"], max_pending=1, warm_up=False)
+    server.start()
+    try:
+        server.pending.acquire()
+        with pytest.raises(urllib.error.HTTPError) as error:
+            post(server, "/lyrical-subject", {"text": "Jeg ser"})
+        assert error.value.code == 503
+        server.pending.release()
+        assert post(server, "/lyrical-subject", {"text": "Jeg ser"})
+    finally:
+        server.stop()
+
+
+def test_micro_batcher_annotates_identical_texts_in_a_batch_once():
+    calls = []
+
+    def extractor(text):
+        calls.append(text)
+        return len(text)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        batcher = MicroBatcher(extractor, executor, batch_size=10, max_wait=0.5, name="length")
+        futures = [batcher.submit(text) for text in ["a", "bb", "a", "bb", "a"]]
+        assert [future.result() for future in futures] == [1, 2, 1, 2, 1]
+        batcher.stop()
+    assert sorted(calls) == ["a", "bb"]
+    assert batcher.metrics.counters["batches.length"] == 1
+
+
+def test_micro_batcher_passes_errors_to_the_futures():
+    def extractor(text):
+        raise ValueError(text)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        batcher = MicroBatcher(extractor, executor, max_wait=0)
+        with pytest.raises(ValueError, match="oops"):
+            batcher.submit("oops").result()
+        batcher.stop()
+
+
+def send_raw(server, headers):
+    import http.client
+
+    host, port = server.httpd.server_address[:2]
+    connection = http.client.HTTPConnection(host, port, timeout=5)
+    try:
+        connection.putrequest("POST", "/lyrical-subject", skip_accept_encoding=True)
+        for name, value in headers.items():
+            connection.putheader(name, value)
+        connection.endheaders()
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+@pytest.mark.parametrize(
+    "headers, status",
+    [
+        ({}, 411),
+        ({"Content-Length": "-1"}, 400),
+        ({"Content-Length": "many"}, 400),
+        ({"Content-Length": "100"}, 413),
+    ],
+)
+def test_invalid_content_length_gets_an_error_status(headers, status):
+    server = AnnotationServer(port=0, extractors=["lyrical_subject"], max_body_size=10, warm_up=False)
+    server.start()
+    try:
+        response_status, body = send_raw(server, headers)
+    finally:
+        server.stop()
+    assert response_status == status
+    assert "error" in body
+
+
+def test_warm_up_compiles_the_phonemic_nucleus_pattern():
+    from poetry_analysis import rhyme_detection
+
+    rhyme_detection._nucleus_pattern.cache_clear()
+    server = AnnotationServer(port=0, extractors=["rhyme"])
+    server.stop()
+    assert rhyme_detection._nucleus_pattern.cache_info().currsize == 2
@@ -0,0 +1,81 @@
+import json
+from collections import Counter
+
+import pytest
+
+from poetry_analysis.parallel import process_poems
+from poetry_analysis.store import AnnotationStore
+
+
+@pytest.fixture
+def annotations(example_poem_landsmaal, example_poem_riksmaal, poem_with_anaphore, poem_with_alliteration):
+    texts = [example_poem_landsmaal, example_poem_riksmaal, poem_with_anaphore, poem_with_alliteration]
+    poems = [{"ID": str(i), "URN": f"urn_{i}", "textV3": text} for i, text in enumerate(texts)]
+    return list(process_poems(poems, jobs=1))
+
+
+@pytest.fixture
+def store(annotations):
+    with AnnotationStore(":memory:") as store:
+        store.add_poems(annotations, batch_size=3)
+        yield store
+
+
+def test_add_poems_inserts_every_stanza_and_verse(store, annotations):
+    assert store.count_poems() == len(annotations)
+    n_stanzas = sum(len(poem["rhyme"]) for poem in annotations)
+    n_verses = sum(len(stanza["verses"]) for poem in annotations for stanza in poem["rhyme"])
+    assert store.query("SELECT COUNT(*) FROM stanzas") == [(n_stanzas,)]
+    assert store.query("SELECT COUNT(*) FROM verses") == [(n_verses,)]
+
+
+def test_find_stanzas_by_rhyme_scheme(store, annotations):
+    expected = [
+        (poem["ID"], stanza["stanza_id"])
+        for poem in annotations
+        for stanza in poem["rhyme"]
+        if stanza["rhyme_scheme"] == "abab"
+    ]
+    assert store.find_stanzas("abab") == expected
+    assert sum(store.rhyme_scheme_counts().values()) == sum(len(poem["rhyme"]) for poem in annotations)
+
+
+def test_find_poems_combines_conditions(store, annotations):
+    with_s_alliteration = {
+        poem["ID"] for poem in annotations if any(group["symbol"] == "s" for group in poem["alliteration"])
+    }
+    with_explicit_subject = {poem["ID"] for poem in annotations if poem["lyrical_subject"]["explicit_subject"]}
+    result = store.find_poems(alliteration="s", lyrical_subject="explicit_subject")
+    assert set(result) == with_s_alliteration & with_explicit_subject
+    assert store.find_poems() == [poem["ID"] for poem in annotations]
+
+
+def test_find_poems_with_unknown_condition_raises_error(store):
+    with pytest.raises(ValueError, match="Unknown conditions"):
+        store.find_poems(meter="iamb")
+
+
+def test_adding_a_poem_again_replaces_it(store, annotations):
+    store.add_poems([annotations[0], annotations[0]])
+    assert store.count_poems() == len(annotations)
+    assert store.query("SELECT COUNT(*) FROM stanzas JOIN poems USING (poem_id) WHERE id = '0'") == [
+        (len(annotations[0]["rhyme"]),)
+    ]
+
+
+def test_store_is_saved_to_a_file_and_reads_annotation_files(tmp_path, annotations):
+    json_file = tmp_path / "annotations.json"
+    json_file.write_text(json.dumps(annotations[:2]), encoding="utf-8")
+    jsonl_file = tmp_path / "annotations.jsonl"
+    jsonl_file.write_text("\n".join(json.dumps(poem) for poem in annotations[2:]) + "\n", encoding="utf-8")
+
+    with AnnotationStore(tmp_path / "corpus.db") as store:
+        assert store.add_files([json_file, jsonl_file]) == len(annotations)
+    with AnnotationStore(tmp_path / "corpus.db") as store:
+        assert store.find_poems() == [poem["ID"] for poem in annotations]
+        assert store.alliteration_symbol_counts() == Counter(
+            group["symbol"] for poem in annotations for group in poem["alliteration"]
+        )
+        assert store.query("EXPLAIN QUERY PLAN SELECT * FROM stanzas WHERE rhyme_scheme = 'abab'")[0][-1].endswith(
+            "USING INDEX stanzas_rhyme_scheme (rhyme_scheme=?)"
+        )
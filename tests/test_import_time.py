@@ -0,0 +1,54 @@
+"""Check that importing the library stays cheap, by importing each module
+in a fresh interpreter and listing the packages it loaded."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import poetry_analysis
+
+# Heavy dependencies that must only be imported when they are used
+LAZY_DEPENDENCIES = ["numpy", "pandas", "nb_tokenizer", "convert_pa", "orjson", "msgpack"]
+
+MODULES = [
+    "poetry_analysis.instrumentation",
+    "poetry_analysis.serialization",
+    "poetry_analysis.utils",
+    "poetry_analysis.rhyme_detection",
+    "poetry_analysis.rhyme_index",
+    "poetry_analysis.alliteration",
+    "poetry_analysis.anaphora",
+    "poetry_analysis.lyrical_subject",
+    "poetry_analysis.meter",
+    "poetry_analysis.near_rhyme",
+    "poetry_analysis.parallel",
+    "poetry_analysis.cli",
+    "poetry_analysis.corpus_statistics",
+    "poetry_analysis.server",
+    "poetry_analysis.store",
+]
+
+
+def imported_packages(module: str) -> set[str]:
+    """Import a module in a new interpreter and return the top-level packages in `sys.modules`."""
+    source_dir = Path(poetry_analysis.__file__).parents[1]
+    completed = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", f"import sys, {module}; print('\\n'.join(sys.modules))"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": str(source_dir)},
+    )
+    return {name.split(".")[0] for name in completed.stdout.splitlines()}
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_heavy_dependencies_are_imported_lazily(module):
+    assert not imported_packages(module).intersection(LAZY_DEPENDENCIES)
+
+
+def test_imported_packages_include_eager_dependencies():
+    assert "numpy" in imported_packages("numpy.linalg")
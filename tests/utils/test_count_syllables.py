@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from benchmarks.corpus import SIZES, generate_transcribed_corpus
+from poetry_analysis import utils
+from poetry_analysis.rhyme_detection import get_stanzas_from_transcription
+
+
+@pytest.fixture
+def transcribed_verses(transcribed_poem_lines):
+    corpus = generate_transcribed_corpus(SIZES["small"])
+    verses = [verse for poem in corpus for stanza in get_stanzas_from_transcription(poem) for verse in stanza]
+    return transcribed_poem_lines + verses
+
+
+def test_count_syllables_equals_length_of_syllabified_verse(transcribed_verses):
+    for verse in transcribed_verses:
+        assert utils.count_syllables(verse) == len(utils.convert_to_syllables(verse, ipa=False))
+
+
+def test_batch_counts_equal_counts_of_each_verse(transcribed_verses):
+    counts = utils.count_syllables_batch(transcribed_verses)
+
+    assert isinstance(counts, np.ndarray)
+    assert counts.tolist() == [utils.count_syllables(verse) for verse in transcribed_verses]
+
+
+def test_orthographic_counts_equal_orthographic_syllabification(orthographic_poem_lines, example_poem_riksmaal):
+    verses = [" ".join(line) for line in orthographic_poem_lines] + example_poem_riksmaal.splitlines()
+
+    counts = utils.count_syllables_batch(verses, orthographic=True)
+
+    for verse, count in zip(verses, counts, strict=True):
+        assert count == utils.count_syllables(verse, orthographic=True)
+        assert count == sum(utils.count_orthographic_syllables(utils.normalize(verse)))
+
+
+@pytest.mark.parametrize("verse", ["hm", "Hm, pst!", "Pst, svæve saa stille", "brr hmm æ"])
+def test_words_without_nucleus_are_one_syllable(verse):
+    expected = sum(utils.count_orthographic_syllables(utils.normalize(verse)))
+
+    assert utils.count_syllables(verse, orthographic=True) == expected
+    assert utils.count_syllables_batch([verse, verse], orthographic=True).tolist() == [expected, expected]
+    assert utils.count_orthographic_syllables(["hm", "pst"]) == [1, 1]
+
+
+def test_count_poem_syllables_splits_counts_by_stanza(example_poem_landsmaal):
+    stanzas = utils.split_stanzas(example_poem_landsmaal)
+
+    counts = utils.count_poem_syllables(example_poem_landsmaal)
+
+    assert [len(stanza_counts) for stanza_counts in counts] == [len(stanza) for stanza in stanzas]
+    assert counts[0].tolist() == [3, 6, 3, 6]
+
+
+def test_count_syllables_batch_of_no_verses():
+    assert utils.count_syllables_batch([]).tolist() == []
@@ -0,0 +1,61 @@
+import io
+import random
+
+import pytest
+
+from poetry_analysis import utils
+from poetry_analysis.anaphora import extract_poem_anaphora, iter_poem_anaphora
+from poetry_analysis.rhyme_detection import tag_poem_file, tag_text
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "\n",
+        "\n\n\n",
+        "En linje",
+        "En linje\n",
+        "\nEn linje\nTo linjer\n\n\nTre\n",
+        "En\n\nTo\n   \nTre  \n\n",
+        "En\r\nTo\r\n\r\nTre",
+    ],
+)
+def test_iter_stanzas_gives_the_same_stanzas_as_split_stanzas(text):
+    assert list(utils.iter_stanzas(io.StringIO(text))) == utils.split_stanzas(text)
+
+
+def test_iter_stanzas_matches_split_stanzas_on_random_texts():
+    rng = random.Random(2025)  # noqa: S311
+    for _ in range(2000):
+        text = "".join(rng.choice(["a", "b ", " ", "\n", "\n", "\x0c"]) for _ in range(rng.randint(0, 30)))
+        assert list(utils.iter_stanzas(io.StringIO(text))) == utils.split_stanzas(text)
+
+
+def test_iter_stanzas_matches_split_stanzas_on_example_poems(example_poem_landsmaal, example_poem_riksmaal):
+    for text in (example_poem_landsmaal, example_poem_riksmaal):
+        assert list(utils.iter_stanzas(io.StringIO(text))) == utils.split_stanzas(text)
+
+
+def test_iter_stanzas_yields_each_stanza_before_reading_the_rest():
+    stream = io.StringIO("Første strofe\n\n" + "Neste strofe\n" * 1000)
+    stanzas = utils.iter_stanzas(stream)
+    assert next(stanzas) == ["Første strofe"]
+    assert stream.tell() < len(stream.getvalue()) // 10
+
+
+def test_iter_stanzas_decodes_binary_streams_and_leaves_them_open(example_poem_riksmaal):
+    stream = io.BytesIO(example_poem_riksmaal.encode("utf-8"))
+    assert list(utils.iter_stanzas(stream)) == utils.split_stanzas(example_poem_riksmaal)
+    assert not stream.closed
+
+
+def test_iter_poem_anaphora_gives_the_same_annotations_as_extract_poem_anaphora(poem_with_anaphore):
+    stanzas = utils.iter_stanzas(io.StringIO(poem_with_anaphore))
+    assert list(iter_poem_anaphora(stanzas)) == extract_poem_anaphora(poem_with_anaphore)
+
+
+def test_tag_poem_file_reads_text_files_as_a_stream(tmp_path, example_poem_landsmaal):
+    poem_file = tmp_path / "1_poem.txt"
+    poem_file.write_text(example_poem_landsmaal, encoding="utf-8")
+    assert tag_poem_file(poem_file) == list(tag_text(example_poem_landsmaal))
@@ -0,0 +1,43 @@
+import pytest
+
+from poetry_analysis import utils
+
+
+@pytest.mark.parametrize("example_fixture", ["example_poem_danish", "example_poem_riksmaal", "poem_with_anaphore"])
+def test_tokens_are_the_same_as_normalize(example_fixture, request):
+    text = request.getfixturevalue(example_fixture)
+    for line in text.splitlines():
+        tokens, spans = utils.normalize_with_spans(line)
+        assert tokens == utils.normalize(line)
+        assert len(spans) == len(tokens)
+
+
+def test_spans_point_to_the_tokens_in_the_original_text():
+    text = "  «Stop!» skraaler Sengkammeraten, "
+    tokens, spans = utils.normalize_with_spans(text)
+    assert tokens == ["stop", "skraaler", "sengkammeraten"]
+    assert [text[start:end] for start, end in spans] == ["Stop", "skraaler", "Sengkammeraten"]
+
+
+def test_spans_include_punctuation_inside_tokens():
+    text = "Kjøbmands-bod"
+    tokens, spans = utils.normalize_with_spans(text)
+    assert tokens == ["kjøbmandsbod"]
+    assert spans == [(0, 13)]
+
+
+def test_offset_is_added_to_spans():
+    _, spans = utils.normalize_with_spans("Sees Sirius", offset=10)
+    assert spans == [(10, 14), (15, 21)]
+
+
+@pytest.mark.parametrize("text", ["\nJeg ser.\n\n\nDette er  \n  \n\nslut\n", "\n\nEn\nTo\r\nTre", ""])
+def test_split_stanza_spans_matches_split_stanzas(text):
+    spans = utils.split_stanza_spans(text)
+    assert [[text[start:end] for start, end in stanza] for stanza in spans] == utils.split_stanzas(text)
+
+
+def test_split_stanza_spans_matches_split_stanzas_on_poem(example_poem_landsmaal):
+    spans = utils.split_stanza_spans(example_poem_landsmaal)
+    verses = [[example_poem_landsmaal[start:end] for start, end in stanza] for stanza in spans]
+    assert verses == utils.split_stanzas(example_poem_landsmaal)
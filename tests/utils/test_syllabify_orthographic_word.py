@@ -0,0 +1,41 @@
+import pytest
+
+from poetry_analysis import utils
+
+
+@pytest.mark.parametrize(
+    "word, expected",
+    [
+        ("ensom", ["en", "som"]),
+        ("kjærligheden", ["kjær", "lig", "he", "den"]),
+        ("Septembernat", ["Sep", "tem", "ber", "nat"]),
+        ("daudkjøt", ["daud", "kjøt"]),
+        ("flengjande", ["flen", "gjan", "de"]),
+        ("Maria", ["Ma", "ri", "a"]),
+        ("Straale", ["Straa", "le"]),
+        ("øyeblikk", ["øy", "e", "blikk"]),
+    ],
+)
+def test_orthographic_words_are_split_into_syllables(word, expected):
+    assert utils.syllabify_orthographic_word(word) == expected
+
+
+@pytest.mark.parametrize("word, n_syllables", [("sauen", 2), ("reisende", 3), ("høit", 1)])
+def test_digraphs_are_a_single_nucleus(word, n_syllables):
+    assert len(utils.syllabify_orthographic_word(word)) == n_syllables
+
+
+@pytest.mark.parametrize("word, expected", [("hm", ["hm"]), ("", [])])
+def test_words_without_several_nuclei_are_a_single_syllable(word, expected):
+    assert utils.syllabify_orthographic_word(word) == expected
+
+
+def test_syllables_join_to_the_original_word(example_poem_riksmaal):
+    words = utils.normalize(example_poem_riksmaal)
+    for word, syllables in zip(words, utils.split_orthographic_text_into_syllables(words), strict=True):
+        assert "".join(syllables) == word
+
+
+def test_count_orthographic_syllables_counts_each_word(orthographic_poem_lines):
+    result = utils.count_orthographic_syllables(orthographic_poem_lines[0])
+    assert result == [1, 1, 2, 1, 2, 1, 2, 1]
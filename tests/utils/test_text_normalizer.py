@@ -0,0 +1,54 @@
+import pytest
+
+from poetry_analysis import utils
+
+
+@pytest.mark.parametrize("example_fixture", ["example_poem_danish", "example_poem_riksmaal", "poem_with_anaphore"])
+def test_strip_punctuation_removes_the_same_characters_as_is_punctuation(example_fixture, request):
+    text = request.getfixturevalue(example_fixture)
+    expected = utils.strip_redundant_whitespace("".join(char for char in text if not utils.is_punctuation(char)))
+    assert utils.strip_punctuation(text) == expected
+
+
+def test_make_comparable_string_removes_stress_markers_and_case():
+    result = utils.make_comparable_string(["K V AH2 S", "S OAH0 M!"])
+    assert result == "k v ah s s oah m"
+
+
+def test_normalize_many_gives_same_result_as_normalize(example_poem_danish):
+    normalizer = utils.TextNormalizer(fold_spelling=True)
+    lines = example_poem_danish.splitlines()
+    assert normalizer.normalize_many(lines) == [normalizer.normalize(line) for line in lines]
+
+
+def test_normalize_many_handles_lines_with_line_breaks():
+    normalizer = utils.TextNormalizer()
+    assert normalizer.normalize_many(["en\nto", "tre"]) == ["en to", "tre"]
+
+
+def test_normalize_many_of_no_lines_is_empty():
+    assert utils.TextNormalizer().normalize_many([]) == []
+
+
+def test_fold_spelling_keeps_case_when_not_lowercasing():
+    normalizer = utils.TextNormalizer(case=None, fold_spelling=True)
+    assert normalizer.normalize("Aase gaar AAPENT") == "Åse går ÅPENT"
+
+
+def test_fold_spelling_with_custom_mapping():
+    normalizer = utils.TextNormalizer(fold_spelling={"aa": "å", "hv": "v"})
+    assert normalizer.normalize("Hvad saa") == "vad så"
+
+
+def test_spelling_is_not_folded_by_default():
+    assert utils.TextNormalizer().normalize("Paa Torvet") == "paa torvet"
+
+
+def test_invalid_case_conversion_raises_value_error():
+    with pytest.raises(ValueError):
+        utils.TextNormalizer(case="upper")
+
+
+def test_normalize_many_returns_tokens_per_line(orthographic_poem_lines):
+    lines = [" ".join(line) for line in orthographic_poem_lines]
+    assert utils.normalize_many(lines) == [utils.normalize(line) for line in lines]
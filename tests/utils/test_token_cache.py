@@ -0,0 +1,78 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from poetry_analysis import utils
+
+
+@pytest.fixture(autouse=True)
+def fresh_token_cache():
+    utils.configure_token_cache(maxsize=utils.TOKEN_CACHE_SIZE, enabled=True)
+    yield
+    utils.configure_token_cache(maxsize=utils.TOKEN_CACHE_SIZE, enabled=True)
+
+
+def test_repeated_lines_are_served_from_cache():
+    utils.normalize("Jeg ser paa den hvide himmel,")
+    utils.normalize("Jeg ser paa den hvide himmel,")
+    info = utils.token_cache_info()
+    assert info.hits == 1
+    assert info.misses == 1
+
+
+def test_cached_tokens_cannot_be_modified_by_callers():
+    tokens = utils.normalize("Sees Sirius")
+    tokens.append("ekstra")
+    assert utils.normalize("Sees Sirius") == ["sees", "sirius"]
+
+
+def test_cache_is_bounded():
+    utils.configure_token_cache(maxsize=2)
+    for line in ["en", "to", "tre", "fire"]:
+        utils.normalize(line)
+    assert utils.token_cache_info().currsize == 2
+
+
+def test_clear_token_cache_resets_statistics():
+    utils.normalize("Sees Sirius")
+    utils.clear_token_cache()
+    info = utils.token_cache_info()
+    assert info.currsize == 0
+    assert info.misses == 0
+
+
+def test_disabled_cache_is_bypassed():
+    utils.configure_token_cache(enabled=False)
+    result = utils.normalize("Sees Sirius!")
+    assert result == ["sees", "sirius"]
+    assert utils.token_cache_info().misses == 0
+
+
+def test_warm_token_cache_fills_cache():
+    utils.warm_token_cache(["Sees Sirius", "Svæve saa stille"])
+    utils.normalize("Sees Sirius")
+    info = utils.token_cache_info()
+    assert info.currsize == 2
+    assert info.hits == 1
+
+
+def test_cache_is_safe_to_use_from_threads():
+    lines = [f"Linje nummer {i % 10}" for i in range(200)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(utils.normalize, lines))
+    assert results == [["linje", "nummer", str(i % 10)] for i in range(200)]
+    assert utils.token_cache_info().currsize == 10
+
+
+def test_normalize_many_uses_the_cache():
+    utils.normalize("Sees Sirius")
+    assert utils.normalize_many(["Sees Sirius", "Svæve saa stille"]) == [["sees", "sirius"], ["svæve", "saa", "stille"]]
+    info = utils.token_cache_info()
+    assert info == utils.TokenCacheInfo(hits=1, misses=2, maxsize=utils.TOKEN_CACHE_SIZE, currsize=2)
+
+
+def test_normalize_many_without_cache_gives_the_same_tokens():
+    lines = ["Sees Sirius,", "Svæve saa stille", "en\nto"]
+    cached = utils.normalize_many(lines)
+    utils.configure_token_cache(enabled=False)
+    assert utils.normalize_many(lines) == cached